@@ -0,0 +1,93 @@
+"""
+통합 라벨 분석(analyze_label) / 전체 국가 판정(check_risks_multi) 요청당 CPU 시간 벤치마크
+
+텍스트 길이별로 따로 호출(validate_label_image / extract_allergens / parse_nutrition / check_risks) vs
+analyze_label의 요청당 CPU 시간(process_time), 전체 국가 판정: 국가별 check_risks vs check_risks_multi
+텍스트는 라벨 문구 조각(tests/samples.py)을 무작위로 이어 붙인 것.
+결과가 같은지는 tests/test_analyzer.py에서 확인한다.
+
+사용법 (backend 디렉토리에서):
+    python scripts/bench_analyzer.py --lengths 20 200 1000 --repeat 5
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from src.rules.allergen_parser import extract_allergens  # noqa: E402
+from src.rules.analyzer import analyze_label  # noqa: E402
+from src.rules.checker import RULE_FILES, check_risks, check_risks_multi  # noqa: E402
+from src.rules.document import LabelDocument  # noqa: E402
+from src.rules.label_validator import validate_label_image  # noqa: E402
+from src.rules.nutrition_parser import parse_nutrition  # noqa: E402
+from tests.samples import FRAGMENTS, LANGUAGE, OCR_ENGINE, SEPARATORS  # noqa: E402
+
+
+def separate(text: str, country: str) -> tuple:
+    """api_analyze의 기존 호출 순서 그대로"""
+    doc = LabelDocument(text)
+    validation = validate_label_image(doc)
+    allergens = extract_allergens(doc)
+    nutrition = parse_nutrition(doc)
+    pack = check_risks(doc, country, OCR_ENGINE, LANGUAGE, bool(nutrition))
+    return validation, allergens, nutrition, pack
+
+
+def fused(text: str, country: str) -> tuple:
+    result = analyze_label(text, country, OCR_ENGINE, LANGUAGE)
+    return result.validation, result.allergens, result.nutrition, result.report_pack
+
+
+def bench(lengths: list, repeat: int, seed: int) -> None:
+    rng = random.Random(seed)
+    # 'İ', 'Σ'가 든 텍스트는 analyze_label도 분석기를 하나씩 호출하므로 측정에서 뺀다
+    fragments_aligned = [f for f in FRAGMENTS if LabelDocument(f).lower_aligned]
+    for fragments in lengths:
+        text = "".join(rng.choice(fragments_aligned) + rng.choice(SEPARATORS) for _ in range(fragments))
+        timings = {}
+        for name, fn in (("따로 호출", separate), ("analyze_label", fused)):
+            fn(text, "EU")  # 규칙 로딩/매처 컴파일은 측정에서 제외
+            start = time.process_time()
+            for _ in range(repeat):
+                for country in RULE_FILES:
+                    fn(text, country)
+            timings[name] = (time.process_time() - start) / (repeat * len(RULE_FILES)) * 1000
+        print(
+            f"{len(text):8d}자 : 따로 호출 {timings['따로 호출']:8.2f}ms  "
+            f"analyze_label {timings['analyze_label']:8.2f}ms  (x{timings['따로 호출'] / timings['analyze_label']:.2f})"
+        )
+
+        # 전체 국가 판정 (국가 수만큼 check_risks vs check_risks_multi 한 번)
+        countries = list(RULE_FILES)
+        check_risks_multi(text, countries)
+        start = time.process_time()
+        for _ in range(repeat):
+            for country in countries:
+                check_risks(LabelDocument(text), country)
+        per_country = (time.process_time() - start) / repeat * 1000
+        start = time.process_time()
+        for _ in range(repeat):
+            check_risks_multi(LabelDocument(text), countries)
+        multi = (time.process_time() - start) / repeat * 1000
+        print(
+            f"{'':8s}   전체 {len(countries)}개국: 국가별 check_risks {per_country:8.2f}ms  "
+            f"check_risks_multi {multi:8.2f}ms  (x{per_country / multi:.2f})"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lengths", type=int, nargs="+", default=[20, 200, 1000], help="벤치마크 텍스트의 문구 조각 수")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    bench(args.lengths, args.repeat, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+대량 규정 검사(check_risks_batch) 처리량 벤치마크
+
+배치 크기별 초당 리포트 수 (텍스트마다 check_risks vs check_risks_batch, process_time 기준)
+텍스트는 라벨 문구 조각(tests/samples.py)을 무작위로 이어 붙인 것(국가 무작위)
+결과가 텍스트마다 check_risks와 같은지는 tests/test_batch.py에서 확인한다.
+
+사용법 (backend 디렉토리에서):
+    python scripts/bench_batch.py --batch-sizes 100 1000 5000 --fragments 12
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from src.rules.batch import BatchItem, check_risks_batch, vectorized_available  # noqa: E402
+from src.rules.checker import check_risks  # noqa: E402
+from tests.samples import COUNTRIES, LANGUAGE, OCR_ENGINE, make_text  # noqa: E402
+
+
+def make_items(rng: random.Random, count: int, fragments: int) -> list:
+    return [
+        BatchItem(make_text(rng, rng.randint(0, fragments)), rng.choice(COUNTRIES), OCR_ENGINE, LANGUAGE, rng.random() < 0.5)
+        for _ in range(count)
+    ]
+
+
+def bench(batch_sizes: list, fragments: int, seed: int) -> None:
+    rng = random.Random(seed)
+    for size in batch_sizes:
+        items = make_items(rng, size, fragments)
+        check_risks_batch(items[:10])  # 규칙 로딩/매처 컴파일은 측정에서 제외
+        start = time.process_time()
+        for item in items:
+            check_risks(*item)
+        single = time.process_time() - start
+        start = time.process_time()
+        check_risks_batch(items)
+        batch = time.process_time() - start
+        print(
+            f"배치 {size:6d}건 : 텍스트마다 {size / single:9.0f}건/초  "
+            f"check_risks_batch {size / batch:9.0f}건/초  (x{single / batch:.2f})"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--fragments", type=int, default=12, help="텍스트 하나의 최대 문구 조각 수")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"numpy/scipy 사용: {vectorized_available()}")
+    bench(args.batch_sizes, args.fragments, args.seed)
+
+
+if __name__ == "__main__":
+    main()
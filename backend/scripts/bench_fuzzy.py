@@ -0,0 +1,175 @@
+"""
+OCR 오인식 유사 매칭(check_risks fuzzy) 확인 + 지연 시간 벤치마크
+
+1) 확인
+   - 고정 사례: 'rnilk', 'peanuf', '땅코ㅇ' 같은 OCR 오인식 표기만 있는 텍스트에서 해당 알레르겐이
+     evidence.fuzzy가 있는 HIGH로 나오는지 (빠지면 종료 코드 1)
+   - 무작위 오인식: 국가마다 규칙 키워드에 OCR 오류(rn/m, 혼동 글자 치환, 글자 빠짐, 받침 분리)를 하나 넣어 재현율을 센다.
+   - 정확 매칭 유지: 라벨 문구 조각(tests/samples.py) 텍스트에서 fuzzy=False 결과의 HIGH가 fuzzy=True에도 그대로 있는지
+     (다르면 종료 코드 1), 유사 표기로 추가된 HIGH 비율(오탐 지표)도 출력한다.
+2) 벤치마크: 텍스트 길이별 check_risks fuzzy=False / True의 요청당 CPU 시간(1,000자당)과 배율.
+   토큰 캐시가 빈 상태(처음 보는 텍스트)와 OCR 잡음을 넣은 텍스트도 잰다.
+
+사용법 (backend 디렉토리에서):
+    python scripts/bench_fuzzy.py --texts 300 --lengths 20 200 1000 --repeat 5
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from src.rules import fuzzy  # noqa: E402
+from src.rules.checker import RULE_FILES, check_risks, rule_registry  # noqa: E402
+from src.rules.matcher import is_korean  # noqa: E402
+from tests.samples import make_text  # noqa: E402
+
+# (국가, 텍스트, 유사 표기로 찾아야 하는 알레르겐)
+CASES = [
+    ("US", "Ingredients: rnilk powder, sugar", "Milk"),
+    ("US", "Ingredients: sugar, peanuf oil", "Peanuts"),
+    ("US", "Ingredients: sodium caseinafe, salt", "Milk"),
+    ("US", "Ingredients: sugar, wheal", "Wheat"),
+    ("US", "Ingredients: s0y sauce", "Soybeans"),
+    ("US", "원재료명: 땅코ㅇ, 설탕", "Peanuts"),
+    ("US", "원재료명: 설탕, 마요네스", "Eggs"),
+    ("US", "원재료명: 설탕, 새으젓", "Shellfish"),
+]
+
+# 규칙 파일이 있는 국가만 (tests.samples.COUNTRIES의 "XX"는 fuzzy 대상이 없다)
+COUNTRIES = list(RULE_FILES)
+# 라틴 OCR 혼동 치환 (글자 → 잘못 읽은 글자)
+SWAPS = {"m": "rn", "w": "vv", "o": "0", "l": "1", "t": "f", "e": "c", "i": "l", "n": "h", "s": "5", "u": "v"}
+
+
+def corrupt(word: str, rng: random.Random) -> str:
+    """키워드에 OCR 오류 하나 (라틴: 혼동 치환/글자 빠짐, 한글: 받침 분리/자모 하나 바꾸기)"""
+    if is_korean(word):
+        pos = rng.randrange(len(word))
+        parts = fuzzy.jamo(word[pos])
+        if len(parts) == 3 and rng.random() < 0.5:
+            # '콩' → '코ㅇ' (받침이 떨어져 나간 OCR)
+            return word[:pos] + chr(0xAC00 + (ord(word[pos]) - 0xAC00) // 28 * 28) + parts[2] + word[pos + 1:]
+        offset = (ord(word[pos]) - 0xAC00) % 28
+        return word[:pos] + chr(ord(word[pos]) - offset + (offset + 1) % 28) + word[pos + 1:]
+    swappable = [i for i, ch in enumerate(word) if ch in SWAPS]
+    if swappable and rng.random() < 0.7:
+        i = rng.choice(swappable)
+        return word[:i] + SWAPS[word[i]] + word[i + 1:]
+    i = rng.randrange(1, len(word) - 1)
+    return word[:i] + word[i + 1:]
+
+
+def fuzzy_risk(pack: dict, allergen: str):
+    return next(
+        (r for r in pack["risks"] if r["allergen"] == allergen and r["severity"] == "HIGH" and r["evidence"].get("fuzzy")),
+        None,
+    )
+
+
+def check_cases() -> int:
+    failed = 0
+    for country, text, allergen in CASES:
+        risk = fuzzy_risk(check_risks(text, country), allergen)
+        if risk is None or not risk["expert_check_required"]:
+            failed += 1
+            print(f"  누락 [{country}] {text!r} → {allergen}")
+    print(f"고정 사례: {len(CASES)}건, 누락 {failed}건")
+    return failed
+
+
+def check_recall(rng: random.Random, samples: int) -> None:
+    found = total = 0
+    for country in COUNTRIES:
+        rules = rule_registry.get(country)
+        index = fuzzy.fuzzy_index_for(rules)
+        eligible = [
+            (allergen.name, kw) for allergen in rules.allergens for kw in allergen.keywords
+            if fuzzy.max_edits(fuzzy.jamo(kw) if is_korean(kw) else kw, is_korean(kw)) > 0
+            and (all("가" <= ch <= "힣" for ch in kw) or kw.isalpha() and kw.isascii())
+        ]
+        if not eligible:
+            continue
+        for name, kw in rng.sample(eligible, min(samples, len(eligible))):
+            variant = corrupt(kw.lower(), rng)
+            if variant in index._exact:
+                continue
+            total += 1
+            if fuzzy_risk(check_risks(f"원재료명: {variant}", country), name) is not None:
+                found += 1
+    print(f"무작위 오인식 재현율: {found}/{total} ({found / max(total, 1):.1%})")
+
+
+def check_exact(rng: random.Random, texts: int) -> int:
+    mismatches = added = 0
+    for _ in range(texts):
+        text = make_text(rng, rng.randint(1, 20))
+        for country in COUNTRIES:
+            exact = check_risks(text, country, fuzzy=False)
+            both = check_risks(text, country)
+            exact_high = [r for r in exact["risks"] if r["severity"] == "HIGH"]
+            kept = [r for r in both["risks"] if r["severity"] == "HIGH" and not r["evidence"].get("fuzzy")]
+            if exact_high != kept:
+                mismatches += 1
+            added += len([r for r in both["risks"] if r["evidence"].get("fuzzy")])
+    print(f"정확 매칭 유지: 텍스트 {texts}개 x 국가 {len(COUNTRIES)}개, 불일치 {mismatches}건, 유사 표기 HIGH 추가 {added}건")
+    return mismatches
+
+
+def add_noise(text: str, rng: random.Random, rate: float = 0.03) -> str:
+    return "".join(SWAPS[ch] if ch in SWAPS and rng.random() < rate else ch for ch in text)
+
+
+def _cpu_ms(texts: list, repeat: int, use_fuzzy: bool) -> float:
+    start = time.process_time()
+    for _ in range(repeat):
+        for text in texts:
+            check_risks(text, "US", fuzzy=use_fuzzy)
+    return (time.process_time() - start) / (repeat * len(texts)) * 1000
+
+
+def bench(rng: random.Random, lengths: list, repeat: int) -> None:
+    for fragments in lengths:
+        texts = [make_text(rng, fragments) for _ in range(50)]
+        noisy = [add_noise(text, rng) for text in texts]
+        chars = sum(map(len, texts)) / len(texts)
+        for label, batch in (("정상", texts), ("OCR 잡음", noisy)):
+            for text in batch:
+                check_risks(text, "US")
+            exact_ms = _cpu_ms(batch, repeat, False)
+            fuzzy_ms = _cpu_ms(batch, repeat, True)
+            # 토큰/한글 단어 캐시를 비운 첫 호출 (처음 보는 표기만 있을 때)
+            index = fuzzy.fuzzy_index_for(rule_registry.get("US"))
+            index._token_cache.clear()
+            index._word_cache.clear()
+            cold_ms = _cpu_ms(batch, 1, True)
+            print(
+                f"{chars:7.0f}자 {label:6s}: fuzzy=False {exact_ms:6.2f}ms  fuzzy=True {fuzzy_ms:6.2f}ms "
+                f"(x{fuzzy_ms / exact_ms:.2f}, 캐시 없음 {cold_ms:6.2f}ms)  "
+                f"{fuzzy_ms / chars * 1000:.3f}ms/1,000자"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, default=300, help="정확 매칭 유지 확인에 쓸 텍스트 수")
+    parser.add_argument("--samples", type=int, default=60, help="국가마다 오인식을 넣을 키워드 수")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[20, 200, 1000], help="텍스트당 문구 조각 수")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    failed = check_cases()
+    check_recall(rng, args.samples)
+    mismatches = check_exact(rng, args.texts)
+    bench(rng, args.lengths, args.repeat)
+    if failed or mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+파생 원재료 온톨로지 확인 + 용어 수에 따른 규칙 컴파일/스캔 시간
+
+1) 확인: 국가마다 온톨로지에서 알레르겐에 닿는 파생 원재료 하나씩 '원재료명: <원재료>' 텍스트로 check_risks를 돌려
+   그 알레르겐이 HIGH로 나오고 hint에 원재료, evidence.derivation에 사슬이 있는지 확인한다. (빠지면 종료 코드 1)
+2) 벤치마크: 실제 온톨로지에 합성 원재료를 더해 용어 수를 늘려 가며(임시 파일)
+   US 규칙 컴파일 시간과 같은 텍스트의 check_risks 시간(1,000자당)을 잰다. 스캔은 trie 정규식 한 번이라
+   용어 수가 늘어도 글자당 비용이 거의 같아야 한다.
+
+사용법 (backend 디렉토리에서):
+    python scripts/bench_ontology.py --terms 0 1000 10000 30000 --repeat 20
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from src.rules.checker import (  # noqa: E402
+    CHECKER_VERSION, ONTOLOGY_PATH, RULE_FILES, RULES_DIR, WARNING_MARKERS, _get_allergen_rule_description,
+    check_risks, rule_registry
+)
+from src.rules.registry import RuleRegistry  # noqa: E402
+
+# 벤치마크 텍스트 (파생 원재료 / 규칙 키워드 / 무관한 문구)
+FRAGMENTS = [
+    "원재료명: 유청단백분말, 탈지분유, 대두레시틴, 소맥분, 참기름",
+    "Ingredients: sodium caseinate, soy lecithin, malt extract, whey protein isolate",
+    "밀가루(밀:미국산), 설탕, 정제소금, 산도조절제",
+    "Contains: Milk, Soy, Wheat.",
+    "유통기한: 2026.12.31 까지 제조원: (주)케이푸드",
+    "나트륨 470mg 탄수화물 79g 당류 4g 단백질 10g",
+]
+
+
+def check_coverage() -> int:
+    missing = 0
+    checked = 0
+    for country in RULE_FILES:
+        rules = rule_registry.get(country)
+        for allergen in rules.allergens:
+            for derived in allergen.derived:
+                checked += 1
+                pack = check_risks(f"원재료명: {derived.term}", country)
+                risk = next((r for r in pack["risks"] if r["allergen"] == allergen.name), None)
+                ok = (
+                    risk is not None and risk["severity"] == "HIGH"
+                    and derived.term in risk["evidence"]["hint"]
+                    and any(chain.startswith(f"{derived.term} → ") for chain in risk["evidence"].get("derivation", []))
+                )
+                if not ok:
+                    missing += 1
+                    if missing <= 5:
+                        print(f"  누락 [{country}] {derived.term} → {allergen.name}")
+    print(f"온톨로지 확인: 국가 {len(RULE_FILES)}개, 파생 원재료 {checked}건, 누락 {missing}건")
+    return missing
+
+
+def _synthetic_ontology(extra: int, seed: int) -> dict:
+    """실제 온톨로지 + 규칙 키워드 아래에 붙인 합성 원재료 extra개 (영어/한글 반반)"""
+    with open(ONTOLOGY_PATH, encoding="utf-8") as f:
+        data = json.load(f)
+    rng = random.Random(seed)
+    parents = [kw for allergen in rule_registry.get("US").allergens for kw in allergen.keywords]
+    syllables = [chr(c) for c in range(0xAC00, 0xAC00 + 11172, 37)]
+    derivations = data["derivations"]
+    terms = set()
+    while len(terms) < extra:
+        if rng.random() < 0.5:
+            term = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(5, 14)))
+        else:
+            term = "".join(rng.choice(syllables) for _ in range(rng.randint(3, 6)))
+        terms.add(term)
+    for term in sorted(terms):
+        derivations.setdefault(rng.choice(parents), []).append(term)
+    return data
+
+
+def bench(term_counts: list, repeat: int, seed: int) -> None:
+    rng = random.Random(seed)
+    text = "\n".join(rng.choice(FRAGMENTS) for _ in range(200))
+    with tempfile.TemporaryDirectory() as tmp:
+        for extra in term_counts:
+            path = os.path.join(tmp, f"ontology_{extra}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(_synthetic_ontology(extra, seed), f, ensure_ascii=False)
+            registry = RuleRegistry(
+                RULE_FILES, RULES_DIR, CHECKER_VERSION, _get_allergen_rule_description,
+                markers=WARNING_MARKERS, ontology_path=path,
+            )
+            start = time.perf_counter()
+            rules = registry.get("US")
+            compile_ms = (time.perf_counter() - start) * 1000
+
+            check_risks(text, "US", rules=rules)
+            start = time.process_time()
+            for _ in range(repeat):
+                check_risks(text, "US", rules=rules)
+            per_call = (time.process_time() - start) / repeat * 1000
+            print(
+                f"합성 원재료 {extra:6d}개 (매처 용어 {len(rules.matcher):6d}개): "
+                f"컴파일 {compile_ms:8.1f}ms  check_risks {per_call:6.2f}ms ({per_call / len(text) * 1000:.3f}ms/1,000자)"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--terms", type=int, nargs="+", default=[0, 1000, 10000, 30000], help="더할 합성 원재료 수")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    missing = check_coverage()
+    bench(args.terms, args.repeat, args.seed)
+    if missing:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
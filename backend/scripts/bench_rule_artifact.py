@@ -0,0 +1,55 @@
+"""
+규칙 로딩 시간 비교: 규칙 JSON 컴파일 vs 컴파일된 규칙 아티팩트(mmap)
+
+새 프로세스마다(워커 시작과 같은 조건) 전체 국가 규칙을 처음 읽는 데 걸린 시간을 잰다.
+아티팩트는 임시 경로에 빌드해서 쓰고, 기존 아티팩트는 건드리지 않는다.
+
+사용법 (backend 디렉토리에서):
+    python scripts/bench_rule_artifact.py --runs 20
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_CHILD = """
+import time
+from src.rules.checker import RULE_FILES, rule_registry
+start = time.perf_counter()
+for country in RULE_FILES:
+    rule_registry.get(country)
+print(time.perf_counter() - start)
+"""
+
+
+def _load_time(artifact_path: str) -> float:
+    env = dict(os.environ, RULES_ARTIFACT=artifact_path, PYTHONPATH=BACKEND_DIR)
+    out = subprocess.run(
+        [sys.executable, "-c", _CHILD], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return float(out.strip().splitlines()[-1]) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        artifact = os.path.join(tmp, "rules.bin")
+        subprocess.run(
+            [sys.executable, "-m", "src.rules.artifact", "--out", artifact],
+            cwd=BACKEND_DIR, env=dict(os.environ, PYTHONPATH=BACKEND_DIR), check=True, stdout=subprocess.DEVNULL,
+        )
+        missing = os.path.join(tmp, "missing.bin")
+        for name, path in (("규칙 JSON 컴파일", missing), ("아티팩트 mmap", artifact)):
+            times = [_load_time(path) for _ in range(args.runs)]
+            print(f"{name:14s}: 중앙값 {statistics.median(times):6.2f}ms  최소 {min(times):6.2f}ms  (전체 {len(times)}회)")
+
+
+if __name__ == "__main__":
+    main()
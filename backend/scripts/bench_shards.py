@@ -0,0 +1,101 @@
+"""
+save_report 쓰기 처리량 벤치마크: 리포트 샤드 수(REPORT_SHARDS)별 비교
+
+샤드 수는 src.api.db import 시점에 정해지므로 샤드 수마다 새 임시 DB로 하위 프로세스를 띄워 측정한다.
+
+사용법 (backend 디렉토리에서):
+    python scripts/bench_shards.py --shards 1 2 4 --reports 2000 --threads 16 [--write-behind]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+SAMPLE_RISKS = [{
+    "allergen": "Milk",
+    "risk": "[US FDA] 필수 알레르겐 'Milk' 포함 가능성이 있으나, 명시적인 경고 문구가 확인되지 않았습니다.",
+    "severity": "HIGH",
+    "confidence": 0.85,
+    "rule_id": "US_MILK_LABELING_001",
+    "details": {"regulation": "FALCPA", "authority": "U.S. Food and Drug Administration (FDA)"},
+    "evidence": {"matched": ["원재료명: 밀가루, 우유, 설탕"], "hint": "'우유' 키워드가 발견되었습니다."},
+}]
+
+
+def _measure(reports: int, threads: int) -> dict:
+    """하위 프로세스: 환경변수(DATA_DIR, REPORT_SHARDS)가 설정된 상태에서 저장 처리량 측정"""
+    from src.api import db
+
+    def _save_one(i: int) -> str:
+        return db.save_report(
+            user_id=f"bench-{i % 50}",
+            country="US",
+            ocr_engine="google",
+            ocr_text="원재료명: 밀가루(밀:미국산), 설탕, 우유, 대두유\n나트륨 120mg 탄수화물 20g\n" * 5,
+            allergens=["우유", "밀"],
+            nutrition={"나트륨": {"value": 120, "unit": "mg"}},
+            risks=SAMPLE_RISKS,
+            promo={"detail_copy": "", "poster_text": "", "buyer_pitch": ""},
+            summary={"overall_summary": "bench"},
+        )
+
+    db.init_db()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        ids = list(pool.map(_save_one, range(reports)))
+    elapsed = time.perf_counter() - start
+    db.close_report_writer()
+
+    assert len(set(ids)) == reports
+    assert db.count_reports() == reports
+    per_shard = [sum(1 for i in ids if db.shard_for(i) == shard) for shard in range(db.SHARD_COUNT)]
+    return {"rate": reports / elapsed, "per_shard": per_shard}
+
+
+def run(shards: int, reports: int, threads: int, write_behind: bool) -> dict:
+    env = dict(
+        os.environ,
+        DATA_DIR=tempfile.mkdtemp(prefix=f"kfood_bench_shards{shards}_"),
+        REPORT_SHARDS=str(shards),
+        REPORT_WRITE_BEHIND="1" if write_behind else "0",
+        PYTHONPATH=BACKEND_DIR,
+    )
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--measure", "--reports", str(reports), "--threads", str(threads)],
+        env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--reports", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--write-behind", action="store_true", help="샤드별 그룹 커밋 writer 사용")
+    parser.add_argument("--measure", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(_measure(args.reports, args.threads)))
+        return
+
+    baseline = None
+    for shards in args.shards:
+        result = run(shards, args.reports, args.threads, args.write_behind)
+        baseline = baseline or result["rate"]
+        print(
+            f"샤드 {shards:2d}개 : {result['rate']:10.1f} inserts/sec  (x{result['rate'] / baseline:.2f})"
+            f"  샤드별 {result['per_shard']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
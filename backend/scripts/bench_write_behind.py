@@ -0,0 +1,72 @@
+"""
+save_report 쓰기 처리량 벤치마크: 개별 커밋 vs 그룹 커밋(write-behind)
+
+사용법 (backend 디렉토리에서):
+    python scripts/bench_write_behind.py --reports 2000 --threads 16
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 벤치마크용 임시 DB 사용 (src.api.db import 전에 설정)
+os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="kfood_bench_")
+
+from src.api import db  # noqa: E402
+
+SAMPLE_RISKS = [{
+    "allergen": "Milk",
+    "risk": "[US FDA] 필수 알레르겐 'Milk' 포함 가능성이 있으나, 명시적인 경고 문구가 확인되지 않았습니다.",
+    "severity": "HIGH",
+    "confidence": 0.85,
+    "rule_id": "US_MILK_LABELING_001",
+    "details": {"regulation": "FALCPA", "authority": "U.S. Food and Drug Administration (FDA)"},
+    "evidence": {"matched": ["원재료명: 밀가루, 우유, 설탕"], "hint": "'우유' 키워드가 발견되었습니다."},
+}]
+
+
+def _save_one(i: int) -> str:
+    return db.save_report(
+        user_id=f"bench-{i % 50}",
+        country="US",
+        ocr_engine="google",
+        ocr_text="원재료명: 밀가루(밀:미국산), 설탕, 우유, 대두유\n나트륨 120mg 탄수화물 20g\n" * 5,
+        allergens=["우유", "밀"],
+        nutrition={"나트륨": {"value": 120, "unit": "mg"}},
+        risks=SAMPLE_RISKS,
+        promo={"detail_copy": "", "poster_text": "", "buyer_pitch": ""},
+        summary={"overall_summary": "bench"},
+    )
+
+
+def run(reports: int, threads: int, write_behind: bool) -> float:
+    os.environ["REPORT_WRITE_BEHIND"] = "1" if write_behind else "0"
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        ids = list(pool.map(_save_one, range(reports)))
+    elapsed = time.perf_counter() - start
+    db.close_report_writer()
+    assert len(set(ids)) == reports
+    return reports / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reports", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=16)
+    args = parser.parse_args()
+
+    db.init_db()
+    print(f"DB: {db.DB_PATH}")
+    baseline = run(args.reports, args.threads, write_behind=False)
+    print(f"개별 커밋   : {baseline:10.1f} inserts/sec")
+    grouped = run(args.reports, args.threads, write_behind=True)
+    print(f"그룹 커밋   : {grouped:10.1f} inserts/sec  (x{grouped / baseline:.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+"""
+컴플라이언스 통계 (증분 롤업 테이블)
+
+리포트 원본(reports.payload)을 매번 디코딩하지 않도록 save_report / delete_report 시점에
+같은 트랜잭션에서 아래 롤업을 갱신한다. (db.py)
+
+- analytics_daily        : 일(UTC) × 국가별 리포트 수, HIGH 리스크 리포트 수, 교차오염 리포트 수
+- analytics_flags_daily  : 일(UTC) × 국가 × 알레르겐 × 심각도별 플래그 리포트 수
+- analytics_report_facts : 리포트별 기여분 (삭제/재평가 시 원본을 디코딩하지 않고 정확히 차감하기 위함)
+
+/api/analytics는 이 롤업만 읽어 일/주/월 단위로 집계한다.
+
+롤업이 원본과 어긋났다고 의심되면 처음부터 다시 계산한다. (보관된 리포트 포함)
+
+    python -m src.api.analytics rebuild
+"""
+import argparse
+import json
+import sqlite3
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+HIGH_SEVERITY = "HIGH"
+CROSS_CONTAMINATION = "CROSS_CONTAMINATION"
+
+# 리스크 allergen 값 중 실제 알레르겐이 아닌 항목 (상위 알레르겐 집계에서 제외)
+NON_ALLERGEN_RISKS = ("None", "PASS", "Unknown", CROSS_CONTAMINATION)
+
+# 집계 단위 → day(YYYY-MM-DD)를 구간 시작일로 바꾸는 SQL 식 (주는 월요일 시작)
+BUCKET_EXPRESSIONS = {
+    "day": "day",
+    "week": "date(day, 'weekday 0', '-6 days')",
+    "month": "substr(day, 1, 7) || '-01'",
+}
+
+
+class ReportFacts(NamedTuple):
+    report_id: str
+    day: str
+    country: str
+    high_risk: int
+    cross_contamination: int
+    flags: Tuple[Tuple[str, str], ...]  # (allergen, severity) 중복 제거
+
+
+def init_analytics_schema(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS analytics_daily (
+            day TEXT NOT NULL,
+            country TEXT NOT NULL,
+            reports INTEGER NOT NULL DEFAULT 0,
+            high_risk_reports INTEGER NOT NULL DEFAULT 0,
+            cross_contamination_reports INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, country)
+        ) WITHOUT ROWID;
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS analytics_flags_daily (
+            day TEXT NOT NULL,
+            country TEXT NOT NULL,
+            allergen TEXT NOT NULL,
+            severity TEXT NOT NULL,
+            reports INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, country, allergen, severity)
+        ) WITHOUT ROWID;
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS analytics_report_facts (
+            report_id TEXT PRIMARY KEY,
+            day TEXT NOT NULL,
+            country TEXT NOT NULL,
+            high_risk INTEGER NOT NULL,
+            cross_contamination INTEGER NOT NULL,
+            flags TEXT NOT NULL
+        );
+    """)
+
+
+def report_facts(
+    report_id: str,
+    created_at: str,
+    country: str,
+    risks: Optional[List[Dict[str, Any]]]
+) -> ReportFacts:
+    """리포트 한 건이 롤업에 기여하는 값 계산"""
+    flags = set()
+    high_risk = cross_contamination = 0
+    for risk in risks or []:
+        if not isinstance(risk, dict):
+            continue
+        allergen = risk.get("allergen") or "Unknown"
+        severity = risk.get("severity") or "Unknown"
+        flags.add((allergen, severity))
+        if severity == HIGH_SEVERITY:
+            high_risk = 1
+        if allergen == CROSS_CONTAMINATION or risk.get("cross_contamination"):
+            cross_contamination = 1
+
+    return ReportFacts(
+        report_id=report_id,
+        day=(created_at or "")[:10],
+        country=country,
+        high_risk=high_risk,
+        cross_contamination=cross_contamination,
+        flags=tuple(sorted(flags)),
+    )
+
+
+def _apply(conn: sqlite3.Connection, facts: Sequence[ReportFacts], sign: int) -> None:
+    """facts를 롤업에 더하거나(sign=1) 뺀다(sign=-1). 배치 안에서 먼저 합산해 키당 한 번만 갱신"""
+    daily: Dict[Tuple[str, str], List[int]] = {}
+    flags: Counter = Counter()
+    for f in facts:
+        totals = daily.setdefault((f.day, f.country), [0, 0, 0])
+        totals[0] += 1
+        totals[1] += f.high_risk
+        totals[2] += f.cross_contamination
+        for allergen, severity in f.flags:
+            flags[(f.day, f.country, allergen, severity)] += 1
+
+    conn.executemany("""
+        INSERT INTO analytics_daily (day, country, reports, high_risk_reports, cross_contamination_reports)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (day, country) DO UPDATE SET
+            reports = reports + excluded.reports,
+            high_risk_reports = high_risk_reports + excluded.high_risk_reports,
+            cross_contamination_reports = cross_contamination_reports + excluded.cross_contamination_reports
+    """, [(day, country, sign * r, sign * h, sign * c) for (day, country), (r, h, c) in daily.items()])
+    conn.executemany("""
+        INSERT INTO analytics_flags_daily (day, country, allergen, severity, reports)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (day, country, allergen, severity) DO UPDATE SET
+            reports = reports + excluded.reports
+    """, [key + (sign * n,) for key, n in flags.items()])
+
+    if sign < 0:
+        conn.execute("DELETE FROM analytics_daily WHERE reports <= 0")
+        conn.execute("DELETE FROM analytics_flags_daily WHERE reports <= 0")
+
+
+def record_reports(conn: sqlite3.Connection, facts: Sequence[ReportFacts]) -> None:
+    """새 리포트들의 기여분을 롤업에 반영 (호출자가 commit)"""
+    if not facts:
+        return
+    conn.executemany("""
+        INSERT INTO analytics_report_facts (report_id, day, country, high_risk, cross_contamination, flags)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, [
+        (f.report_id, f.day, f.country, f.high_risk, f.cross_contamination, json.dumps(f.flags))
+        for f in facts
+    ])
+    _apply(conn, facts, 1)
+
+
+def forget_reports(conn: sqlite3.Connection, report_ids: Sequence[str]) -> None:
+    """리포트들의 기여분을 롤업에서 차감 (호출자가 commit)"""
+    facts = []
+    for report_id in report_ids:
+        row = conn.execute(
+            "SELECT day, country, high_risk, cross_contamination, flags FROM analytics_report_facts WHERE report_id = ?",
+            (report_id,)
+        ).fetchone()
+        if row is None:
+            continue
+        facts.append(ReportFacts(
+            report_id, row[0], row[1], row[2], row[3],
+            tuple(tuple(flag) for flag in json.loads(row[4]))
+        ))
+
+    if not facts:
+        return
+    conn.executemany(
+        "DELETE FROM analytics_report_facts WHERE report_id = ?", [(f.report_id,) for f in facts]
+    )
+    _apply(conn, facts, -1)
+
+
+def clear_rollups(conn: sqlite3.Connection) -> None:
+    """롤업 전체 삭제 (재계산 전 단계, 호출자가 commit)"""
+    conn.execute("DELETE FROM analytics_daily")
+    conn.execute("DELETE FROM analytics_flags_daily")
+    conn.execute("DELETE FROM analytics_report_facts")
+
+
+def query_analytics(
+    conns: Sequence[sqlite3.Connection],
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    bucket: str = "week",
+    country: Optional[str] = None,
+    top: int = 10
+) -> Dict[str, Any]:
+    """
+    롤업 테이블에서 기간별 통계 조회 (start/end는 YYYY-MM-DD, 양끝 포함)
+    - conns: 리포트 샤드별 연결. 롤업은 샤드마다 따로 쌓이므로 (기간, 국가)/알레르겐 단위로 합산한다.
+
+    Returns:
+        {
+          series: [{period, country, reports, high_risk_reports, high_risk_rate,
+                    cross_contamination_reports, cross_contamination_rate}],
+          top_allergens: [{allergen, reports, high_risk_reports}],
+          totals: {reports, high_risk_reports, high_risk_rate, cross_contamination_reports, cross_contamination_rate}
+        }
+    """
+    if bucket not in BUCKET_EXPRESSIONS:
+        raise ValueError(f"Unknown bucket: {bucket}. Allowed: {', '.join(BUCKET_EXPRESSIONS)}")
+
+    where, params = ["1 = 1"], []
+    if start:
+        where.append("day >= ?")
+        params.append(start)
+    if end:
+        where.append("day <= ?")
+        params.append(end)
+    if country:
+        where.append("country = ?")
+        params.append(country)
+    where_sql = " AND ".join(where)
+    period = BUCKET_EXPRESSIONS[bucket]
+    placeholders = ", ".join("?" for _ in NON_ALLERGEN_RISKS)
+
+    # (period, country) → [reports, high_risk_reports, cross_contamination_reports]
+    series_sums: Dict[Tuple[str, str], List[int]] = defaultdict(lambda: [0, 0, 0])
+    # allergen → [reports, high_risk_reports]
+    allergen_sums: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+
+    for conn in conns:
+        for row in conn.execute(f"""
+            SELECT {period} AS period, country,
+                   SUM(reports), SUM(high_risk_reports), SUM(cross_contamination_reports)
+            FROM analytics_daily
+            WHERE {where_sql}
+            GROUP BY period, country
+        """, params):
+            sums = series_sums[(row[0], row[1])]
+            for i in range(3):
+                sums[i] += row[2 + i] or 0
+
+        for row in conn.execute(f"""
+            SELECT allergen, SUM(reports),
+                   SUM(CASE WHEN severity = ? THEN reports ELSE 0 END)
+            FROM analytics_flags_daily
+            WHERE {where_sql} AND allergen NOT IN ({placeholders})
+            GROUP BY allergen
+        """, [HIGH_SEVERITY, *params, *NON_ALLERGEN_RISKS]):
+            sums = allergen_sums[row[0]]
+            sums[0] += row[1] or 0
+            sums[1] += row[2] or 0
+
+    series = [
+        _with_rates({
+            "period": key[0],
+            "country": key[1],
+            "reports": sums[0],
+            "high_risk_reports": sums[1],
+            "cross_contamination_reports": sums[2],
+        })
+        for key, sums in sorted(series_sums.items())
+    ]
+
+    top_allergens = [
+        {"allergen": allergen, "reports": sums[0], "high_risk_reports": sums[1]}
+        for allergen, sums in sorted(allergen_sums.items(), key=lambda item: (-item[1][0], item[0]))[:top]
+    ]
+
+    totals = _with_rates({
+        "reports": sum(s["reports"] for s in series),
+        "high_risk_reports": sum(s["high_risk_reports"] for s in series),
+        "cross_contamination_reports": sum(s["cross_contamination_reports"] for s in series),
+    })
+
+    return {
+        "bucket": bucket,
+        "start": start,
+        "end": end,
+        "country": country,
+        "series": series,
+        "top_allergens": top_allergens,
+        "totals": totals,
+    }
+
+
+def _with_rates(item: Dict[str, Any]) -> Dict[str, Any]:
+    reports = item["reports"] or 0
+    item["high_risk_rate"] = round(item["high_risk_reports"] / reports, 4) if reports else 0.0
+    item["cross_contamination_rate"] = round(item["cross_contamination_reports"] / reports, 4) if reports else 0.0
+    return item
+
+
+def facts_from_rows(conn: sqlite3.Connection, rows: Iterable[sqlite3.Row]) -> List[ReportFacts]:
+    """reports/reports_archive 행(REPORT_DOC_SELECT/ARCHIVE_DOC_SELECT 결과)에서 ReportFacts 계산"""
+    from src.api.storage import row_to_doc
+
+    return [
+        report_facts(row["id"], row["created_at"], row["country"], row_to_doc(conn, row).get("risks"))
+        for row in rows
+    ]
+
+
+def rebuild_rollups(conn: sqlite3.Connection, progress) -> int:
+    """
+    롤업을 비우고 reports + reports_archive 전체에서 다시 계산 (호출자가 트랜잭션 관리)
+    - 보관은 삭제가 아니므로 보관된 리포트도 통계에 남는다. (보관 테이블이 생기기 전 마이그레이션 단계에서는 reports만)
+    """
+    from src.api.migrations import ARCHIVE_DOC_SELECT, REPORT_DOC_SELECT, backfill
+    from src.api.retention import ARCHIVE_TABLE
+
+    def _record(conn: sqlite3.Connection, rows: List[sqlite3.Row]) -> None:
+        record_reports(conn, facts_from_rows(conn, rows))
+
+    clear_rollups(conn)
+    rows = backfill(conn, progress, "analytics 롤업 재계산", REPORT_DOC_SELECT, _record)
+    has_archive = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (ARCHIVE_TABLE,)
+    ).fetchone()
+    if has_archive:
+        rows += backfill(
+            conn, progress, "analytics 롤업 재계산 (보관)", ARCHIVE_DOC_SELECT, _record, table=ARCHIVE_TABLE
+        )
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="컴플라이언스 통계 롤업 도구")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("rebuild", help="reports + reports_archive 전체에서 롤업 테이블 재계산")
+    parser.parse_args(argv)
+
+    from src.api.db import SHARD_PATHS, init_db
+    init_db()
+
+    # 재계산 중 들어오는 저장/삭제가 롤업에 섞이지 않도록 샤드마다 하나의 쓰기 트랜잭션으로 실행
+    rows = 0
+    for path in SHARD_PATHS:
+        conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("BEGIN IMMEDIATE;")
+            try:
+                rows += rebuild_rollups(conn, lambda message: print(f"[analytics] {message}"))
+                conn.execute("COMMIT;")
+            except BaseException:
+                conn.execute("ROLLBACK;")
+                raise
+        finally:
+            conn.close()
+    print(f"[analytics] 완료: {rows:,}건")
+
+
+if __name__ == "__main__":
+    main()
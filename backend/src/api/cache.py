@@ -0,0 +1,278 @@
+"""
+리포트/사용자 이메일 read-through 캐시
+
+리포트 페이지, PDF 다운로드, 공유 링크가 같은 report_id를 반복 조회하므로
+디코딩된 리포트 dict와 user_id → email 매핑을 캐시한다. (db.py에서 사용)
+
+- 프로세스 내 LRU + TTL 캐시 (항상 사용)
+- 공유 디스크 캐시 (선택): REPORT_CACHE_DIR을 지정하면 같은 디렉토리를 쓰는 워커끼리
+  SQLite 파일 하나로 값을 공유한다. 무효화는 공유 파일의 invalidations 로그에도 기록되고,
+  각 워커는 최대 CACHE_SYNC_INTERVAL초마다 로그를 읽어 자기 LRU에서도 해당 키를 지운다.
+
+무효화는 키 단위로 정확히 수행한다. (delete_report, upsert_user_email, unlink_user_email, 재평가)
+조회 중에 무효화가 끼어들면 조회 결과를 캐시에 넣지 않는다. (token() / set(..., token))
+
+캐시된 값은 여러 요청이 공유하므로 호출자는 중첩된 값(리스트/딕셔너리)을 수정하면 안 된다.
+
+환경변수:
+- REPORT_CACHE_SIZE=1024   리포트 캐시 최대 항목 수 (0이면 캐시 사용 안 함)
+- REPORT_CACHE_TTL=300     리포트 캐시 TTL(초)
+- USER_CACHE_SIZE=4096     이메일 캐시 최대 항목 수
+- USER_CACHE_TTL=60        이메일 캐시 TTL(초)
+- REPORT_CACHE_DIR         공유 디스크 캐시 디렉토리 (미지정 시 사용 안 함)
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+CACHE_SYNC_INTERVAL = 1.0
+
+# 캐시에 없음을 나타내는 값 (None도 캐시할 수 있으므로 별도 sentinel 사용)
+MISSING = object()
+
+
+class SharedCache:
+    """여러 워커 프로세스가 공유하는 SQLite 파일 캐시 (값은 JSON으로 저장)"""
+
+    def __init__(self, path: str, retention: float = 3600.0):
+        self.path = path
+        self._retention = retention
+        self._local = threading.local()
+        self._writes = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode = WAL;")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            );
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS invalidations (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                key TEXT NOT NULL,
+                at REAL NOT NULL
+            );
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_invalidations_key ON invalidations(key, seq);")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA synchronous = NORMAL;")
+            self._local.conn = conn
+        return conn
+
+    def last_seq(self) -> int:
+        return self._conn().execute("SELECT COALESCE(MAX(seq), 0) FROM invalidations").fetchone()[0]
+
+    def get(self, key: str) -> Any:
+        row = self._conn().execute(
+            "SELECT value FROM cache WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else MISSING
+
+    def set(self, key: str, value: Any, ttl: float, since_seq: int) -> None:
+        """since_seq 이후 key가 무효화되지 않았을 때만 저장"""
+        self._conn().execute(
+            """
+            INSERT OR REPLACE INTO cache (key, value, expires_at)
+            SELECT ?, ?, ?
+            WHERE NOT EXISTS (SELECT 1 FROM invalidations WHERE key = ? AND seq > ?)
+            """,
+            (key, json.dumps(value, ensure_ascii=False), time.time() + ttl, key, since_seq)
+        )
+
+    def invalidate(self, keys) -> None:
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE;")
+        try:
+            conn.executemany("DELETE FROM cache WHERE key = ?", [(k,) for k in keys])
+            conn.executemany("INSERT INTO invalidations (key, at) VALUES (?, ?)", [(k, now) for k in keys])
+            conn.execute("COMMIT;")
+        except BaseException:
+            conn.execute("ROLLBACK;")
+            raise
+
+        self._writes += 1
+        if self._writes % 256 == 0:
+            self.prune()
+
+    def invalidations_since(self, seq: int) -> Tuple[int, list]:
+        rows = self._conn().execute(
+            "SELECT seq, key FROM invalidations WHERE seq > ? ORDER BY seq", (seq,)
+        ).fetchall()
+        if not rows:
+            return seq, []
+        return rows[-1][0], [row[1] for row in rows]
+
+    def prune(self) -> None:
+        """만료된 값과 오래된 무효화 로그 삭제"""
+        conn = self._conn()
+        now = time.time()
+        conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+        conn.execute("DELETE FROM invalidations WHERE at < ?", (now - self._retention,))
+
+
+class LRUCache:
+    """스레드 안전한 LRU + TTL 캐시 (shared가 있으면 2단계로 동작)"""
+
+    def __init__(self, name: str, maxsize: int, ttl: float, shared: Optional[SharedCache] = None):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.shared = shared
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._shared_seq = shared.last_seq() if shared else 0
+        self._last_sync = time.monotonic()
+
+        # 관측용 카운터
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    def _key(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+    def _sync(self) -> None:
+        """다른 워커가 기록한 무효화를 반영 (CACHE_SYNC_INTERVAL마다 한 번)"""
+        if self.shared is None or time.monotonic() - self._last_sync < CACHE_SYNC_INTERVAL:
+            return
+        self._last_sync = time.monotonic()
+        seq, keys = self.shared.invalidations_since(self._shared_seq)
+        prefix = self._key("")
+        with self._lock:
+            self._shared_seq = max(self._shared_seq, seq)
+            for key in keys:
+                if key.startswith(prefix):
+                    self._data.pop(key[len(prefix):], None)
+            if keys:
+                self._generation += 1
+
+    def token(self) -> Tuple[int, int]:
+        """DB 조회 전에 받아 두었다가 set에 넘기면, 그 사이 무효화가 있었을 때 저장하지 않는다"""
+        with self._lock:
+            generation = self._generation
+        return generation, (self.shared.last_seq() if self.shared is not None else 0)
+
+    def get(self, key: str) -> Any:
+        """값 반환 (없으면 cache.MISSING)"""
+        if not self.enabled:
+            return MISSING
+        self._sync()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._data[key]
+
+        if self.shared is not None:
+            value = self.shared.get(self._key(key))
+            if value is not MISSING:
+                with self._lock:
+                    self.shared_hits += 1
+                    self._put(key, value, now)
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return MISSING
+
+    def set(self, key: str, value: Any, token: Optional[Tuple[int, int]] = None) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            if token is not None and token[0] != self._generation:
+                return
+            self._put(key, value, time.monotonic())
+        if self.shared is not None:
+            self.shared.set(self._key(key), value, self.ttl, token[1] if token else self._shared_seq)
+
+    def _put(self, key: str, value: Any, now: float) -> None:
+        self._data[key] = (now + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, *keys: str) -> None:
+        if not keys:
+            return
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                if self._data.pop(key, None) is not None:
+                    self.invalidations += 1
+        if self.shared is not None:
+            self.shared.invalidate([self._key(k) for k in keys])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.shared_hits) / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "shared": self.shared.path if self.shared else None,
+            }
+
+
+
+def _shared_from_env() -> Optional[SharedCache]:
+    cache_dir = os.getenv("REPORT_CACHE_DIR")
+    if not cache_dir:
+        return None
+    return SharedCache(os.path.join(cache_dir, "cache.db"))
+
+
+_shared = _shared_from_env()
+
+report_cache = LRUCache(
+    "report",
+    maxsize=int(os.getenv("REPORT_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("REPORT_CACHE_TTL", "300")),
+    shared=_shared,
+)
+email_cache = LRUCache(
+    "email",
+    maxsize=int(os.getenv("USER_CACHE_SIZE", "4096")),
+    ttl=float(os.getenv("USER_CACHE_TTL", "60")),
+    shared=_shared,
+)
+
+
+def cache_stats() -> Dict[str, Any]:
+    if _shared is not None:
+        _shared.prune()
+    return {"report": report_cache.stats(), "email": email_cache.stats()}
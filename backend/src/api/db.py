@@ -2,66 +2,81 @@
 SQLite Database 연결 및 CRUD 함수
 """
 import os
+import heapq
 import json
 import sqlite3
+import threading
 import uuid
-from datetime import datetime
-from typing import Optional, List, Dict, Any
-from contextlib import contextmanager
-
-# 데이터베이스 파일 경로 (프로젝트 루트/data/)
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Optional, List, Dict, Any, Iterator, Sequence, Tuple
+from contextlib import ExitStack, contextmanager
+
+from src.api import analytics, ownership, search, sharding
+from src.api.retention import ARCHIVE_TABLE, archive_select_columns
+from src.api.cache import MISSING, email_cache, report_cache
+from src.api.migrations import run_migrations
+from src.api.storage import (
+    OCR_FIELD,
+    PAYLOAD_FIELDS,
+    STORAGE_FORMAT_BLOB,
+    STORAGE_FORMAT_SPLIT,
+    decode_ocr_text,
+    decode_payload,
+    pack_report,
+    save_details,
+    stored_value,
+)
+from src.api.write_behind import GroupCommitWriter, write_behind_enabled
+
+# 데이터베이스 파일 경로 (기본: 프로젝트 루트/data/, DATA_DIR 환경변수로 변경 가능)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-DATA_DIR = os.path.join(BASE_DIR, "data")
+DATA_DIR = os.getenv("DATA_DIR") or os.path.join(BASE_DIR, "data")
 DB_PATH = os.path.join(DATA_DIR, "reports.db")
 
+# 리포트 샤드 (REPORT_SHARDS, 기본 1). 샤드 0은 DB_PATH이며 users 등 리포트 외 테이블도 여기에만 있다.
+SHARD_COUNT = sharding.shard_count()
+SHARD_PATHS = sharding.shard_paths(DB_PATH, SHARD_COUNT)
+
+# 리포트 조회 시 선택 가능한 필드 (컬럼명 == 응답 키)
+REPORT_FIELDS = (
+    "id", "created_at", "user_id", "country", "ocr_engine", "ocr_text",
+    "allergens", "nutrition", "risks", "promo",
+    "summary", "input_data_status", "correction_guide", "regulatory_basis",
+    "image_hash",
+)
+
+# JSON 문자열로 저장되는 컬럼 → 비어 있을 때의 기본값 팩토리
+JSON_FIELD_DEFAULTS = {
+    "allergens": list,
+    "nutrition": dict,
+    "risks": list,
+    "promo": dict,
+    "summary": dict,
+    "input_data_status": dict,
+    "correction_guide": list,
+    "regulatory_basis": list,
+}
+
 
 def init_db():
-    """데이터베이스 및 테이블 초기화"""
+    """
+    데이터베이스 디렉토리 생성 + 스키마 마이그레이션 (src/api/migrations.py)
+    - 모듈 import 시 자동 실행되지 않으므로 앱 시작 훅/스크립트에서 명시적으로 호출한다.
+    """
     os.makedirs(DATA_DIR, exist_ok=True)
-
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS reports (
-                id TEXT PRIMARY KEY,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                user_id TEXT NOT NULL DEFAULT 'anonymous',
-                country TEXT NOT NULL,
-                ocr_engine TEXT NOT NULL,
-                ocr_text TEXT,
-                allergens TEXT,
-                nutrition TEXT,
-                risks TEXT,
-                promo TEXT
-            );
-        """)
-        # 새로운 컬럼 추가 (존재하지 않을 경우)
-        cursor.execute("PRAGMA table_info(reports);")
-        columns = [col[1] for col in cursor.fetchall()]
-        
-        if "summary" not in columns:
-            cursor.execute("ALTER TABLE reports ADD COLUMN summary TEXT DEFAULT NULL;")
-        if "input_data_status" not in columns:
-            cursor.execute("ALTER TABLE reports ADD COLUMN input_data_status TEXT DEFAULT NULL;")
-        if "correction_guide" not in columns:
-            cursor.execute("ALTER TABLE reports ADD COLUMN correction_guide TEXT DEFAULT NULL;")
-        if "regulatory_basis" not in columns:
-            cursor.execute("ALTER TABLE reports ADD COLUMN regulatory_basis TEXT DEFAULT NULL;")
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id TEXT PRIMARY KEY,
-                email TEXT UNIQUE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-        """)
-        conn.commit()
+    for path in SHARD_PATHS:
+        run_migrations(path)
 
 
 @contextmanager
-def get_connection():
-    """SQLite 연결 컨텍스트 매니저"""
-    conn = sqlite3.connect(DB_PATH)
+def get_connection(check_same_thread: bool = True, shard: int = 0):
+    """
+    SQLite 연결 컨텍스트 매니저
+    - check_same_thread=False: 스트리밍 응답처럼 한 연결을 여러 워커 스레드가 순차적으로 사용하는 경우
+    - shard: 리포트 샤드 번호 (기본 0 = reports.db, 사용자/이전 작업 등 리포트 외 테이블은 항상 0)
+    """
+    conn = sqlite3.connect(SHARD_PATHS[shard], check_same_thread=check_same_thread)
     conn.row_factory = sqlite3.Row
     try:
         yield conn
@@ -69,11 +84,103 @@ def get_connection():
         conn.close()
 
 
+def shard_for(report_id: str) -> int:
+    """report_id가 저장될 샤드 번호"""
+    return sharding.shard_for(report_id, SHARD_COUNT)
+
+
 def generate_report_id() -> str:
     """UUID 기반 짧은 report_id 생성 (8자리)"""
     return uuid.uuid4().hex[:8]
 
 
+def _now_timestamp() -> str:
+    """CURRENT_TIMESTAMP와 같은 형식의 UTC 시각 (YYYY-MM-DD HH:MM:SS)"""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+# 샤드별 그룹 커밋 writer (REPORT_WRITE_BEHIND=1 일 때 샤드의 최초 저장 시 생성)
+_report_writers: Dict[int, GroupCommitWriter] = {}
+_report_writer_lock = threading.Lock()
+
+
+def get_report_writer(shard: int = 0) -> Optional[GroupCommitWriter]:
+    """write-behind 모드면 샤드의 공유 writer 반환, 아니면 None (샤드마다 커밋이 따로 진행된다)"""
+    if not write_behind_enabled():
+        return None
+    writer = _report_writers.get(shard)
+    if writer is None:
+        with _report_writer_lock:
+            writer = _report_writers.get(shard)
+            if writer is None:
+                writer = GroupCommitWriter.from_env(write_reports, name=f"report-writer-{shard}")
+                _report_writers[shard] = writer
+    return writer
+
+
+def close_report_writer() -> None:
+    """대기 중인 행을 모두 커밋하고 writer 종료 (앱 종료 시 호출)"""
+    with _report_writer_lock:
+        writers = list(_report_writers.values())
+        _report_writers.clear()
+    for writer in writers:
+        writer.close()
+
+
+def prepare_report(
+    user_id: str,
+    country: str,
+    ocr_engine: str,
+    ocr_text: str,
+    allergens: List[str],
+    nutrition: Dict[str, Any],
+    risks: List[Dict[str, Any]],
+    promo: Dict[str, str],
+    summary: Optional[Dict[str, str]] = None,
+    input_data_status: Optional[Dict[str, Any]] = None,
+    correction_guide: Optional[List[Dict[str, str]]] = None,
+    regulatory_basis: Optional[List[str]] = None,
+    rules_version: Optional[str] = None,
+    image_hash: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    save_report의 준비 단계: report_id/created_at 할당, payload 압축, 검색/통계 행 생성 (DB 접근 없음)
+
+    Returns:
+        write_reports에 넘길 행 (report_id는 "id")
+    """
+    report_id = generate_report_id()
+
+    doc = {
+        "ocr_text": ocr_text,
+        "allergens": allergens,
+        "nutrition": nutrition,
+        "risks": risks,
+        "promo": promo,
+        "summary": stored_value(summary),
+        "input_data_status": stored_value(input_data_status),
+        "correction_guide": stored_value(correction_guide),
+        "regulatory_basis": stored_value(regulatory_basis),
+    }
+    payload, ocr_payload, details_rows = pack_report(doc)
+    created_at = _now_timestamp()
+    return {
+        "id": report_id,
+        "shard": shard_for(report_id),
+        "created_at": created_at,
+        "user_id": user_id,
+        "country": country,
+        "ocr_engine": ocr_engine,
+        "rules_version": rules_version,
+        "image_hash": image_hash,
+        "payload": payload,
+        "ocr_payload": ocr_payload,
+        "details_rows": details_rows,
+        "search_row": search.build_index_row(report_id, user_id, country, ocr_text, risks, allergens),
+        "facts": analytics.report_facts(report_id, created_at, country, risks),
+    }
+
+
 def save_report(
     user_id: str,
     country: str,
@@ -86,68 +193,196 @@ def save_report(
     summary: Optional[Dict[str, str]] = None,
     input_data_status: Optional[Dict[str, Any]] = None,
     correction_guide: Optional[List[Dict[str, str]]] = None,
-    regulatory_basis: Optional[List[str]] = None
+    regulatory_basis: Optional[List[str]] = None,
+    rules_version: Optional[str] = None,
+    image_hash: Optional[str] = None
 ) -> str:
     """
     분석 결과를 DB에 저장하고 report_id 반환
+    - rules_version: 판정에 사용한 규칙 버전 (src/rules/checker.get_rules_version)
+    - image_hash: 분석한 라벨 이미지의 저장소 키 (src/api/images.py)
+    - report_id와 created_at은 호출 시점에 미리 할당된다
+    - write-behind 모드에서는 그룹 커밋으로 저장되며, 커밋 완료 후 반환된다
 
     Returns:
         report_id (str): 생성된 고유 ID (8자리)
     """
-    report_id = generate_report_id()
-
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO reports (id, user_id, country, ocr_engine, ocr_text, allergens, nutrition, risks, promo, summary, input_data_status, correction_guide, regulatory_basis)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            report_id,
-            user_id,
-            country,
-            ocr_engine,
-            ocr_text,
-            json.dumps(allergens, ensure_ascii=False),
-            json.dumps(nutrition, ensure_ascii=False),
-            json.dumps(risks, ensure_ascii=False),
-            json.dumps(promo, ensure_ascii=False),
-            json.dumps(summary, ensure_ascii=False) if summary else None,
-            json.dumps(input_data_status, ensure_ascii=False) if input_data_status else None,
-            json.dumps(correction_guide, ensure_ascii=False) if correction_guide else None,
-            json.dumps(regulatory_basis, ensure_ascii=False) if regulatory_basis else None
-        ))
+    pending = prepare_report(
+        user_id, country, ocr_engine, ocr_text, allergens, nutrition, risks, promo,
+        summary, input_data_status, correction_guide, regulatory_basis, rules_version, image_hash
+    )
+
+    writer = get_report_writer(pending["shard"])
+    if writer is not None:
+        writer.write(pending)
+    else:
+        write_reports([pending])
+
+    return pending["id"]
+
+
+def write_reports(pending: List[Dict[str, Any]]) -> None:
+    """save_report가 준비한 행들을 샤드별로 하나의 트랜잭션으로 INSERT"""
+    by_shard: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+    for p in pending:
+        by_shard[p["shard"]].append(p)
+    for shard, rows in by_shard.items():
+        _write_shard(shard, rows)
+
+
+def _write_shard(shard: int, pending: List[Dict[str, Any]]) -> None:
+    with get_connection(shard=shard) as conn:
+        details_rows = [row for p in pending for row in p["details_rows"]]
+        if details_rows:
+            save_details(conn, details_rows)
+        conn.executemany("""
+            INSERT INTO reports (
+                id, created_at, user_id, country, ocr_engine, rules_version, image_hash,
+                payload, ocr_payload, storage_format
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (
+                p["id"], p["created_at"], p["user_id"], p["country"], p["ocr_engine"],
+                p.get("rules_version"), p.get("image_hash"), p["payload"], p.get("ocr_payload"), STORAGE_FORMAT_SPLIT
+            )
+            for p in pending
+        ])
+        search.index_reports(conn, [p["search_row"] for p in pending])
+        analytics.record_reports(conn, [p["facts"] for p in pending])
         conn.commit()
 
-    return report_id
 
-
-def get_report(report_id: str, user_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+def get_report(
+    report_id: str,
+    user_id: Optional[str] = None,
+    fields: Optional[Sequence[str]] = None
+) -> Optional[Dict[str, Any]]:
     """
     report_id로 단일 리포트 조회
 
     Args:
         report_id: 리포트 ID
         user_id: 리포트 소유자 ID (필터링 및 검증용)
+        fields: 조회할 필드 목록 (None이면 전체). 요청한 컬럼만 SELECT하고
+                JSON 컬럼도 요청된 것만 파싱한다. "id"는 항상 포함된다.
 
     Returns:
         리포트 딕셔너리 또는 None
+        (캐시 사용 시 중첩된 값은 다른 요청과 공유되므로 수정하지 말 것)
+
+    Raises:
+        ValueError: REPORT_FIELDS에 없는 필드를 요청한 경우
     """
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        query = "SELECT * FROM reports WHERE id = ?"
-        params = [report_id]
+    columns = _resolve_fields(fields)
+
+    if not report_cache.enabled:
+        return _find_report(report_id, columns, _owner_ids(user_id) if user_id else None)
+
+    # 캐시에는 전체 필드를 디코딩한 dict를 넣고, 요청 필드만 잘라서 반환
+    report = report_cache.get(report_id)
+    if report is MISSING and len(columns) < len(REPORT_FIELDS):
+        # 일부 필드만 요청한 캐시 miss는 요청 컬럼만 디코딩하고 캐시에 넣지 않는다 (전체 디코딩 방지)
+        return _find_report(report_id, columns, _owner_ids(user_id) if user_id else None)
+    if report is MISSING:
+        token = report_cache.token()
+        report = _find_report(report_id, REPORT_FIELDS)
+        if report is None:
+            return None
+        report_cache.set(report_id, report, token)
 
-        if user_id:
-            query += " AND user_id = ?"
-            params.append(user_id)
+    if user_id and report["user_id"] != user_id:
+        # 소유권 이전이 진행 중이면 아직 옮기지 않은 이전 ID의 리포트도 허용
+        if report["user_id"] not in _owner_ids(user_id):
+            return None
+    return {field: report[field] for field in columns}
 
-        cursor.execute(query, params)
-        row = cursor.fetchone()
 
+def _owner_ids(user_id: str) -> List[str]:
+    """ownership.owner_ids (이전 작업 테이블은 샤드 0에만 있다)"""
+    with get_connection() as conn:
+        return ownership.owner_ids(conn, user_id)
+
+
+def _find_report(
+    report_id: str,
+    columns: Sequence[str],
+    owners: Optional[Sequence[str]] = None
+) -> Optional[Dict[str, Any]]:
+    """해시 샤드부터 리포트 조회 (샤딩 도입 전/샤드 수 변경 전에 저장된 리포트는 다른 샤드에 있을 수 있다)"""
+    for shard in sharding.lookup_order(report_id, SHARD_COUNT):
+        with get_connection(shard=shard) as conn:
+            report = get_report_with_conn(conn, report_id, columns, owners)
+        if report is not None:
+            return report
+    return None
+
+
+def get_report_with_conn(
+    conn: sqlite3.Connection,
+    report_id: str,
+    columns: Sequence[str],
+    owners: Optional[Sequence[str]] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    열린 연결(샤드 하나)로 리포트 조회 (columns는 검증된 필드 목록, reports에 없으면 보관 테이블에서 조회)
+    - owners: 허용할 user_id 목록 (_owner_ids 결과, None이면 소유자 검사 안 함)
+    """
+    where = "id = ?"
+    params = [report_id]
+
+    if owners:
+        where += f" AND user_id IN ({', '.join('?' * len(owners))})"
+        params.extend(owners)
+
+    select_columns = _select_columns(columns)
+    row = conn.execute(f"SELECT {', '.join(select_columns)} FROM reports WHERE {where}", params).fetchone()
+    if not row:
+        row = conn.execute(
+            f"SELECT {', '.join(archive_select_columns(select_columns))} FROM {ARCHIVE_TABLE} WHERE {where}", params
+        ).fetchone()
         if not row:
             return None
 
-        return _row_to_dict(row)
+    return _row_to_dict(conn, row, columns)
+
+
+def _report_filters(
+    country: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    user_id: Optional[str] = None
+) -> Tuple[str, List[Any]]:
+    """목록/개수/내보내기 공통 필터 → (WHERE 절, 파라미터). 모든 샤드에 같은 조건을 쓴다."""
+    conditions = []
+    params: List[Any] = []
+
+    if country:
+        conditions.append("country = ?")
+        params.append(country)
+
+    if date_from:
+        conditions.append("DATE(created_at) >= ?")
+        params.append(date_from)
+
+    if date_to:
+        conditions.append("DATE(created_at) <= ?")
+        params.append(date_to)
+
+    if user_id:
+        owners = _owner_ids(user_id)
+        conditions.append(f"user_id IN ({', '.join('?' * len(owners))})")
+        params.extend(owners)
+
+    where_clause = ""
+    if conditions:
+        where_clause = "WHERE " + " AND ".join(conditions)
+    return where_clause, params
+
+
+def _created_desc(row: Dict[str, Any]) -> Tuple[str, str]:
+    """샤드 병합 정렬 키 (목록 SQL의 ORDER BY created_at DESC, id DESC와 같은 순서)"""
+    return row["created_at"], row["id"]
 
 
 def get_reports(
@@ -172,55 +407,38 @@ def get_reports(
     Returns:
         리포트 목록 (최신순)
     """
-    with get_connection() as conn:
-        cursor = conn.cursor()
-
-        # 동적 WHERE 절 구성
-        conditions = []
-        params = []
-
-        if country:
-            conditions.append("country = ?")
-            params.append(country)
-
-        if date_from:
-            conditions.append("DATE(created_at) >= ?")
-            params.append(date_from)
-
-        if date_to:
-            conditions.append("DATE(created_at) <= ?")
-            params.append(date_to)
-            
-        if user_id:
-            conditions.append("user_id = ?")
-            params.append(user_id)
-
-        where_clause = ""
-        if conditions:
-            where_clause = "WHERE " + " AND ".join(conditions)
-
-        query = f"""
-            SELECT id, created_at, country, ocr_engine
-            FROM reports
-            {where_clause}
-            ORDER BY created_at DESC
-            LIMIT ? OFFSET ?
-        """
-        params.extend([limit, offset])
-
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
+    where_clause, params = _report_filters(country, date_from, date_to, user_id)
+
+    # 보관된 리포트까지 최신순으로 합친다 (양쪽 모두 created_at 인덱스 순서로 병합)
+    query = f"""
+        SELECT id, created_at, country, ocr_engine, image_hash FROM reports {where_clause}
+        UNION ALL
+        SELECT id, created_at, country, ocr_engine, image_hash FROM {ARCHIVE_TABLE} {where_clause}
+        ORDER BY created_at DESC, id DESC
+        LIMIT ? OFFSET ?
+    """
 
+    def _page(shard: int, page_limit: int, page_offset: int) -> List[Dict[str, Any]]:
+        with get_connection(shard=shard) as conn:
+            rows = conn.execute(query, params + params + [page_limit, page_offset]).fetchall()
         return [
             {
                 "id": row["id"],
                 "created_at": row["created_at"],
                 "country": row["country"],
-                "ocr_engine": row["ocr_engine"]
+                "ocr_engine": row["ocr_engine"],
+                "image_hash": row["image_hash"]
             }
             for row in rows
         ]
 
+    if SHARD_COUNT == 1:
+        return _page(0, limit, offset)
+
+    # 샤드마다 앞쪽 offset + limit개를 읽어 k-way merge 후 페이지 구간만 자른다
+    pages = [_page(shard, offset + limit, 0) for shard in range(SHARD_COUNT)]
+    return sharding.merge_page(pages, _created_desc, offset, limit, reverse=True)
+
 
 def count_reports(
     country: Optional[str] = None,
@@ -240,37 +458,164 @@ def count_reports(
     Returns:
         총 리포트 개수
     """
-    with get_connection() as conn:
-        cursor = conn.cursor()
+    where_clause, params = _report_filters(country, date_from, date_to, user_id)
+    query = f"""
+        SELECT (SELECT COUNT(*) FROM reports {where_clause})
+             + (SELECT COUNT(*) FROM {ARCHIVE_TABLE} {where_clause}) AS count
+    """
 
-        conditions = []
-        params = []
+    total = 0
+    for shard in range(SHARD_COUNT):
+        with get_connection(shard=shard) as conn:
+            row = conn.execute(query, params + params).fetchone()
+            total += row["count"] if row else 0
+    return total
 
-        if country:
-            conditions.append("country = ?")
-            params.append(country)
 
-        if date_from:
-            conditions.append("DATE(created_at) >= ?")
-            params.append(date_from)
+def iter_reports_export(
+    user_id: str,
+    country: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    batch_size: int = 200
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    내보내기용: 필터에 맞는 리포트 전체(모든 필드)를 최신순으로 batch_size개씩 yield
+    - 커서에서 fetchmany로 읽으므로 리포트 수와 무관하게 메모리 사용량이 일정하다
+    - StreamingResponse가 워커 스레드를 바꿔 가며 next()를 호출하므로 check_same_thread=False로 연결
+    """
+    fields = list(REPORT_FIELDS)
+    where_clause, params = _report_filters(country, date_from, date_to, user_id)
+    columns = _select_columns(fields)
+    query = f"""
+        SELECT {', '.join(columns)} FROM reports {where_clause}
+        UNION ALL
+        SELECT {', '.join(archive_select_columns(columns))} FROM {ARCHIVE_TABLE} {where_clause}
+        ORDER BY created_at DESC, id DESC
+    """
 
-        if date_to:
-            conditions.append("DATE(created_at) <= ?")
-            params.append(date_to)
-            
-        if user_id:
-            conditions.append("user_id = ?")
-            params.append(user_id)
+    def _rows(conn: sqlite3.Connection) -> Iterator[Dict[str, Any]]:
+        cursor = conn.execute(query, params + params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            for row in rows:
+                yield _row_to_dict(conn, row, fields)
+
+    # 샤드마다 커서를 하나씩 열어 최신순으로 병합 (샤드당 fetchmany 한 묶음만 메모리에 둔다)
+    with ExitStack() as stack:
+        streams = [
+            _rows(stack.enter_context(get_connection(check_same_thread=False, shard=shard)))
+            for shard in range(SHARD_COUNT)
+        ]
+        merged = streams[0] if SHARD_COUNT == 1 else heapq.merge(*streams, key=_created_desc, reverse=True)
+        batch: List[Dict[str, Any]] = []
+        for report in merged:
+            batch.append(report)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def search_reports(
+    query: str,
+    user_id: Optional[str] = None,
+    country: Optional[str] = None,
+    limit: int = 20,
+    offset: int = 0
+) -> Dict[str, Any]:
+    """
+    OCR 텍스트/리스크 근거/알레르겐 전문 검색 (bm25 순위)
 
-        where_clause = ""
-        if conditions:
-            where_clause = "WHERE " + " AND ".join(conditions)
+    Args:
+        query: 검색어 (공백 구분 AND, "큰따옴표"는 구절 검색)
+        user_id: 사용자 ID 필터 (선택)
+        country: 국가 필터 (선택)
+        limit: 최대 개수
+        offset: 시작 위치
 
-        query = f"SELECT COUNT(*) as count FROM reports {where_clause}"
-        cursor.execute(query, params)
-        row = cursor.fetchone()
+    Returns:
+        {"results": [{id, created_at, country, ocr_engine, score, snippet}], "total": int}
+    """
+    terms = search.parse_query(query)
+    match = search.build_match_query(terms)
+    if not match:
+        return {"results": [], "total": 0}
+
+    filtered = search.with_filters(match, country=country, user_ids=_owner_ids(user_id) if user_id else None)
+
+    if SHARD_COUNT == 1:
+        with get_connection() as conn:
+            hits, total = search.search_report_ids(conn, filtered, limit, offset)
+        page = [(0, report_id, score) for report_id, score in hits]
+    else:
+        # 샤드마다 상위 offset + limit개를 bm25 순으로 받아 병합
+        # (bm25의 문서 빈도 통계는 샤드별이라 샤드 간 점수 비교는 근사값이다)
+        pages = []
+        total = 0
+        for shard in range(SHARD_COUNT):
+            with get_connection(shard=shard) as conn:
+                hits, shard_total = search.search_report_ids(conn, filtered, offset + limit, 0)
+            pages.append([(shard, report_id, score) for report_id, score in hits])
+            total += shard_total
+        page = sharding.merge_page(pages, lambda hit: hit[2], offset, limit)
+
+    results = []
+    for shard, report_id, score in page:
+        # 스니펫은 현재 페이지의 리포트만 디코딩해서 원문(ocr_text → 근거 → 알레르겐 순)에서 생성
+        with get_connection(shard=shard) as conn:
+            report = get_report_with_conn(
+                conn, report_id, ["id", "created_at", "country", "ocr_engine", "ocr_text", "allergens", "risks"]
+            )
+        if not report:
+            continue
+        evidence, allergens = search.index_texts(report["risks"], report["allergens"])
+        snippet = None
+        for source in (report["ocr_text"], evidence, allergens):
+            snippet = search.make_snippet(source or "", terms)
+            if snippet:
+                break
+        results.append({
+            "id": report["id"],
+            "created_at": report["created_at"],
+            "country": report["country"],
+            "ocr_engine": report["ocr_engine"],
+            "score": round(-score, 4),
+            "snippet": snippet,
+        })
+
+    return {"results": results, "total": total}
+
+
+def get_analytics(
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    bucket: str = "week",
+    country: Optional[str] = None,
+    top: int = 10
+) -> Dict[str, Any]:
+    """
+    기간별 컴플라이언스 통계 (롤업 테이블만 조회, src/api/analytics.py)
+
+    Args:
+        start, end: 조회 기간 (YYYY-MM-DD, UTC 기준, 양끝 포함)
+        bucket: 집계 단위 (day/week/month, 주는 월요일 시작)
+        country: 국가 필터
+        top: 상위 알레르겐 개수
+
+    Raises:
+        ValueError: 날짜 형식이나 bucket이 잘못된 경우
+    """
+    for value in (start, end):
+        if value:
+            datetime.strptime(value, "%Y-%m-%d")
 
-        return row["count"] if row else 0
+    with ExitStack() as stack:
+        conns = [stack.enter_context(get_connection(shard=shard)) for shard in range(SHARD_COUNT)]
+        return analytics.query_analytics(conns, start, end, bucket, country, top)
 
 
 def delete_report(report_id: str) -> bool:
@@ -280,21 +625,40 @@ def delete_report(report_id: str) -> bool:
     Returns:
         삭제 성공 여부
     """
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM reports WHERE id = ?", (report_id,))
-        conn.commit()
-        return cursor.rowcount > 0
-
-
-def upsert_user_email(user_id: str, email: str) -> None:
+    deleted = 0
+    for shard in sharding.lookup_order(report_id, SHARD_COUNT):
+        with get_connection(shard=shard) as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM reports WHERE id = ?", (report_id,))
+            deleted = cursor.rowcount
+            cursor.execute(f"DELETE FROM {ARCHIVE_TABLE} WHERE id = ?", (report_id,))
+            deleted += cursor.rowcount
+            if deleted:
+                search.unindex_reports(conn, [report_id])
+                analytics.forget_reports(conn, [report_id])
+            conn.commit()
+        if deleted:
+            break
+
+    report_cache.invalidate(report_id)
+    return deleted > 0
+
+
+def upsert_user_email(user_id: str, email: str) -> Dict[str, Any]:
     """
     사용자 ID와 이메일을 users 테이블에 upsert.
-    - 동일 이메일이 다른 ID로 존재하면, 기존 ID의 리포트들을 새 ID로 마이그레이션하고
-      기존 ID는 삭제 후 새 ID와 이메일로 연결.
+    - 동일 이메일이 다른 ID로 존재하면, 기존 ID는 삭제 후 새 ID와 이메일로 연결하고
+      기존 ID의 리포트들은 새 ID로 배치 이전한다. (src/api/ownership.py)
+      OWNERSHIP_SYNC_LIMIT 행 이하면 이 호출 안에서, 넘으면 백그라운드에서 옮긴다.
+      이전 중에도 새 ID로 조회하면 아직 옮기지 않은 리포트까지 보인다.
     - ID만 존재하면 이메일 업데이트.
     - 둘 다 없으면 신규 생성.
+
+    Returns:
+        {"migrated_from": 기존 ID 또는 None, "total": 이전 대상 리포트 수, "background": bool}
     """
+    old_user_id = None
+    total = 0
     with get_connection() as conn:
         cursor = conn.cursor()
 
@@ -302,15 +666,13 @@ def upsert_user_email(user_id: str, email: str) -> None:
         cursor.execute("SELECT id FROM users WHERE email = ?", (email,))
         existing_user_by_email = cursor.fetchone()
 
-        if existing_user_by_email:
+        if existing_user_by_email and existing_user_by_email['id'] != user_id:
+            # 이메일이 현재 ID가 아닌 다른 ID와 연결된 경우: 이전 작업만 등록 (리포트는 아래에서 배치로 이동)
             old_user_id = existing_user_by_email['id']
-            # 이메일이 현재 ID가 아닌 다른 ID와 연결된 경우
-            if old_user_id != user_id:
-                # 기존 ID의 리포트들을 새 ID로 마이그레이션
-                cursor.execute("UPDATE reports SET user_id = ? WHERE user_id = ?", (user_id, old_user_id))
-                # 기존 사용자 레코드 삭제
-                cursor.execute("DELETE FROM users WHERE id = ?", (old_user_id,))
-        
+            total = ownership.start_migration(conn, old_user_id, user_id)
+            # 기존 사용자 레코드 삭제
+            cursor.execute("DELETE FROM users WHERE id = ?", (old_user_id,))
+
         # 2. 현재 user_id로 사용자 정보 UPSERT
         # (기존 레코드가 삭제되었거나, 원래 없었거나, ID가 같았음)
         cursor.execute(
@@ -324,6 +686,16 @@ def upsert_user_email(user_id: str, email: str) -> None:
         )
         conn.commit()
 
+    email_cache.invalidate(*([user_id, old_user_id] if old_user_id else [user_id]))
+
+    background = False
+    if old_user_id and total:
+        if total <= ownership.sync_limit():
+            ownership.run_migration(old_user_id)
+        else:
+            background = ownership.run_in_background(old_user_id)
+    return {"migrated_from": old_user_id, "total": total, "background": background}
+
 def get_user_by_email(email: str) -> Optional[Dict[str, Any]]:
     """이메일로 사용자 정보 조회"""
     with get_connection() as conn:
@@ -340,38 +712,89 @@ def unlink_user_email(user_id: str) -> bool:
         cursor = conn.cursor()
         cursor.execute("UPDATE users SET email = NULL WHERE id = ?", (user_id,))
         conn.commit()
-        return cursor.rowcount > 0
+
+    email_cache.invalidate(user_id)
+    return cursor.rowcount > 0
 
 def get_user_email(user_id: str) -> Optional[str]:
     """
-    user_id로 사용자 이메일 조회
+    user_id로 사용자 이메일 조회 (연결된 이메일이 없다는 결과(None)도 캐시)
     """
+    email = email_cache.get(user_id)
+    if email is not MISSING:
+        return email
+
+    token = email_cache.token()
     with get_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("SELECT email FROM users WHERE id = ?", (user_id,))
         row = cursor.fetchone()
-        return row["email"] if row else None
+        email = row["email"] if row else None
 
+    email_cache.set(user_id, email, token)
+    return email
 
-def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
-    """sqlite3.Row를 딕셔너리로 변환 (JSON 필드 파싱 포함)"""
-    return {
-        "id": row["id"],
-        "created_at": row["created_at"],
-        "user_id": row["user_id"],
-        "country": row["country"],
-        "ocr_engine": row["ocr_engine"],
-        "ocr_text": row["ocr_text"],
-        "allergens": json.loads(row["allergens"]) if row["allergens"] else [],
-        "nutrition": json.loads(row["nutrition"]) if row["nutrition"] else {},
-        "risks": json.loads(row["risks"]) if row["risks"] else [],
-        "promo": json.loads(row["promo"]) if row["promo"] else {},
-        "summary": json.loads(row["summary"]) if row["summary"] else {},
-        "input_data_status": json.loads(row["input_data_status"]) if row["input_data_status"] else {},
-        "correction_guide": json.loads(row["correction_guide"]) if row["correction_guide"] else [],
-        "regulatory_basis": json.loads(row["regulatory_basis"]) if row["regulatory_basis"] else []
-    }
 
+def _resolve_fields(fields: Optional[Sequence[str]]) -> List[str]:
+    """요청 필드 목록을 검증하고 SELECT할 컬럼 목록으로 변환 (REPORT_FIELDS 순서 유지)"""
+    if not fields:
+        return list(REPORT_FIELDS)
+
+    unknown = [f for f in fields if f not in REPORT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown report fields: {', '.join(unknown)}")
+
+    requested = set(fields) | {"id"}
+    return [f for f in REPORT_FIELDS if f in requested]
+
+
+def _select_columns(fields: Sequence[str]) -> List[str]:
+    """
+    응답 필드에 필요한 실제 컬럼 목록 (payload 필드가 있으면 BLOB 컬럼도 함께 조회)
+    - BLOB 포맷은 ocr_text도 payload 안에 있으므로 payload는 항상 읽는다. (압축 해제는 _row_to_dict가 필요할 때만)
+    """
+    columns = list(fields)
+    if any(f in PAYLOAD_FIELDS for f in fields):
+        columns += ["storage_format", "payload"]
+    if OCR_FIELD in fields:
+        columns.append("ocr_payload")
+    return columns
+
+
+def _row_to_dict(
+    conn: sqlite3.Connection,
+    row: sqlite3.Row,
+    fields: Optional[Sequence[str]] = None
+) -> Dict[str, Any]:
+    """
+    sqlite3.Row를 딕셔너리로 변환 (요청된 JSON 필드만 파싱)
+    - SPLIT 포맷 행은 ocr_text를 요청했을 때만 ocr_payload를, 다른 payload 필드를 요청했을 때만 payload를 압축 해제
+    - BLOB 포맷 행은 payload를 한 번만 압축 해제해서 사용 (필드 하나만 요청해도 ocr_text까지 전부 풀린다)
+    - 레거시 행은 컬럼별 JSON 문자열을 파싱
+    """
+    fields = fields or REPORT_FIELDS
+    doc = None
+    if any(f in PAYLOAD_FIELDS for f in fields):
+        storage_format = row["storage_format"]
+        if storage_format == STORAGE_FORMAT_SPLIT:
+            doc = {}
+            if any(f in PAYLOAD_FIELDS and f != OCR_FIELD for f in fields):
+                doc = decode_payload(conn, row["payload"])
+            if OCR_FIELD in fields:
+                doc[OCR_FIELD] = decode_ocr_text(row["ocr_payload"])
+        elif storage_format == STORAGE_FORMAT_BLOB:
+            doc = decode_payload(conn, row["payload"])
+
+    result: Dict[str, Any] = {}
+    for field in fields:
+        default = JSON_FIELD_DEFAULTS.get(field)
+        if doc is not None and field in PAYLOAD_FIELDS:
+            value = doc.get(field)
+            result[field] = value if value or default is None else default()
+        elif default is not None:
+            value = row[field]
+            result[field] = json.loads(value) if value else default()
+        else:
+            result[field] = row[field]
+    return result
 
-# 모듈 로드 시 DB 초기화
-init_db()
@@ -0,0 +1,153 @@
+"""
+업로드 이미지 저장소 (SHA-256 content-addressed)
+
+분석에 쓴 라벨 이미지를 OCR 후 버리지 않고 로컬 디스크에 보관한다.
+- 키는 원본 바이트의 SHA-256 (hex 64자). 같은 이미지를 여러 번 올려도 한 번만 저장된다.
+- 파일은 해시 앞 4자로 두 단계 하위 디렉토리에 나눠 둔다: {root}/ab/cd/abcd....
+  (한 디렉토리에 파일이 수십만 개 쌓이지 않도록)
+- 썸네일(WebP + JPEG, 긴 변 IMAGE_THUMB_SIZE px)은 저장 시 한 번만 만든다.
+  조회는 미리 만든 파일을 그대로 보내므로 요청마다 디코딩/리사이즈하지 않는다.
+- 파일은 임시 파일에 쓴 뒤 os.replace로 옮기므로, 동시에 같은 이미지를 저장해도 반쯤 쓴 파일이 보이지 않는다.
+- 리포트는 reports.image_hash로 이미지를 참조한다. 이미지는 여러 리포트가 공유할 수 있어 리포트 삭제 시 지우지 않는다.
+
+환경변수:
+- IMAGE_STORE_DIR       저장 위치 (기본: DATA_DIR/images)
+- IMAGE_THUMB_SIZE=320  썸네일 긴 변 픽셀
+"""
+import hashlib
+import io
+import os
+import re
+import tempfile
+from typing import Dict, Optional
+
+from PIL import Image, ImageOps, features
+
+from src.api.db import DATA_DIR
+
+HASH_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+VARIANT_ORIGINAL = "original"
+VARIANT_THUMB = "thumb"
+
+# 썸네일 포맷 → (파일 접미사, Content-Type, PIL 저장 옵션)
+THUMB_FORMATS: Dict[str, tuple] = {
+    "webp": (".thumb.webp", "image/webp", {"format": "WEBP", "quality": 80, "method": 4}),
+    "jpeg": (".thumb.jpg", "image/jpeg", {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True}),
+}
+
+# 원본 Content-Type 판별용 파일 시그니처
+_MAGIC = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF8", "image/gif"),
+    (b"BM", "image/bmp"),
+    (b"II*\x00", "image/tiff"),
+    (b"MM\x00*", "image/tiff"),
+)
+
+
+def sniff_content_type(head: bytes) -> str:
+    """파일 앞부분으로 이미지 Content-Type 판별 (모르면 application/octet-stream)"""
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    for magic, content_type in _MAGIC:
+        if head.startswith(magic):
+            return content_type
+    return "application/octet-stream"
+
+
+def is_image_hash(value: str) -> bool:
+    return bool(HASH_PATTERN.match(value))
+
+
+class ImageStore:
+    """SHA-256 키 이미지 저장소 (원본 + 미리 만든 썸네일)"""
+
+    def __init__(self, root: str, thumb_size: int = 320):
+        self.root = root
+        self.thumb_size = max(16, thumb_size)
+        # Pillow가 WebP 없이 빌드된 경우 JPEG 썸네일만 만든다
+        self.thumb_formats = [f for f in THUMB_FORMATS if f != "webp" or features.check("webp")]
+
+    def path_for(self, image_hash: str, variant: str = VARIANT_ORIGINAL, fmt: str = "jpeg") -> str:
+        """해시 → 파일 경로 ({root}/ab/cd/{hash}[.thumb.ext])"""
+        suffix = "" if variant == VARIANT_ORIGINAL else THUMB_FORMATS[fmt][0]
+        return os.path.join(self.root, image_hash[:2], image_hash[2:4], image_hash + suffix)
+
+    def put(self, data: bytes) -> str:
+        """
+        원본 저장 + 썸네일 생성 (이미 있으면 건너뜀)
+
+        Returns:
+            이미지 SHA-256 hex
+
+        Raises:
+            PIL.UnidentifiedImageError: 이미지로 열 수 없는 데이터
+        """
+        image_hash = hashlib.sha256(data).hexdigest()
+        missing = [fmt for fmt in self.thumb_formats if not os.path.exists(self.path_for(image_hash, VARIANT_THUMB, fmt))]
+        if missing:
+            image = Image.open(io.BytesIO(data))
+            thumb = self._thumbnail(image)
+            for fmt in missing:
+                buffer = io.BytesIO()
+                thumb.save(buffer, **THUMB_FORMATS[fmt][2])
+                self._write(self.path_for(image_hash, VARIANT_THUMB, fmt), buffer.getvalue())
+
+        original = self.path_for(image_hash)
+        if not os.path.exists(original):
+            self._write(original, data)
+        return image_hash
+
+    def locate(self, image_hash: str, variant: str = VARIANT_THUMB, fmt: str = "webp") -> Optional[tuple]:
+        """
+        조회할 파일 찾기 → (경로, Content-Type) 또는 None
+        - fmt 썸네일이 없으면(WebP 미지원 환경에서 저장된 경우 등) 다른 포맷 썸네일로 대체
+        """
+        if not is_image_hash(image_hash):
+            return None
+        if variant == VARIANT_ORIGINAL:
+            path = self.path_for(image_hash)
+            if not os.path.exists(path):
+                return None
+            with open(path, "rb") as f:
+                return path, sniff_content_type(f.read(16))
+
+        for candidate in [fmt] + [f for f in THUMB_FORMATS if f != fmt]:
+            path = self.path_for(image_hash, VARIANT_THUMB, candidate)
+            if os.path.exists(path):
+                return path, THUMB_FORMATS[candidate][1]
+        return None
+
+    def _thumbnail(self, image: Image.Image) -> Image.Image:
+        # 휴대폰 사진의 EXIF 회전 반영, 투명 배경은 흰색으로 채움
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+        image.thumbnail((self.thumb_size, self.thumb_size), Image.LANCZOS)
+        return image
+
+    def _write(self, path: str, data: bytes) -> None:
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+
+image_store = ImageStore(
+    os.getenv("IMAGE_STORE_DIR") or os.path.join(DATA_DIR, "images"),
+    int(os.getenv("IMAGE_THUMB_SIZE", "320")),
+)
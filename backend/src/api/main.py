@@ -4,26 +4,35 @@ K-Food Export Passport API
 - 이미지 분석 + DB 저장 + report_id 발급
 - 리포트 조회/목록/PDF 다운로드
 """
+import asyncio
+import csv
+import hashlib
 import io
+import json
+import os
 import re
+import secrets
 from typing import Optional
 import uuid
 
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Query
+from fastapi import FastAPI, File, UploadFile, Form, Header, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from PIL import Image
 
 from src.ocr.ocr_google import extract_text_google
 from src.ocr.ocr_tesseract import extract_text
-from src.rules.checker import check_risks
-from src.rules.allergen_parser import extract_allergens
-from src.rules.nutrition_parser import parse_nutrition
-from src.rules.label_validator import validate_label_image
+from src.rules.analyzer import analyze_label
 from src.llm.promo_generator import generate_promo
 from src.report.pdf_report import generate_pdf_report
+from src.report import pdf_report as pdf_report_module
 
-from src.api.db import save_report, get_report, get_reports, delete_report, count_reports, upsert_user_email, get_user_email, unlink_user_email, get_user_by_email
+from src.api.db import iter_reports_export, close_report_writer, init_db, REPORT_FIELDS
+from src.api import ownership, reevaluate, retention
+from src.api.repository import repository
+from src.api.cache import cache_stats
+from src.api.images import VARIANT_ORIGINAL, VARIANT_THUMB, image_store
 from src.api.models import (
     AnalyzeResponse,
     ReportResponse,
@@ -46,8 +55,72 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
+# PDF 생성에 필요한 리포트 필드 (ocr_text 등은 조회하지 않음)
+PDF_REPORT_FIELDS = [
+    "country", "ocr_engine", "allergens", "nutrition", "promo", "risks",
+    "summary", "input_data_status", "correction_guide", "regulatory_basis",
+]
+# 전문가용 PDF는 국가/리스크만 사용
+EXPERT_PDF_REPORT_FIELDS = ["country", "risks"]
+
+# 리포트 JSON: 이메일 등 사용자 정보가 포함되므로 브라우저에만 저장하고 매번 ETag로 재검증
+REPORT_CACHE_CONTROL = "private, no-cache"
+# PDF: 공유 링크로 받는 파일이므로 CDN/브라우저가 max-age 동안 재사용하고, 이후에는 ETag로 재검증
+PDF_CACHE_CONTROL = f"public, max-age={int(os.getenv('PDF_CACHE_MAX_AGE', '300'))}, must-revalidate"
+
+# 이미지: 내용 해시가 URL이므로 같은 URL의 내용은 바뀌지 않는다 → 1년 + immutable
+IMAGE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# PDF 렌더러 코드가 바뀌면 같은 리포트라도 ETag가 달라지도록 모듈 파일 해시를 섞는다
+with open(pdf_report_module.__file__, "rb") as _f:
+    PDF_RENDERER_VERSION = hashlib.sha1(_f.read()).hexdigest()[:12]
+
+
+def _parse_fields(fields: Optional[str]) -> Optional[list]:
+    """콤마 구분 fields 쿼리 파라미터를 필드 목록으로 변환 (없으면 None = 전체)"""
+    if not fields:
+        return None
+    parsed = [f.strip() for f in fields.split(",") if f.strip()]
+    return parsed or None
+
+
+def _make_etag(report_id: str, content: bytes) -> str:
+    """report_id + 내용 해시로 만든 strong ETag"""
+    return f'"{report_id}-{hashlib.sha1(content).hexdigest()[:20]}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 헤더가 etag와 일치하는지 (목록, *, W/ 접두어 허용: weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any((tag[2:] if tag.startswith("W/") else tag) == etag for tag in candidates)
+
+
+def _not_modified(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+@app.on_event("startup")
+def on_startup():
+    """DB 스키마 마이그레이션 (여러 워커가 동시에 떠도 한 프로세스만 실행) + 중단된 소유권 이전 재개"""
+    init_db()
+    ownership.resume_pending()
+    retention.scheduler.start()
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    """대기 중인 write-behind 리포트를 모두 커밋"""
+    retention.scheduler.stop()
+    repository.close()
+    close_report_writer()
+
 
 # =============================================================================
 # Health Check
@@ -71,13 +144,14 @@ async def api_link_email(
     """
     사용자 ID와 이메일을 연결 (라이트 회원 가입)
     - 이미 이메일이 다른 ID에 연결된 경우, 해당 ID의 리포트들을 현재 ID로 가져옵니다.
+      (리포트가 많으면 백그라운드로 옮기며 migration.background=true, 진행 상황은 /api/users/{user_id}/migration)
     """
     if not re.match(r"[^@]+@[^@]+\.[^@]+", email):
         raise HTTPException(status_code=400, detail="유효하지 않은 이메일 형식입니다.")
 
     try:
-        upsert_user_email(user_id, email)
-        return {"message": "이메일이 성공적으로 연결 및 동기화되었습니다."}
+        migration = await repository.upsert_user_email(user_id, email)
+        return {"message": "이메일이 성공적으로 연결 및 동기화되었습니다.", "migration": migration}
     except Exception as e:
         # 실제 운영에서는 에러 로깅이 필요합니다.
         print(f"Error in api_link_email: {e}")
@@ -89,18 +163,30 @@ async def api_get_user(user_id: str):
     """
     사용자 ID로 이메일 조회
     """
-    email = get_user_email(user_id)
+    email = await repository.get_user_email(user_id)
     if email is None:
         raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다.")
     return {"email": email}
 
+@app.get("/api/users/{user_id}/migration")
+async def api_user_migration(user_id: str):
+    """
+    이메일 연결로 시작된 리포트 소유권 이전 진행 상황
+    """
+    jobs = await repository.migration_status(user_id)
+    return {
+        "in_progress": any(job["status"] == ownership.STATUS_PENDING for job in jobs),
+        "migrations": jobs,
+    }
+
+
 @app.delete("/api/users/{user_id}/email")
 async def api_unlink_email(user_id: str):
     """
     사용자 ID에 연결된 이메일 연결 해제
     """
     try:
-        success = unlink_user_email(user_id)
+        success = await repository.unlink_user_email(user_id)
         if not success:
             raise HTTPException(status_code=404, detail="사용자를 찾을 수 없거나 이메일이 연결되어 있지 않습니다.")
         return {"message": "이메일 연결이 해제되었습니다."}
@@ -122,7 +208,7 @@ async def api_login_by_email(
 
     try:
         # 이메일로 기존 사용자 조회
-        existing_user = get_user_by_email(email)
+        existing_user = await repository.get_user_by_email(email)
 
         if existing_user:
             # 기존 사용자 반환
@@ -134,7 +220,7 @@ async def api_login_by_email(
         else:
             # 새 사용자 생성
             new_user_id = uuid.uuid4().hex
-            upsert_user_email(new_user_id, email)
+            await repository.upsert_user_email(new_user_id, email)
             return {
                 "user_id": new_user_id,
                 "email": email,
@@ -175,27 +261,31 @@ async def api_analyze(
         if ocr_error:
             raise HTTPException(status_code=400, detail=ocr_error)
 
+        # 라벨 검증 + 알레르기/영양성분 추출 + 규정 검사 (텍스트 한 번 스캔, src/rules/analyzer.py)
+        analysis = analyze_label(
+            ocr_text,
+            country=country,
+            ocr_confidence=ocr_engine, # OCR 엔진 이름을 신뢰도 지표로 사용
+            detected_language="한국어/영어 혼합", # 실제 언어 감지 결과가 있다면 교체 필요
+        )
+
         # 라벨 이미지 검증
-        is_valid, validation_message, validation_details = validate_label_image(ocr_text)
+        is_valid, validation_message, validation_details = analysis.validation
         if not is_valid:
             raise HTTPException(status_code=400, detail=validation_message)
 
+        # 원본 보관 + 썸네일 생성 (같은 이미지는 한 번만 저장)
+        image_hash = await run_in_threadpool(image_store.put, contents)
+
         # 분석
-        allergens = extract_allergens(ocr_text)
-        nutrition = parse_nutrition(ocr_text)
-        
-        report_pack = check_risks(
-            text=ocr_text,
-            country=country,
-            ocr_confidence=ocr_engine, # OCR 엔진 이름을 신뢰도 지표로 사용
-            detected_language="한국어/영어 혼합", # 실제 언어 감지 결과가 있다면 교체 필요
-            nutrition_detected=bool(nutrition) # 영양성분 인식 여부를 전달
-        )
+        allergens = analysis.allergens
+        nutrition = analysis.nutrition
+        report_pack = analysis.report_pack
         risks = report_pack.get("risks", [])
         promo = generate_promo(ocr_text, country)
 
-        # DB 저장
-        report_id = save_report(
+        # DB 저장 (DB 스레드 풀에서 실행, 그룹 커밋 대기는 스레드를 점유하지 않고 await)
+        report_id = await repository.save_report(
             user_id=user_id,
             country=country,
             ocr_engine=ocr_engine,
@@ -208,6 +298,8 @@ async def api_analyze(
             input_data_status=report_pack.get("input_data_status"),
             correction_guide=report_pack.get("correction_guide"),
             regulatory_basis=report_pack.get("regulatory_basis"),
+            rules_version=report_pack.get("rules_version"),
+            image_hash=image_hash,
         )
 
         return JSONResponse(content={
@@ -223,7 +315,8 @@ async def api_analyze(
             "input_data_status": report_pack.get("input_data_status"),
             "correction_guide": report_pack.get("correction_guide"),
             "regulatory_basis": report_pack.get("regulatory_basis"),
-            "user_id": user_id
+            "user_id": user_id,
+            "image_hash": image_hash
         })
 
     except HTTPException:
@@ -236,27 +329,140 @@ async def api_analyze(
 # 리포트 조회 API
 # =============================================================================
 
+def _export_jsonl(batches):
+    for batch in batches:
+        yield "".join(json.dumps(report, ensure_ascii=False) + "\n" for report in batch)
+
+
+def _export_csv(batches):
+    """CSV 내보내기: JSON 필드는 JSON 문자열로 한 셀에 기록 (Excel 호환을 위해 UTF-8 BOM 포함)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(REPORT_FIELDS)
+    yield "\ufeff" + buffer.getvalue()
+
+    for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        for report in batch:
+            writer.writerow([
+                value if value is None or isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+                for value in (report[field] for field in REPORT_FIELDS)
+            ])
+        yield buffer.getvalue()
+
+
+EXPORT_FORMATS = {
+    "jsonl": ("application/x-ndjson; charset=utf-8", _export_jsonl),
+    "csv": ("text/csv; charset=utf-8", _export_csv),
+}
+
+
+@app.get("/api/reports/export")
+async def api_export_reports(
+    user_id: str = Query(..., min_length=1, description="사용자 ID"),
+    format: str = Query(default="jsonl", description="내보내기 형식 (jsonl/csv)"),
+    country: Optional[str] = Query(default=None, description="국가 필터 (US/JP/VN)"),
+    date_from: Optional[str] = Query(default=None, description="시작 날짜 (YYYY-MM-DD)"),
+    date_to: Optional[str] = Query(default=None, description="종료 날짜 (YYYY-MM-DD)")
+):
+    """
+    사용자의 리포트 전체 내보내기 (감사 대응용)
+    - DB 커서에서 배치 단위로 읽어 바로 스트리밍하므로 리포트 수와 무관하게 메모리 사용량이 일정하다.
+
+    Returns:
+        JSONL(한 줄에 리포트 하나) 또는 CSV 파일 스트림 (최신순)
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format: {format}. Allowed: {', '.join(EXPORT_FORMATS)}")
+
+    media_type, serialize = EXPORT_FORMATS[format]
+    batches = iter_reports_export(user_id, country=country, date_from=date_from, date_to=date_to)
+
+    return StreamingResponse(
+        serialize(batches),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=kfood_reports.{format}"}
+    )
+
+
+@app.get("/api/reports/search")
+async def api_search_reports(
+    q: str = Query(..., min_length=1, description='검색어 (공백 구분 AND, "큰따옴표"로 구절 검색)'),
+    user_id: Optional[str] = Query(default=None, description="사용자 ID 필터"),
+    country: Optional[str] = Query(default=None, description="국가 필터 (US/JP/VN/EU/CN)"),
+    limit: int = Query(default=20, ge=1, le=100, description="최대 개수"),
+    offset: int = Query(default=0, ge=0, description="시작 위치")
+):
+    """
+    리포트 전문 검색 (OCR 텍스트, 리스크 근거 문장, 알레르겐)
+
+    Returns:
+        관련도 순 검색 결과 (snippet은 <mark>로 검색어 강조)
+    """
+    return JSONResponse(content=await repository.search_reports(
+        q,
+        user_id=user_id,
+        country=country,
+        limit=limit,
+        offset=offset
+    ))
+
+
 @app.get("/api/reports/{report_id}", response_model=ReportResponse)
-async def api_get_report(report_id: str, user_id: Optional[str] = Query(default=None, description="사용자 ID")):
+async def api_get_report(
+    report_id: str,
+    user_id: Optional[str] = Query(default=None, description="사용자 ID"),
+    fields: Optional[str] = Query(
+        default=None,
+        description="조회할 필드 (콤마 구분, 예: summary,risks). user_email 포함 가능. 생략 시 전체"
+    ),
+    if_none_match: Optional[str] = Header(default=None)
+):
     """
     특정 리포트 조회
+    - 응답 본문 해시로 ETag를 붙이고, If-None-Match가 일치하면 304 반환
 
     Args:
         report_id: 리포트 ID (8자리)
         user_id: 사용자 ID (선택)
+        fields: 조회할 필드 목록 (선택, sparse fieldset)
 
     Returns:
         리포트 상세 정보
     """
-    report = get_report(report_id, user_id)
+    requested = _parse_fields(fields)
+    include_email = requested is None or "user_email" in requested
+    db_fields = None
+    if requested is not None:
+        db_fields = [f for f in requested if f != "user_email"]
+        if include_email:
+            db_fields.append("user_id")
+
+    try:
+        report = await repository.get_report(report_id, user_id, fields=db_fields)
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields requested. Allowed: {', '.join(REPORT_FIELDS + ('user_email',))}"
+        )
 
     if not report:
         raise HTTPException(status_code=404, detail=f"Report not found or not accessible: {report_id}")
     
     # user_id에 연결된 이메일 주소 추가
-    report["user_email"] = get_user_email(report["user_id"])
+    if include_email:
+        report["user_email"] = await repository.get_user_email(report["user_id"])
+        if requested is not None and "user_id" not in requested:
+            del report["user_id"]
 
-    return JSONResponse(content=report)
+    response = JSONResponse(content=report)
+    etag = _make_etag(report_id, response.body)
+    if _etag_matches(if_none_match, etag):
+        return _not_modified(etag, REPORT_CACHE_CONTROL)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = REPORT_CACHE_CONTROL
+    return response
 
 
 @app.get("/api/reports", response_model=ReportListResponse)
@@ -282,19 +488,22 @@ async def api_list_reports(
     Returns:
         리포트 목록 (최신순)
     """
-    reports = get_reports(
-        limit=limit,
-        offset=offset,
-        country=country,
-        date_from=date_from,
-        date_to=date_to,
-        user_id=user_id
-    )
-    total = count_reports(
-        country=country,
-        date_from=date_from,
-        date_to=date_to,
-        user_id=user_id
+    # 목록과 개수는 서로 독립이므로 DB 풀에서 동시에 조회
+    reports, total = await asyncio.gather(
+        repository.get_reports(
+            limit=limit,
+            offset=offset,
+            country=country,
+            date_from=date_from,
+            date_to=date_to,
+            user_id=user_id
+        ),
+        repository.count_reports(
+            country=country,
+            date_from=date_from,
+            date_to=date_to,
+            user_id=user_id
+        ),
     )
 
     return JSONResponse(content={
@@ -303,6 +512,41 @@ async def api_list_reports(
     })
 
 
+# =============================================================================
+# 이미지 API
+# =============================================================================
+
+@app.get("/api/images/{image_hash}")
+def api_get_image(
+    image_hash: str,
+    variant: str = Query(default=VARIANT_THUMB, description="thumb(기본) / original"),
+    format: Optional[str] = Query(default=None, description="썸네일 포맷 (webp/jpeg, 생략 시 Accept 헤더로 결정)"),
+    accept: Optional[str] = Header(default=None),
+    if_none_match: Optional[str] = Header(default=None)
+):
+    """
+    리포트 라벨 이미지 (원본 또는 저장 시 만든 썸네일)
+    - URL이 내용 해시라서 immutable로 캐시하고, ETag 재검증 시 파일을 읽지 않고 304 반환
+    """
+    if variant not in (VARIANT_THUMB, VARIANT_ORIGINAL):
+        raise HTTPException(status_code=400, detail="variant must be thumb or original")
+    if format not in (None, "webp", "jpeg"):
+        raise HTTPException(status_code=400, detail="format must be webp or jpeg")
+
+    fmt = format or ("webp" if accept and "image/webp" in accept else "jpeg")
+    found = image_store.locate(image_hash, variant, fmt)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    path, media_type = found
+
+    headers = {"Cache-Control": IMAGE_CACHE_CONTROL, "ETag": f'"{os.path.basename(path)}"'}
+    if variant == VARIANT_THUMB and format is None:
+        headers["Vary"] = "Accept"
+    if _etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+
 # =============================================================================
 # PDF 다운로드 API
 # =============================================================================
@@ -311,24 +555,37 @@ async def api_list_reports(
 async def api_download_pdf(
     report_id: str,
     is_expert: bool = Query(False, description="전문가용 PDF 여부"),
-    expert_comment: str = Query("", description="전문가 코멘트")
+    expert_comment: str = Query("", description="전문가 코멘트"),
+    if_none_match: Optional[str] = Header(default=None)
 ):
     """
     리포트 PDF 다운로드
+    - ETag는 PDF를 만들지 않고 입력(리포트 필드 + 옵션 + 렌더러 버전)만으로 계산하므로,
+      If-None-Match가 일치하면 PDF 생성 없이 304 반환
     """
-    report = get_report(report_id)
+    report = await repository.get_report(
+        report_id,
+        fields=EXPERT_PDF_REPORT_FIELDS if is_expert else PDF_REPORT_FIELDS
+    )
 
     if not report:
         raise HTTPException(status_code=404, detail=f"Report not found: {report_id}")
 
+    etag = _make_etag(report_id, json.dumps(
+        [PDF_RENDERER_VERSION, is_expert, expert_comment, report],
+        ensure_ascii=False, sort_keys=True
+    ).encode("utf-8"))
+    if _etag_matches(if_none_match, etag):
+        return _not_modified(etag, PDF_CACHE_CONTROL)
+
     try:
         pdf_bytes = generate_pdf_report(
             report_id=report["id"],
             country=report["country"],
-            ocr_engine=report["ocr_engine"],
-            allergens=report["allergens"],
-            nutrition=report["nutrition"],
-            promo=report["promo"],
+            ocr_engine=report.get("ocr_engine", ""),
+            allergens=report.get("allergens", []),
+            nutrition=report.get("nutrition", {}),
+            promo=report.get("promo", {}),
             risks=report.get("risks", []),
             summary=report.get("summary"),
             input_data_status=report.get("input_data_status"),
@@ -344,7 +601,9 @@ async def api_download_pdf(
             content=pdf_bytes,
             media_type="application/pdf",
             headers={
-                "Content-Disposition": f"attachment; filename={filename}"
+                "Content-Disposition": f"attachment; filename={filename}",
+                "ETag": etag,
+                "Cache-Control": PDF_CACHE_CONTROL,
             }
         )
 
@@ -367,7 +626,7 @@ async def api_delete_report(report_id: str):
     Returns:
         삭제 결과
     """
-    success = delete_report(report_id)
+    success = await repository.delete_report(report_id)
 
     if not success:
         raise HTTPException(status_code=404, detail=f"Report not found: {report_id}")
@@ -375,6 +634,110 @@ async def api_delete_report(report_id: str):
     return JSONResponse(content={"message": f"Report {report_id} deleted successfully"})
 
 
+# =============================================================================
+# 통계 API
+# =============================================================================
+
+@app.get("/api/analytics")
+async def api_analytics(
+    start: Optional[str] = Query(default=None, description="시작일 (YYYY-MM-DD, UTC)"),
+    end: Optional[str] = Query(default=None, description="종료일 (YYYY-MM-DD, UTC, 포함)"),
+    bucket: str = Query(default="week", description="집계 단위 (day/week/month)"),
+    country: Optional[str] = Query(default=None, description="국가 필터 (US/JP/VN/EU/CN)"),
+    top: int = Query(default=10, ge=1, le=50, description="상위 알레르겐 개수")
+):
+    """
+    컴플라이언스 통계 (국가별 HIGH 리스크 비율, 상위 알레르겐, 교차오염 빈도)
+    - 저장 시점에 갱신되는 롤업 테이블만 조회하며 리포트 원본은 읽지 않는다.
+
+    Returns:
+        기간별 series, top_allergens, totals
+    """
+    try:
+        result = await repository.get_analytics(start=start, end=end, bucket=bucket, country=country, top=top)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return JSONResponse(content=result)
+
+
+# =============================================================================
+# 관리자 API
+# =============================================================================
+
+def _require_admin(token: Optional[str]) -> None:
+    """ADMIN_TOKEN 환경변수와 X-Admin-Token 헤더 비교 (환경변수가 없으면 관리자 API 비활성)"""
+    expected = os.getenv("ADMIN_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=403, detail="Admin API is disabled (ADMIN_TOKEN not set)")
+    if not token or not secrets.compare_digest(token, expected):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@app.post("/api/admin/reevaluate", status_code=202)
+async def api_start_reevaluation(
+    country: Optional[str] = Query(default=None, description="대상 국가 (기본: 전체)"),
+    batch_size: int = Query(default=200, ge=1, le=5000, description="배치 크기"),
+    workers: Optional[int] = Query(default=None, ge=0, le=64, description="프로세스 수 (기본: CPU 수)"),
+    dry_run: bool = Query(default=False, description="기록 없이 변경 건수만 계산"),
+    x_admin_token: Optional[str] = Header(default=None)
+):
+    """
+    규칙 변경 후 저장된 리포트 재평가를 백그라운드로 시작 (src/api/reevaluate.py)
+
+    Returns:
+        작업 상태 (이미 실행 중이면 409)
+    """
+    _require_admin(x_admin_token)
+
+    started = reevaluate.job.start(
+        countries=[country] if country else None,
+        batch_size=batch_size,
+        workers=workers,
+        dry_run=dry_run,
+    )
+    if not started:
+        raise HTTPException(status_code=409, detail="Re-evaluation is already running")
+
+    return JSONResponse(status_code=202, content=reevaluate.job.status())
+
+
+@app.get("/api/admin/reevaluate")
+async def api_reevaluation_status(x_admin_token: Optional[str] = Header(default=None)):
+    """재평가 작업 상태/진행률/처리량 조회"""
+    _require_admin(x_admin_token)
+    return JSONResponse(content=reevaluate.job.status())
+
+
+@app.get("/api/admin/cache")
+async def api_cache_stats(x_admin_token: Optional[str] = Header(default=None)):
+    """리포트/이메일 캐시 크기, 적중률, 무효화 횟수 조회"""
+    _require_admin(x_admin_token)
+    return JSONResponse(content=cache_stats())
+
+
+@app.post("/api/admin/maintenance", status_code=202)
+async def api_start_maintenance(
+    days: Optional[int] = Query(default=None, ge=0, description="보관 기준 일수 (기본: REPORT_RETENTION_DAYS)"),
+    x_admin_token: Optional[str] = Header(default=None)
+):
+    """오래된 리포트 보관 + 공간 회수를 백그라운드로 시작 (src/api/retention.py)"""
+    _require_admin(x_admin_token)
+    if not retention.scheduler.run_now(days):
+        raise HTTPException(status_code=409, detail="Maintenance is already running")
+    return JSONResponse(status_code=202, content={"state": "running", "days": days})
+
+
+@app.get("/api/admin/maintenance")
+async def api_maintenance_runs(
+    limit: int = Query(default=10, ge=1, le=100),
+    x_admin_token: Optional[str] = Header(default=None)
+):
+    """최근 정리 작업 결과 (보관 건수, 회수 바이트, 정리 전후 hot 테이블 조회 지연)"""
+    _require_admin(x_admin_token)
+    return JSONResponse(content={"runs": await repository.run(retention.recent_runs, limit)})
+
+
 # =============================================================================
 # 레거시 API (하위 호환용)
 # =============================================================================
@@ -402,20 +765,22 @@ async def legacy_analyze(
         if ocr_error:
             raise HTTPException(status_code=400, detail=ocr_error)
 
-        # 라벨 이미지 검증
-        is_valid, validation_message, validation_details = validate_label_image(ocr_text)
-        if not is_valid:
-            raise HTTPException(status_code=400, detail=validation_message)
-
-        allergens = extract_allergens(ocr_text)
-        nutrition = parse_nutrition(ocr_text)
-        report_pack = check_risks(
-            text=ocr_text,
+        # 라벨 검증 + 알레르기/영양성분 추출 + 규정 검사 (텍스트 한 번 스캔, src/rules/analyzer.py)
+        analysis = analyze_label(
+            ocr_text,
             country=country,
             ocr_confidence=ocr_engine, # OCR 엔진 이름을 신뢰도 지표로 사용
             detected_language="한국어/영어 혼합", # 실제 언어 감지 결과가 있다면 교체 필요
-            nutrition_detected=bool(nutrition) # 영양성분 인식 여부를 전달
         )
+
+        # 라벨 이미지 검증
+        is_valid, validation_message, validation_details = analysis.validation
+        if not is_valid:
+            raise HTTPException(status_code=400, detail=validation_message)
+
+        allergens = analysis.allergens
+        nutrition = analysis.nutrition
+        report_pack = analysis.report_pack
         risks = report_pack.get("risks", [])
         promo = generate_promo(ocr_text, country)
 
@@ -458,20 +823,22 @@ async def legacy_report(
         if ocr_error:
             raise HTTPException(status_code=400, detail=ocr_error)
 
-        # 라벨 이미지 검증
-        is_valid, validation_message, validation_details = validate_label_image(ocr_text)
-        if not is_valid:
-            raise HTTPException(status_code=400, detail=validation_message)
-
-        allergens = extract_allergens(ocr_text)
-        nutrition = parse_nutrition(ocr_text)
-        report_pack = check_risks(
-            text=ocr_text,
+        # 라벨 검증 + 알레르기/영양성분 추출 + 규정 검사 (텍스트 한 번 스캔, src/rules/analyzer.py)
+        analysis = analyze_label(
+            ocr_text,
             country=country,
             ocr_confidence=ocr_engine, # OCR 엔진 이름을 신뢰도 지표로 사용
             detected_language="한국어/영어 혼합", # 실제 언어 감지 결과가 있다면 교체 필요
-            nutrition_detected=bool(nutrition) # 영양성분 인식 여부를 전달
         )
+
+        # 라벨 이미지 검증
+        is_valid, validation_message, validation_details = analysis.validation
+        if not is_valid:
+            raise HTTPException(status_code=400, detail=validation_message)
+
+        allergens = analysis.allergens
+        nutrition = analysis.nutrition
+        report_pack = analysis.report_pack
         risks = report_pack.get("risks", [])
         promo = generate_promo(ocr_text, country)
 
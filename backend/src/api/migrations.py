@@ -0,0 +1,320 @@
+"""
+SQLite 스키마 마이그레이션 (PRAGMA user_version 기반)
+
+- MIGRATIONS의 각 단계는 버전 순서대로 한 번만 적용되며, 단계 자체도 멱등(idempotent)하게 작성한다.
+  (user_version 도입 이전에 만들어진 DB는 버전 0에서 시작해 이미 있는 테이블/컬럼을 건너뛴다)
+- 각 단계는 BEGIN IMMEDIATE 트랜잭션 안에서 실행되고, 같은 트랜잭션에서 user_version을 올린다.
+- 여러 워커가 동시에 기동해도 파일 락(<db>.migrate.lock)을 잡은 프로세스 하나만 마이그레이션한다.
+- 이미 최신 버전이면 락 없이 user_version만 읽고 바로 반환한다.
+
+새 컬럼/인덱스/백필은 PRAGMA table_info 분기 대신 새 단계로 추가한다.
+"""
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, NamedTuple, Optional
+
+from src.api import analytics, ownership, retention, search
+from src.api.storage import PAYLOAD_FIELDS, init_dictionary_schema, init_storage_schema, row_to_doc
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+ProgressFn = Callable[[str], None]
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    apply: Callable[[sqlite3.Connection, ProgressFn], None]
+
+
+def _print_progress(message: str) -> None:
+    print(f"[migrate] {message}")
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table});")]
+
+
+def add_column_if_missing(conn: sqlite3.Connection, table: str, column: str, ddl: str) -> None:
+    """컬럼이 없을 때만 ALTER TABLE ADD COLUMN (마이그레이션 단계 멱등성 보장용)"""
+    if column not in _columns(conn, table):
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl};")
+
+
+@contextmanager
+def report_progress(conn: sqlite3.Connection, progress: ProgressFn, label: str, interval: float = 2.0) -> Iterator[None]:
+    """
+    CREATE INDEX처럼 오래 걸리는 단일 SQL 실행 중 경과 시간을 주기적으로 보고
+    (sqlite3 progress handler 사용)
+    """
+    start = time.monotonic()
+    last = [start]
+
+    def _handler() -> int:
+        now = time.monotonic()
+        if now - last[0] >= interval:
+            last[0] = now
+            progress(f"{label}: {now - start:.0f}s 경과")
+        return 0
+
+    conn.set_progress_handler(_handler, 100_000)
+    try:
+        yield
+    finally:
+        conn.set_progress_handler(None, 0)
+        progress(f"{label}: 완료 ({time.monotonic() - start:.1f}s)")
+
+
+def backfill(
+    conn: sqlite3.Connection,
+    progress: ProgressFn,
+    label: str,
+    select_sql: str,
+    apply_batch: Callable[[sqlite3.Connection, List[sqlite3.Row]], None],
+    batch_size: int = 1000,
+    table: str = "reports"
+) -> int:
+    """
+    rowid 키셋 페이지네이션으로 행을 배치 단위로 읽어 apply_batch 적용.
+    select_sql은 "rowid > ?" 조건과 "ORDER BY rowid LIMIT ?"를 포함해야 한다. (table은 진행률 총계용)
+    """
+    total = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    done = 0
+    last_rowid = 0
+    while True:
+        rows = conn.execute(select_sql, (last_rowid, batch_size)).fetchall()
+        if not rows:
+            break
+        apply_batch(conn, rows)
+        done += len(rows)
+        last_rowid = rows[-1]["rowid"]
+        progress(f"{label}: {done}/{total}")
+    return done
+
+
+# =============================================================================
+# 마이그레이션 단계
+# =============================================================================
+
+def _m1_base_tables(conn: sqlite3.Connection, progress: ProgressFn) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS reports (
+            id TEXT PRIMARY KEY,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            user_id TEXT NOT NULL DEFAULT 'anonymous',
+            country TEXT NOT NULL,
+            ocr_engine TEXT NOT NULL,
+            ocr_text TEXT,
+            allergens TEXT,
+            nutrition TEXT,
+            risks TEXT,
+            promo TEXT
+        );
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id TEXT PRIMARY KEY,
+            email TEXT UNIQUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+
+
+def _m2_report_sections(conn: sqlite3.Connection, progress: ProgressFn) -> None:
+    add_column_if_missing(conn, "reports", "summary", "TEXT DEFAULT NULL")
+    add_column_if_missing(conn, "reports", "input_data_status", "TEXT DEFAULT NULL")
+    add_column_if_missing(conn, "reports", "correction_guide", "TEXT DEFAULT NULL")
+    add_column_if_missing(conn, "reports", "regulatory_basis", "TEXT DEFAULT NULL")
+
+
+def _m3_payload_storage(conn: sqlite3.Connection, progress: ProgressFn) -> None:
+    # 압축 BLOB 저장 포맷 (src/api/storage.py)
+    # ocr_payload는 v11에서 추가됐지만, 이후 단계의 백필(REPORT_DOC_SELECT)이 읽으므로 여기서도 만든다
+    add_column_if_missing(conn, "reports", "payload", "BLOB DEFAULT NULL")
+    add_column_if_missing(conn, "reports", "ocr_payload", "BLOB DEFAULT NULL")
+    add_column_if_missing(conn, "reports", "storage_format", "INTEGER NOT NULL DEFAULT 0")
+    init_storage_schema(conn.cursor())
+
+
+def _m4_created_at_index(conn: sqlite3.Connection, progress: ProgressFn) -> None:
+    # 히스토리 목록(ORDER BY created_at DESC) 정렬용
+    with report_progress(conn, progress, "idx_reports_created_at"):
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_reports_created_at ON reports(created_at);")
+
+
+REPORT_DOC_SELECT = f"""
+    SELECT rowid, id, created_at, user_id, country, storage_format, payload, ocr_payload,
+           {', '.join(PAYLOAD_FIELDS)}
+    FROM reports
+    WHERE rowid > ?
+    ORDER BY rowid
+    LIMIT ?
+"""
+
+# 보관 행은 항상 BLOB 포맷 (payload 필드 컬럼은 NULL로 채워 row_to_doc에 같은 모양으로 넘긴다)
+ARCHIVE_DOC_SELECT = f"""
+    SELECT rowid, id, created_at, user_id, country, storage_format, payload, NULL AS ocr_payload,
+           {', '.join(f'NULL AS {f}' for f in PAYLOAD_FIELDS)}
+    FROM {retention.ARCHIVE_TABLE}
+    WHERE rowid > ?
+    ORDER BY rowid
+    LIMIT ?
+"""
+
+
+def _m5_full_text_search(conn: sqlite3.Connection, progress: ProgressFn) -> None:
+    # 전문 검색 인덱스 (src/api/search.py) + 기존 리포트 백필
+    search.create_fts_table(conn)
+    conn.execute(f"DELETE FROM {search.FTS_TABLE};")
+
+    def _index(conn: sqlite3.Connection, rows: List[sqlite3.Row]) -> None:
+        index_rows = []
+        for row in rows:
+            doc = row_to_doc(conn, row)
+            index_rows.append(search.build_index_row(
+                row["id"], row["user_id"], row["country"],
+                doc.get("ocr_text"), doc.get("risks"), doc.get("allergens")
+            ))
+        search.index_reports(conn, index_rows)
+
+    backfill(conn, progress, "reports_fts 백필", REPORT_DOC_SELECT, _index)
+
+
+def _m6_analytics_rollups(conn: sqlite3.Connection, progress: ProgressFn) -> None:
+    # 컴플라이언스 통계 롤업 (src/api/analytics.py) + 기존 리포트로 초기 계산
+    analytics.init_analytics_schema(conn)
+    analytics.rebuild_rollups(conn, progress)
+
+
+def _m7_rules_version(conn: sqlite3.Connection, progress: ProgressFn) -> None:
+    # 리포트 판정에 사용된 규칙 버전 (NULL = 버전 기록 이전 리포트, 재평가 대상)
+    add_column_if_missing(conn, "reports", "rules_version", "TEXT DEFAULT NULL")
+
+
+def _m8_user_index(conn: sqlite3.Connection, progress: ProgressFn) -> None:
+    # 사용자별 목록/내보내기 + 소유권 이전(src/api/ownership.py) 배치 조회용
+    with report_progress(conn, progress, "idx_reports_user_id"):
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_reports_user_id ON reports(user_id, created_at);")
+    ownership.init_ownership_schema(conn)
+
+
+def _m9_report_archive(conn: sqlite3.Connection, progress: ProgressFn) -> None:
+    # 오래된 리포트 보관 테이블 + 정리 작업 기록 (src/api/retention.py) + 보관용 압축 dictionary
+    init_dictionary_schema(conn)
+    retention.init_retention_schema(conn)
+
+
+def _m10_image_hash(conn: sqlite3.Connection, progress: ProgressFn) -> None:
+    # 분석한 라벨 이미지 참조 (src/api/images.py의 SHA-256 키, NULL = 이미지 보관 이전 리포트)
+    add_column_if_missing(conn, "reports", "image_hash", "TEXT DEFAULT NULL")
+    add_column_if_missing(conn, retention.ARCHIVE_TABLE, "image_hash", "TEXT DEFAULT NULL")
+
+
+def _m11_ocr_payload(conn: sqlite3.Connection, progress: ProgressFn) -> None:
+    # SPLIT 포맷: ocr_text만 따로 압축하는 컬럼 (src/api/storage.py, 기존 행 변환은 `python -m src.api.storage migrate`)
+    add_column_if_missing(conn, "reports", "ocr_payload", "BLOB DEFAULT NULL")
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "reports/users 기본 테이블", _m1_base_tables),
+    Migration(2, "리포트 확장 섹션 컬럼 (summary 등)", _m2_report_sections),
+    Migration(3, "압축 payload 저장 포맷 + rule_details", _m3_payload_storage),
+    Migration(4, "created_at 인덱스", _m4_created_at_index),
+    Migration(5, "전문 검색(FTS5) 인덱스", _m5_full_text_search),
+    Migration(6, "컴플라이언스 통계 롤업 테이블", _m6_analytics_rollups),
+    Migration(7, "리포트 규칙 버전 컬럼", _m7_rules_version),
+    Migration(8, "user_id 인덱스 + 소유권 이전 작업 테이블", _m8_user_index),
+    Migration(9, "리포트 보관(archive) 테이블 + 정리 작업 기록", _m9_report_archive),
+    Migration(10, "리포트 이미지 해시 컬럼", _m10_image_hash),
+    Migration(11, "OCR 텍스트 분리 저장 컬럼 (SPLIT 포맷)", _m11_ocr_payload),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+# =============================================================================
+# 실행기
+# =============================================================================
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version;").fetchone()[0]
+
+
+@contextmanager
+def file_lock(lock_path: str) -> Iterator[None]:
+    """프로세스 간 배타 락 (다른 프로세스가 잡고 있으면 풀릴 때까지 대기)"""
+    with open(lock_path, "a+") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _migration_lock(db_path: str):
+    """다른 워커가 마이그레이션 중이면 끝날 때까지 대기"""
+    return file_lock(db_path + ".migrate.lock")
+
+
+def run_migrations(db_path: str, progress: Optional[ProgressFn] = None) -> int:
+    """
+    db_path의 스키마를 최신 버전으로 올린다.
+
+    Returns:
+        적용된 단계 수 (이미 최신이면 0)
+    """
+    progress = progress or _print_progress
+
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        if get_schema_version(conn) >= LATEST_VERSION:
+            return 0
+    finally:
+        conn.close()
+
+    applied = 0
+    with _migration_lock(db_path):
+        conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            # 락을 기다리는 동안 다른 프로세스가 이미 마이그레이션했을 수 있다
+            current = get_schema_version(conn)
+            if current == 0 and conn.execute("PRAGMA page_count;").fetchone()[0] == 0:
+                # 새 DB: 테이블 생성 전에만 설정 가능 (보관 정리 후 retention.py가 incremental_vacuum 실행)
+                conn.execute("PRAGMA auto_vacuum = INCREMENTAL;")
+            for migration in MIGRATIONS:
+                if migration.version <= current:
+                    continue
+                progress(f"v{migration.version}: {migration.description}")
+                conn.execute("BEGIN IMMEDIATE;")
+                try:
+                    migration.apply(conn, progress)
+                    conn.execute(f"PRAGMA user_version = {migration.version};")
+                    conn.execute("COMMIT;")
+                except BaseException:
+                    conn.execute("ROLLBACK;")
+                    raise
+                applied += 1
+        finally:
+            conn.close()
+
+    return applied
@@ -18,6 +18,8 @@ class Evidence(BaseModel):
     """리스크/판단 근거"""
     matched: List[str] = []
     hint: str = ""
+    derivation: List[str] = []  # 파생 원재료 사슬 (예: '유청단백분말 → 유청단백 → 유청 → Milk')
+    fuzzy: List[str] = []  # OCR 오인식 유사 표기 (예: 'rnilk ≈ milk')
 
 
 class RiskItem(BaseModel):
@@ -96,6 +98,7 @@ class AnalyzeResponse(BaseModel):
     regulatory_basis: List[str] = []
 
     user_id: str = "anonymous"
+    image_hash: Optional[str] = Field(default=None, description="라벨 이미지 키 (/api/images/{image_hash})")
 
 
 class ReportResponse(BaseModel):
@@ -117,6 +120,7 @@ class ReportResponse(BaseModel):
     input_data_status: Dict[str, Any] = {}
     correction_guide: List[Dict[str, Any]] = []
     regulatory_basis: List[str] = []
+    image_hash: Optional[str] = None
 
     # get_report에서 user_email 내려주면 포함
     user_email: Optional[str] = None
@@ -128,6 +132,7 @@ class ReportListItem(BaseModel):
     created_at: str
     country: str
     ocr_engine: str
+    image_hash: Optional[str] = None
 
 
 class ReportListResponse(BaseModel):
@@ -0,0 +1,295 @@
+"""
+리포트 소유권 이전 (이메일 연결 시 이전 user_id → 새 user_id)
+
+이전에는 upsert_user_email이 쓰기 트랜잭션 안에서 인덱스 없이
+UPDATE reports SET user_id = ? WHERE user_id = ? 를 실행해 계정이 클수록 모든 쓰기를 오래 막았다.
+
+- idx_reports_user_id (user_id, created_at) 인덱스로 이전 대상 행을 찾는다
+- batch_size 행씩 짧은 트랜잭션으로 옮기고(검색 facet 포함), 진행 상황을 ownership_migrations에 기록
+- 대상이 OWNERSHIP_SYNC_LIMIT 행을 넘으면 백그라운드 스레드에서 옮기고 요청은 바로 반환
+- 이전이 진행 중인 동안 새 user_id로 조회하면 아직 옮기지 않은 이전 user_id의 리포트도 함께 보인다
+  (owner_ids / search facet OR 조건). 이전 user_id로 조회하면 아직 남은 리포트가 보인다.
+- 중단되면 앱 시작 시(또는 CLI) pending 상태의 이전 작업을 이어서 처리한다
+- 리포트 샤드(src/api/sharding.py)는 차례로 옮기고, 이전 작업 기록은 샤드 0에만 둔다
+
+    python -m src.api.ownership resume
+    python -m src.api.ownership status
+"""
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from src.api import search
+from src.api.cache import report_cache
+from src.api.retention import ARCHIVE_TABLE
+
+# 이전 대상 테이블 (보관된 리포트도 함께 옮긴다)
+REPORT_TABLES = ("reports", ARCHIVE_TABLE)
+
+STATUS_PENDING = "pending"
+STATUS_DONE = "done"
+
+DEFAULT_BATCH_SIZE = 500
+
+ProgressFn = Callable[[Dict[str, Any]], None]
+
+_jobs_lock = threading.Lock()
+_running: Dict[str, threading.Thread] = {}
+
+
+def sync_limit() -> int:
+    """이 행 수 이하이면 요청 안에서 바로 옮기고, 넘으면 백그라운드로 옮긴다"""
+    return int(os.getenv("OWNERSHIP_SYNC_LIMIT", "5000"))
+
+
+def init_ownership_schema(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS ownership_migrations (
+            old_user_id TEXT PRIMARY KEY,
+            new_user_id TEXT NOT NULL,
+            status TEXT NOT NULL,
+            total INTEGER NOT NULL DEFAULT 0,
+            moved INTEGER NOT NULL DEFAULT 0,
+            started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_ownership_migrations_new ON ownership_migrations(new_user_id, status);"
+    )
+
+
+def owner_ids(conn: sqlite3.Connection, user_id: str) -> List[str]:
+    """user_id의 리포트로 보여야 하는 reports.user_id 값 목록 (진행 중인 이전의 원래 ID 포함)"""
+    rows = conn.execute(
+        "SELECT old_user_id FROM ownership_migrations WHERE new_user_id = ? AND status = ?",
+        (user_id, STATUS_PENDING)
+    ).fetchall()
+    return [user_id] + [row[0] for row in rows]
+
+
+def start_migration(conn: sqlite3.Connection, old_user_id: str, new_user_id: str) -> int:
+    """
+    old → new 이전 작업 등록 (호출자의 트랜잭션 안에서 실행, 행은 옮기지 않음)
+
+    Returns:
+        옮길 리포트 수
+    """
+    # old를 향하던 진행 중인 이전은 최종 소유자인 new로 바로 향하게 한다 (A→old→new 연쇄)
+    conn.execute(
+        "UPDATE ownership_migrations SET new_user_id = ?, updated_at = CURRENT_TIMESTAMP WHERE new_user_id = ? AND status = ?",
+        (new_user_id, old_user_id, STATUS_PENDING)
+    )
+    # new → old 이전이 진행 중이었다면 위 갱신으로 자기 자신을 가리키게 되므로 제거 (남은 리포트는 이미 new 소유)
+    conn.execute("DELETE FROM ownership_migrations WHERE old_user_id = new_user_id")
+    total = _count_reports(conn, old_user_id)
+    conn.execute(
+        """
+        INSERT INTO ownership_migrations (old_user_id, new_user_id, status, total, moved)
+        VALUES (?, ?, ?, ?, 0)
+        ON CONFLICT (old_user_id) DO UPDATE SET
+            new_user_id = excluded.new_user_id,
+            status = excluded.status,
+            total = excluded.total,
+            moved = 0,
+            started_at = CURRENT_TIMESTAMP,
+            updated_at = CURRENT_TIMESTAMP
+        """,
+        (old_user_id, new_user_id, STATUS_PENDING if total else STATUS_DONE, total)
+    )
+    return total
+
+
+def _count_reports(conn: sqlite3.Connection, user_id: str) -> int:
+    """모든 샤드에서 user_id 소유 리포트 수 (conn = 샤드 0 연결)"""
+    from src.api.db import SHARD_COUNT, get_connection
+
+    def _count(shard_conn: sqlite3.Connection) -> int:
+        return sum(
+            shard_conn.execute(f"SELECT COUNT(*) FROM {table} WHERE user_id = ?", (user_id,)).fetchone()[0]
+            for table in REPORT_TABLES
+        )
+
+    total = _count(conn)
+    for shard in range(1, SHARD_COUNT):
+        with get_connection(shard=shard) as shard_conn:
+            total += _count(shard_conn)
+    return total
+
+
+def _move_batch(conn: sqlite3.Connection, old_user_id: str, new_user_id: str, batch_size: int) -> List[str]:
+    """샤드 하나에서 최대 batch_size 행을 new_user_id로 옮긴다 (검색 facet 포함, 호출자가 commit)"""
+    rows = []
+    for table in REPORT_TABLES:
+        if len(rows) < batch_size:
+            table_rows = conn.execute(
+                f"SELECT id, country FROM {table} WHERE user_id = ? LIMIT ?",
+                (old_user_id, batch_size - len(rows))
+            ).fetchall()
+            conn.executemany(
+                f"UPDATE {table} SET user_id = ? WHERE id = ?", [(new_user_id, row["id"]) for row in table_rows]
+            )
+            rows += table_rows
+    if rows:
+        search.set_owner(conn, [(row["id"], row["country"]) for row in rows], new_user_id)
+    return [row["id"] for row in rows]
+
+
+def _record_moved(conn: sqlite3.Connection, old_user_id: str, moved: int) -> None:
+    conn.execute(
+        """
+        UPDATE ownership_migrations
+        SET moved = moved + ?, updated_at = CURRENT_TIMESTAMP
+        WHERE old_user_id = ?
+        """,
+        (moved, old_user_id)
+    )
+
+
+def run_migration(
+    old_user_id: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    progress: Optional[ProgressFn] = None,
+    pause: float = 0.0
+) -> int:
+    """
+    old_user_id의 리포트를 batch_size 행씩 옮긴다 (배치마다 커밋, 중단 후 재실행하면 이어서 처리)
+
+    Returns:
+        이번 실행에서 옮긴 행 수
+    """
+    from src.api.db import SHARD_COUNT, get_connection
+
+    moved_now = 0
+    for shard in range(SHARD_COUNT):
+        while True:
+            with get_connection() as conn:
+                job = conn.execute(
+                    "SELECT new_user_id, status, total, moved FROM ownership_migrations WHERE old_user_id = ?",
+                    (old_user_id,)
+                ).fetchone()
+                if job is None or job["status"] != STATUS_PENDING:
+                    return moved_now
+                new_user_id = job["new_user_id"]
+
+                if shard == 0:
+                    # 샤드 0은 이전 기록과 같은 DB라 이동과 진행 상황을 한 트랜잭션으로 커밋
+                    ids = _move_batch(conn, old_user_id, new_user_id, batch_size)
+                    if ids:
+                        _record_moved(conn, old_user_id, len(ids))
+                    conn.commit()
+
+            if shard != 0:
+                with get_connection(shard=shard) as shard_conn:
+                    ids = _move_batch(shard_conn, old_user_id, new_user_id, batch_size)
+                    shard_conn.commit()
+                if ids:
+                    with get_connection() as conn:
+                        _record_moved(conn, old_user_id, len(ids))
+                        conn.commit()
+
+            report_cache.invalidate(*ids)
+            moved_now += len(ids)
+            if progress and ids:
+                progress({
+                    "old_user_id": old_user_id,
+                    "new_user_id": new_user_id,
+                    "total": job["total"],
+                    "moved": job["moved"] + len(ids),
+                })
+            if len(ids) < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+
+    with get_connection() as conn:
+        conn.execute(
+            "UPDATE ownership_migrations SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE old_user_id = ? AND status = ?",
+            (STATUS_DONE, old_user_id, STATUS_PENDING)
+        )
+        conn.commit()
+    return moved_now
+
+
+def run_in_background(old_user_id: str, batch_size: int = DEFAULT_BATCH_SIZE) -> bool:
+    """이전 작업을 백그라운드 스레드에서 실행 (같은 old_user_id가 이미 실행 중이면 False)"""
+    with _jobs_lock:
+        thread = _running.get(old_user_id)
+        if thread is not None and thread.is_alive():
+            return False
+
+        def _run() -> None:
+            try:
+                run_migration(old_user_id, batch_size)
+            except Exception as e:
+                print(f"[ownership] {old_user_id} 이전 실패 (재시작 시 이어서 처리): {e}")
+            finally:
+                with _jobs_lock:
+                    _running.pop(old_user_id, None)
+
+        thread = threading.Thread(target=_run, name=f"ownership-{old_user_id}", daemon=True)
+        _running[old_user_id] = thread
+        thread.start()
+        return True
+
+
+def pending_migrations() -> List[Dict[str, Any]]:
+    from src.api.db import get_connection
+
+    with get_connection() as conn:
+        rows = conn.execute(
+            "SELECT * FROM ownership_migrations WHERE status = ? ORDER BY started_at", (STATUS_PENDING,)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+
+def resume_pending(background: bool = True) -> int:
+    """중단된 이전 작업 재개 (앱 시작 훅 / CLI)"""
+    jobs = pending_migrations()
+    for job in jobs:
+        if background:
+            run_in_background(job["old_user_id"])
+        else:
+            run_migration(job["old_user_id"], progress=_print_progress)
+    return len(jobs)
+
+
+def migration_status(user_id: str) -> List[Dict[str, Any]]:
+    """user_id로 들어오고 있는(또는 완료된) 이전 작업 목록"""
+    from src.api.db import get_connection
+
+    with get_connection() as conn:
+        rows = conn.execute(
+            "SELECT * FROM ownership_migrations WHERE new_user_id = ? OR old_user_id = ? ORDER BY started_at",
+            (user_id, user_id)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+
+def _print_progress(state: Dict[str, Any]) -> None:
+    print(f"[ownership] {state['old_user_id']} → {state['new_user_id']}: {state['moved']:,}/{state['total']:,}")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="리포트 소유권 이전 작업 도구")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("resume", help="중단된 이전 작업을 이어서 실행")
+    sub.add_parser("status", help="진행 중인 이전 작업 출력")
+    args = parser.parse_args(argv)
+
+    from src.api.db import init_db
+    init_db()
+
+    if args.command == "resume":
+        count = resume_pending(background=False)
+        print(f"[ownership] 재개한 작업: {count}")
+    else:
+        for job in pending_migrations():
+            print(f"{job['old_user_id']} → {job['new_user_id']}: {job['moved']:,}/{job['total']:,} (시작 {job['started_at']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+"""
+저장된 리포트 재평가 (규칙 파일 변경 후)
+
+규칙 파일(us_fda.json 등)이나 판정 로직이 바뀌면 기존 리포트는 예전 판정을 그대로 들고 있다.
+이 작업은 저장된 ocr_text로 check_risks를 다시 실행해 결과를 갱신한다.
+
+- reports.rules_version이 국가별 현재 규칙 버전(get_rules_version)과 다른 행만 대상
+- DB에서 batch_size 행씩 읽어 프로세스 풀에서 판정하고, 다음 배치 판정 중에 이전 배치를 기록
+- 워커마다 배치 한 덩어리를 check_risks_batch로 판정 (국가별로 묶어 희소 행렬로 한 번에, src/rules/batch.py)
+- 판정 결과(risks/summary/...)가 달라진 행만 payload를 다시 쓰고 검색 인덱스/통계 롤업도 함께 갱신
+- 결과가 같은 행은 rules_version만 갱신 (바뀐 행은 리포트 캐시에서도 무효화)
+- 배치마다 커밋하므로 중단 후 다시 실행하면 남은 행부터 이어서 처리된다
+- 읽은 뒤 다른 요청이 같은 행을 바꿨다면(rules_version 불일치) 덮어쓰지 않고 건너뛴다
+
+    python -m src.api.reevaluate --workers 4
+    python -m src.api.reevaluate --country US --dry-run
+
+관리자 API: POST/GET /api/admin/reevaluate (main.py)
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.api import analytics, search
+from src.api.cache import report_cache
+from src.api.storage import PAYLOAD_FIELDS, STORAGE_FORMAT_SPLIT, encode_report, row_to_doc, stored_value
+from src.rules.batch import MIN_VECTORIZED_GROUP, BatchItem, check_risks_batch
+from src.rules.checker import RULE_FILES, check_risks, get_rules_version
+
+# check_risks 결과 중 리포트에 저장되는 필드
+CHECK_FIELDS = ("risks", "summary", "input_data_status", "correction_guide", "regulatory_basis")
+
+# 규칙 파일이 없는 국가 코드도 동일한 방식으로 버전을 계산하기 위한 키
+_OTHER_COUNTRY = ""
+
+ProgressFn = Callable[[Dict[str, Any]], None]
+CheckTask = Tuple[str, str, str, Any, Any, bool]
+CheckResult = Tuple[str, Optional[Dict[str, Any]], Optional[str], Optional[str]]
+
+
+def current_versions() -> Dict[str, str]:
+    """국가 코드 → 현재 규칙 버전 ("" 키는 규칙 파일이 없는 국가)"""
+    versions = {country: get_rules_version(country) for country in RULE_FILES}
+    versions[_OTHER_COUNTRY] = get_rules_version(_OTHER_COUNTRY)
+    return versions
+
+
+def _version_case(versions: Dict[str, str]) -> Tuple[str, List[str]]:
+    """행의 국가에 해당하는 현재 버전을 계산하는 SQL CASE 식"""
+    countries = [c for c in versions if c != _OTHER_COUNTRY]
+    sql = "CASE upper(country) " + " ".join("WHEN ? THEN ?" for _ in countries) + " ELSE ? END"
+    params: List[str] = []
+    for country in countries:
+        params += [country, versions[country]]
+    params.append(versions[_OTHER_COUNTRY])
+    return sql, params
+
+
+def _result(report_id: str, pack: Dict[str, Any]) -> CheckResult:
+    """(report_id, 새 판정 필드, 오류 메시지(None), 판정에 쓴 규칙 버전)"""
+    # 저장된 값(JSON 디코딩 결과)과 비교할 수 있도록 JSON 왕복 + 저장 규칙(빈 값은 None)으로 정규화
+    fields = {f: stored_value(v) for f, v in json.loads(json.dumps({f: pack.get(f) for f in CHECK_FIELDS})).items()}
+    return report_id, fields, None, pack.get("rules_version")
+
+
+def _check_one(task: CheckTask) -> CheckResult:
+    """리포트 하나 판정: (report_id, 새 판정 필드 또는 None, 오류 메시지, 판정에 쓴 규칙 버전)"""
+    report_id, country, ocr_text, ocr_confidence, detected_language, nutrition_detected = task
+    try:
+        pack = check_risks(
+            text=ocr_text,
+            country=country,
+            ocr_confidence=ocr_confidence,
+            detected_language=detected_language,
+            nutrition_detected=nutrition_detected,
+        )
+    except Exception as e:
+        return report_id, None, f"{type(e).__name__}: {e}", None
+    return _result(report_id, pack)
+
+
+def _check_many(tasks: Sequence[CheckTask]) -> List[CheckResult]:
+    """
+    프로세스 풀 작업: 리포트 여러 개를 check_risks_batch로 한 번에 판정 (입력 순서대로)
+    - 판정 중 예외가 나면 어느 리포트인지 남기도록 리포트마다 다시 판정한다.
+    """
+    try:
+        packs = check_risks_batch([
+            BatchItem(ocr_text, country, ocr_confidence, detected_language, nutrition_detected)
+            for _, country, ocr_text, ocr_confidence, detected_language, nutrition_detected in tasks
+        ])
+    except Exception:
+        return [_check_one(task) for task in tasks]
+    return [_result(task[0], pack) for task, pack in zip(tasks, packs)]
+
+
+def _split(tasks: List[CheckTask], workers: int) -> List[List[CheckTask]]:
+    """배치를 워커 수만큼 나눈다. 단 국가별 묶음이 행렬로 판정될 만큼(MIN_VECTORIZED_GROUP) 크게"""
+    count = max(1, min(workers, len(tasks) // MIN_VECTORIZED_GROUP))
+    size = -(-len(tasks) // count)
+    # 같은 국가가 한 덩어리에 모이도록 국가 순으로 정렬한 뒤 나눈다 (결과는 report_id로 찾는다)
+    tasks = sorted(tasks, key=lambda task: (task[1] or "").upper())
+    return [tasks[i:i + size] for i in range(0, len(tasks), size)]
+
+
+def _task(row: sqlite3.Row, doc: Dict[str, Any]) -> CheckTask:
+    """분석 당시(api_analyze)와 같은 입력으로 check_risks를 호출하기 위한 인자"""
+    status = doc.get("input_data_status") or {}
+    return (
+        row["id"],
+        row["country"],
+        doc.get("ocr_text") or "",
+        status.get("ocr_confidence") or row["ocr_engine"],
+        status.get("detected_language") or "한국어/영어 혼합",
+        bool(doc.get("nutrition")),
+    )
+
+
+def _write_batch(
+    conn: sqlite3.Connection,
+    rows: Sequence[sqlite3.Row],
+    docs: Dict[str, Dict[str, Any]],
+    results: Sequence[CheckResult],
+    versions: Dict[str, str],
+    stats: Dict[str, Any],
+    dry_run: bool
+) -> List[str]:
+    """판정 결과를 기록하고 payload가 바뀐 report_id 목록 반환 (호출자가 commit)"""
+    by_id = {row["id"]: row for row in rows}
+    unchanged = []
+    changed_ids = []
+
+    for report_id, fields, error, used_version in results:
+        row = by_id[report_id]
+        # 실행 중 규칙 파일이 바뀌어 재로딩됐다면 실제로 판정에 쓴 버전을 기록한다
+        version = used_version or versions.get((row["country"] or "").upper(), versions[_OTHER_COUNTRY])
+        if error is not None:
+            stats["failed"] += 1
+            stats["errors"] = (stats["errors"] + [f"{report_id}: {error}"])[-10:]
+            continue
+
+        doc = docs[report_id]
+        # 저장된 쪽도 같은 규칙으로 (레거시 행은 '[]'를 그대로 디코딩한다)
+        if all(stored_value(doc.get(f)) == fields[f] for f in CHECK_FIELDS):
+            stats["unchanged"] += 1
+            unchanged.append((version, report_id, row["rules_version"]))
+            continue
+
+        stats["changed"] += 1
+        if dry_run:
+            continue
+
+        new_doc = dict(doc)
+        new_doc.update(fields)
+        payload, ocr_payload = encode_report(conn, new_doc)
+        updated = conn.execute(
+            f"""
+            UPDATE reports
+            SET payload = ?, ocr_payload = ?, storage_format = ?, rules_version = ?,
+                {', '.join(f'{f} = NULL' for f in PAYLOAD_FIELDS)}
+            WHERE id = ? AND rules_version IS ?
+            """,
+            (payload, ocr_payload, STORAGE_FORMAT_SPLIT, version, report_id, row["rules_version"])
+        ).rowcount
+        if not updated:
+            stats["changed"] -= 1
+            stats["skipped"] += 1
+            continue
+
+        search.unindex_reports(conn, [report_id])
+        search.index_reports(conn, [search.build_index_row(
+            report_id, row["user_id"], row["country"],
+            new_doc.get("ocr_text"), new_doc.get("risks"), new_doc.get("allergens")
+        )])
+        analytics.forget_reports(conn, [report_id])
+        analytics.record_reports(conn, [analytics.report_facts(
+            report_id, row["created_at"], row["country"], new_doc.get("risks")
+        )])
+        changed_ids.append(report_id)
+
+    if unchanged and not dry_run:
+        conn.executemany(
+            "UPDATE reports SET rules_version = ? WHERE id = ? AND rules_version IS ?", unchanged
+        )
+    return changed_ids
+
+
+def reevaluate_reports(
+    countries: Optional[Sequence[str]] = None,
+    batch_size: int = 200,
+    workers: Optional[int] = None,
+    limit: Optional[int] = None,
+    dry_run: bool = False,
+    progress: Optional[ProgressFn] = None
+) -> Dict[str, Any]:
+    """
+    현재 규칙 버전과 다른 리포트를 다시 판정.
+
+    Args:
+        countries: 대상 국가 (None이면 전체)
+        batch_size: 한 번에 읽고 커밋하는 행 수
+        workers: 프로세스 수 (None이면 CPU 수, 1 이하이면 현재 프로세스에서 실행)
+        limit: 최대 처리 행 수
+        dry_run: 기록 없이 변경될 행 수만 계산
+
+    Returns:
+        {"scanned", "changed", "unchanged", "skipped", "failed", "errors", "elapsed", "rows_per_sec"}
+    """
+    from src.api.db import SHARD_COUNT, get_connection
+
+    versions = current_versions()
+    version_sql, version_params = _version_case(versions)
+    where = [f"rules_version IS NOT {version_sql}", "rowid > ?"]
+    params: List[Any] = list(version_params)
+    if countries:
+        where.insert(0, f"upper(country) IN ({', '.join('?' for _ in countries)})")
+        params = [c.upper() for c in countries] + params
+
+    select_sql = f"""
+        SELECT rowid, id, created_at, user_id, country, ocr_engine, rules_version,
+               storage_format, payload, ocr_payload, {', '.join(PAYLOAD_FIELDS)}
+        FROM reports
+        WHERE {' AND '.join(where)}
+        ORDER BY rowid
+        LIMIT ?
+    """
+
+    stats: Dict[str, Any] = {
+        "scanned": 0, "changed": 0, "unchanged": 0, "skipped": 0, "failed": 0,
+        "errors": [], "elapsed": 0.0, "rows_per_sec": 0.0, "dry_run": dry_run,
+    }
+    start = time.monotonic()
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    pool = None
+    run_map = map
+    if workers > 1:
+        # 웹 서버 스레드에서 실행될 수 있으므로 fork 대신 spawn으로 워커 생성
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        run_map = pool.map
+
+    def _flush(batch) -> None:
+        shard, rows, docs, results = batch
+        results = [result for chunk in results for result in chunk]
+        with get_connection(shard=shard) as conn:
+            changed_ids = _write_batch(conn, rows, docs, results, versions, stats, dry_run)
+            conn.commit()
+        report_cache.invalidate(*changed_ids)
+        stats["scanned"] += len(rows)
+        stats["elapsed"] = round(time.monotonic() - start, 2)
+        stats["rows_per_sec"] = round(stats["scanned"] / stats["elapsed"], 1) if stats["elapsed"] else 0.0
+        if progress:
+            progress(stats)
+
+    try:
+        # 리포트 샤드를 차례로 rowid 순서로 읽는다 (읽기 위치 = (shard, last_rowid))
+        shard = 0
+        last_rowid = 0
+        read = 0
+        pending = None
+        while True:
+            rows: List[sqlite3.Row] = []
+            while shard < SHARD_COUNT and (limit is None or read < limit):
+                take = batch_size if limit is None else min(batch_size, limit - read)
+                with get_connection(shard=shard) as conn:
+                    rows = conn.execute(select_sql, params + [last_rowid, take]).fetchall()
+                    docs = {row["id"]: row_to_doc(conn, row) for row in rows}
+                if rows:
+                    break
+                shard, last_rowid = shard + 1, 0
+
+            submitted = None
+            if rows:
+                read += len(rows)
+                last_rowid = rows[-1]["rowid"]
+                tasks = [_task(row, docs[row["id"]]) for row in rows]
+                # map은 작업을 즉시 제출하므로, 이 배치가 판정되는 동안 이전 배치를 기록한다
+                # (작업 하나당 IPC 왕복이 생기지 않도록 워커마다 한 덩어리씩)
+                submitted = (shard, rows, docs, run_map(_check_many, _split(tasks, workers)))
+
+            if pending is not None:
+                _flush(pending)
+            if submitted is None:
+                break
+            if pool is None:
+                _flush(submitted)
+            else:
+                pending = submitted
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    stats["elapsed"] = round(time.monotonic() - start, 2)
+    return stats
+
+
+class ReevaluationJob:
+    """관리자 API용: 재평가를 백그라운드 스레드에서 한 번에 하나만 실행하고 진행 상황을 보관"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._status: Dict[str, Any] = {"state": "idle"}
+
+    def start(self, **kwargs: Any) -> bool:
+        """실행 중이 아니면 시작하고 True, 이미 실행 중이면 False"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._status = {"state": "running", "options": kwargs, "started_at": time.time()}
+            self._thread = threading.Thread(target=self._run, kwargs=kwargs, name="reevaluate", daemon=True)
+            self._thread.start()
+            return True
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return json.loads(json.dumps(self._status))
+
+    def _update(self, **values: Any) -> None:
+        with self._lock:
+            self._status.update(values)
+
+    def _run(self, **kwargs: Any) -> None:
+        try:
+            stats = reevaluate_reports(progress=lambda s: self._update(progress=dict(s)), **kwargs)
+            self._update(state="finished", progress=stats, finished_at=time.time())
+        except Exception as e:
+            self._update(state="failed", error=f"{type(e).__name__}: {e}", finished_at=time.time())
+
+
+job = ReevaluationJob()
+
+
+def _print_progress(stats: Dict[str, Any]) -> None:
+    print(
+        f"[reevaluate] {stats['scanned']:,}건 처리"
+        f" (변경 {stats['changed']:,}, 동일 {stats['unchanged']:,},"
+        f" 건너뜀 {stats['skipped']:,}, 실패 {stats['failed']:,})"
+        f" {stats['rows_per_sec']:,.1f} rows/s"
+        + (" [dry-run]" if stats["dry_run"] else "")
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="규칙 변경 후 저장된 리포트 재평가")
+    parser.add_argument("--country", action="append", help="대상 국가 (여러 번 지정 가능, 기본: 전체)")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본: CPU 수, 1: 단일 프로세스)")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--dry-run", action="store_true", help="기록 없이 변경될 리포트 수만 계산")
+    args = parser.parse_args(argv)
+
+    from src.api.db import init_db
+    init_db()
+
+    for country, version in sorted(current_versions().items()):
+        print(f"[reevaluate] {country or '(기타)'}: rules_version={version}")
+
+    stats = reevaluate_reports(
+        countries=args.country,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        limit=args.limit,
+        dry_run=args.dry_run,
+        progress=_print_progress,
+    )
+    _print_progress(stats)
+    for error in stats["errors"]:
+        print(f"[reevaluate] 실패: {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+비동기 DB 접근 계층 (FastAPI 핸들러용)
+
+db.py의 함수는 동기(sqlite3)라서 async 핸들러에서 직접 호출하면 디스크 I/O와 락 대기 동안
+이벤트 루프 전체가 멈춘다. ReportRepository는 같은 작업을 전용 DB 스레드 풀에서 실행하고 await한다.
+
+- 풀 크기(DB_POOL_SIZE, 기본 4)가 동시에 실행되는 DB 작업 수의 상한이다.
+  SQLite는 DB 파일마다 쓰기가 직렬화되므로 리포트 샤드 수(REPORT_SHARDS)보다 크게 늘려도 쓰기 이득은 없고,
+  넘치는 요청은 풀 큐에서 기다린다.
+- starlette 기본 스레드 풀과 분리되어 있어 PDF 렌더링/OCR 같은 다른 블로킹 작업과 경쟁하지 않는다.
+- write-behind(그룹 커밋) 모드의 save_report는 준비 단계만 풀에서 실행하고,
+  커밋 완료는 writer의 Future를 await한다. (커밋을 기다리는 동안 풀 스레드를 점유하지 않음)
+- 동기 함수(db.py)는 app.py/스크립트용으로 그대로 유지된다.
+"""
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, TypeVar
+
+from src.api import db, ownership
+
+T = TypeVar("T")
+
+
+class ReportRepository:
+    """db.py 작업의 async 버전 (인자/반환값은 동기 함수와 같다)"""
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max(1, max_workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="db")
+        return self._executor
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """동기 DB 함수를 DB 스레드 풀에서 실행"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool(), functools.partial(fn, *args, **kwargs))
+
+    def close(self) -> None:
+        """실행 중인 작업이 끝날 때까지 기다린 뒤 풀 종료 (앱 종료 시 호출)"""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    # -------------------------------------------------------------------------
+    # 리포트
+    # -------------------------------------------------------------------------
+
+    async def save_report(self, **kwargs: Any) -> str:
+        """db.save_report와 같은 키워드 인자"""
+        pending = await self.run(db.prepare_report, **kwargs)
+        writer = db.get_report_writer(pending["shard"])
+        if writer is not None:
+            await asyncio.wrap_future(writer.submit(pending))
+        else:
+            await self.run(db.write_reports, [pending])
+        return pending["id"]
+
+    async def get_report(
+        self,
+        report_id: str,
+        user_id: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        return await self.run(db.get_report, report_id, user_id, fields)
+
+    async def get_reports(self, **filters: Any) -> List[Dict[str, Any]]:
+        return await self.run(db.get_reports, **filters)
+
+    async def count_reports(self, **filters: Any) -> int:
+        return await self.run(db.count_reports, **filters)
+
+    async def search_reports(self, query: str, **options: Any) -> Dict[str, Any]:
+        return await self.run(db.search_reports, query, **options)
+
+    async def get_analytics(self, **options: Any) -> Dict[str, Any]:
+        return await self.run(db.get_analytics, **options)
+
+    async def delete_report(self, report_id: str) -> bool:
+        return await self.run(db.delete_report, report_id)
+
+    # -------------------------------------------------------------------------
+    # 사용자
+    # -------------------------------------------------------------------------
+
+    async def upsert_user_email(self, user_id: str, email: str) -> Dict[str, Any]:
+        return await self.run(db.upsert_user_email, user_id, email)
+
+    async def get_user_email(self, user_id: str) -> Optional[str]:
+        return await self.run(db.get_user_email, user_id)
+
+    async def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        return await self.run(db.get_user_by_email, email)
+
+    async def unlink_user_email(self, user_id: str) -> bool:
+        return await self.run(db.unlink_user_email, user_id)
+
+    async def migration_status(self, user_id: str) -> List[Dict[str, Any]]:
+        return await self.run(ownership.migration_status, user_id)
+
+
+repository = ReportRepository(int(os.getenv("DB_POOL_SIZE", "4")))
@@ -0,0 +1,507 @@
+"""
+리포트 보관(archive) 및 공간 회수
+
+오래된 리포트는 거의 다시 열리지 않지만 최근 리포트와 같은 reports 테이블/인덱스 페이지를 공유한다.
+REPORT_RETENTION_DAYS보다 오래된 리포트를 reports_archive 테이블로 옮기고, 비워진 페이지를
+incremental_vacuum으로 파일에서 돌려준다.
+
+- reports_archive: 메타데이터 컬럼 + 압축 payload BLOB만 저장. (SPLIT 포맷 행도 ocr_text를 합쳐 BLOB 포맷으로 저장)
+  payload는 공유 preset dictionary를 쓰는 zlib(storage.py의 b"D" 코덱)으로 다시 압축한다.
+  리포트 JSON은 서로 비슷해서 행 단위 압축보다 훨씬 작아지고, 이 차이가 회수되는 공간이 된다.
+  dictionary는 처음 보관하는 배치의 payload로 한 번 만들고 이후 계속 재사용한다.
+- 같은 DB 파일 안의 테이블이므로 이동(INSERT + DELETE)은 배치마다 한 트랜잭션으로 원자적이다.
+- 읽기는 투명하다: get_report/목록/개수/내보내기/검색 결과는 reports에 없으면 reports_archive를 본다.
+  전문 검색 인덱스와 통계 롤업은 그대로 유지된다. (보관은 삭제가 아님)
+- 재평가(reevaluate.py)는 reports 테이블만 대상으로 한다.
+- 공간 회수에는 auto_vacuum=INCREMENTAL이 필요하다. 새 DB는 생성 시 설정되고,
+  기존 DB는 `python -m src.api.retention run --convert` 로 한 번 VACUUM해서 전환한다.
+
+정리 작업은 리포트 샤드(src/api/sharding.py)마다 실행하고,
+결과(샤드별 보관 건수, 회수 바이트, 정리 전후 hot 테이블 조회 지연)를 샤드 0의 maintenance_runs에 기록한다.
+RETENTION_INTERVAL_HOURS를 지정하면 앱이 주기적으로 실행한다. (여러 워커 중 한 프로세스만 실행)
+
+    python -m src.api.retention run [--days 365] [--convert]
+    python -m src.api.retention status
+"""
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from src.api.storage import (
+    PAYLOAD_FIELDS,
+    STORAGE_FORMAT_BLOB,
+    build_dictionary,
+    compress_with_dictionary,
+    latest_dictionary,
+    row_to_raw,
+    save_details,
+    save_dictionary,
+)
+
+ARCHIVE_TABLE = "reports_archive"
+
+# reports_archive에 컬럼으로 남기는 필드 (나머지는 payload 안에 있음)
+ARCHIVE_COLUMNS = ("id", "created_at", "user_id", "country", "ocr_engine", "rules_version", "image_hash")
+
+DEFAULT_BATCH_SIZE = 500
+
+# 이 값 이상 남은 빈 페이지만 회수 (작은 빈 공간은 다음 INSERT가 재사용)
+VACUUM_MIN_FREE_PAGES = 64
+
+ProgressFn = Callable[[Dict[str, Any]], None]
+
+
+def retention_days() -> int:
+    """보관 기준 일수 (0이면 보관하지 않음)"""
+    return int(os.getenv("REPORT_RETENTION_DAYS", "365"))
+
+
+def interval_hours() -> float:
+    """정기 정리 주기 (0이면 앱에서 실행하지 않음)"""
+    return float(os.getenv("RETENTION_INTERVAL_HOURS", "0"))
+
+
+def init_retention_schema(conn: sqlite3.Connection) -> None:
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {ARCHIVE_TABLE} (
+            id TEXT PRIMARY KEY,
+            created_at TIMESTAMP,
+            user_id TEXT NOT NULL DEFAULT 'anonymous',
+            country TEXT NOT NULL,
+            ocr_engine TEXT NOT NULL,
+            rules_version TEXT DEFAULT NULL,
+            storage_format INTEGER NOT NULL DEFAULT {STORAGE_FORMAT_BLOB},
+            payload BLOB NOT NULL,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+    conn.execute(
+        f"CREATE INDEX IF NOT EXISTS idx_reports_archive_user_id ON {ARCHIVE_TABLE}(user_id, created_at);"
+    )
+    conn.execute(
+        f"CREATE INDEX IF NOT EXISTS idx_reports_archive_created_at ON {ARCHIVE_TABLE}(created_at);"
+    )
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS maintenance_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            started_at TIMESTAMP NOT NULL,
+            finished_at TIMESTAMP,
+            result TEXT
+        );
+    """)
+
+
+def archive_select_columns(columns: Sequence[str]) -> List[str]:
+    """
+    reports용 SELECT 컬럼 목록을 reports_archive에서 같은 모양으로 읽는 식으로 변환
+    (payload 필드/ocr_payload 컬럼은 NULL — 보관 행은 항상 BLOB 포맷이므로 db._row_to_dict가 payload에서 읽는다)
+    """
+    return [f"NULL AS {c}" if c in PAYLOAD_FIELDS or c == "ocr_payload" else c for c in columns]
+
+
+# =============================================================================
+# 보관
+# =============================================================================
+
+def _cutoff(days: int) -> str:
+    """created_at과 같은 형식(UTC)의 기준 시각"""
+    return (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def archive_reports(
+    conn: sqlite3.Connection,
+    days: int,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    progress: Optional[ProgressFn] = None
+) -> int:
+    """
+    created_at이 days일보다 오래된 리포트를 batch_size개씩 reports_archive로 이동 (배치마다 커밋)
+
+    Returns:
+        보관한 리포트 수
+    """
+    cutoff = _cutoff(days)
+    archived = 0
+    dictionary = latest_dictionary(conn)
+    select_sql = f"""
+        SELECT {', '.join(ARCHIVE_COLUMNS)}, storage_format, payload, ocr_payload, {', '.join(PAYLOAD_FIELDS)}
+        FROM reports
+        WHERE created_at < ?
+        ORDER BY created_at
+        LIMIT ?
+    """
+    while True:
+        conn.execute("BEGIN IMMEDIATE;")
+        try:
+            rows = conn.execute(select_sql, (cutoff, batch_size)).fetchall()
+            raws = []
+            for row in rows:
+                # BLOB/SPLIT 포맷의 details 참조는 이미 rule_details에 있다 (레거시 행만 details 행이 나온다)
+                raw, details_rows = row_to_raw(conn, row)
+                if details_rows:
+                    save_details(conn, details_rows)
+                raws.append(raw)
+
+            if dictionary is None and raws:
+                zdict = build_dictionary(raws)
+                dictionary = (save_dictionary(conn, zdict), zdict)
+
+            archive_rows = [
+                tuple(row[c] for c in ARCHIVE_COLUMNS) + (STORAGE_FORMAT_BLOB, compress_with_dictionary(raw, *dictionary))
+                for row, raw in zip(rows, raws)
+            ]
+
+            conn.executemany(
+                f"""
+                INSERT INTO {ARCHIVE_TABLE}
+                    ({', '.join(ARCHIVE_COLUMNS)}, storage_format, payload)
+                VALUES ({', '.join('?' * (len(ARCHIVE_COLUMNS) + 2))})
+                """,
+                archive_rows
+            )
+            conn.executemany("DELETE FROM reports WHERE id = ?", [(row["id"],) for row in rows])
+            conn.execute("COMMIT;")
+        except BaseException:
+            conn.execute("ROLLBACK;")
+            raise
+
+        archived += len(rows)
+        if progress and rows:
+            progress({"archived": archived, "cutoff": cutoff})
+        if len(rows) < batch_size:
+            return archived
+
+
+# =============================================================================
+# 공간 회수 / 측정
+# =============================================================================
+
+def _pragma(conn: sqlite3.Connection, name: str) -> int:
+    return conn.execute(f"PRAGMA {name};").fetchone()[0]
+
+
+def _table_bytes(conn: sqlite3.Connection, table: str) -> Optional[int]:
+    """테이블 + 인덱스가 차지하는 바이트 (dbstat 가상 테이블이 없는 SQLite 빌드면 None)"""
+    try:
+        row = conn.execute(
+            """
+            SELECT SUM(pgsize) FROM dbstat
+            WHERE name IN (SELECT name FROM sqlite_master WHERE tbl_name = ?)
+            """,
+            (table,)
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] or 0
+
+
+def file_stats(conn: sqlite3.Connection) -> Dict[str, Optional[int]]:
+    page_size = _pragma(conn, "page_size")
+    page_count = _pragma(conn, "page_count")
+    freelist = _pragma(conn, "freelist_count")
+    return {
+        "auto_vacuum": _pragma(conn, "auto_vacuum"),
+        "page_size": page_size,
+        "file_bytes": page_count * page_size,
+        "free_bytes": freelist * page_size,
+        "hot_rows": conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0],
+        "hot_bytes": _table_bytes(conn, "reports"),
+        "archived_rows": conn.execute(f"SELECT COUNT(*) FROM {ARCHIVE_TABLE}").fetchone()[0],
+        "archive_bytes": _table_bytes(conn, ARCHIVE_TABLE),
+    }
+
+
+def reclaim_space(conn: sqlite3.Connection, convert: bool = False) -> Dict[str, Any]:
+    """
+    빈 페이지를 파일에서 회수
+    - auto_vacuum=INCREMENTAL이면 incremental_vacuum (빈 페이지만 옮기므로 짧다)
+    - 아니면 convert=True일 때만 auto_vacuum을 INCREMENTAL로 바꾸고 전체 VACUUM (DB 전체를 다시 씀)
+    """
+    mode = _pragma(conn, "auto_vacuum")
+    before = _pragma(conn, "page_count")
+    free = _pragma(conn, "freelist_count")
+    method = None
+
+    if mode == 2:
+        if free >= VACUUM_MIN_FREE_PAGES:
+            # execute()는 한 스텝(페이지 1개)만 진행하므로 executescript로 끝까지 실행
+            conn.executescript("PRAGMA incremental_vacuum;")
+            method = "incremental_vacuum"
+    elif convert:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL;")
+        conn.execute("VACUUM;")
+        method = "vacuum"
+
+    page_size = _pragma(conn, "page_size")
+    return {
+        "method": method,
+        "auto_vacuum": _pragma(conn, "auto_vacuum"),
+        "bytes_reclaimed": (before - _pragma(conn, "page_count")) * page_size,
+        "free_bytes": _pragma(conn, "freelist_count") * page_size,
+    }
+
+
+def _timed(conn: sqlite3.Connection, sql: str, params: Sequence[Any], repeat: int) -> float:
+    """중앙값(ms)"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        samples.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(samples), 3)
+
+
+def measure_hot_latency(conn: sqlite3.Connection, repeat: int = 15) -> Dict[str, float]:
+    """
+    hot 테이블 대표 조회의 지연(ms, 중앙값)
+    - recent_list: 히스토리 첫 페이지
+    - user_list: 최근 리포트 소유자의 목록
+    - country_count: 인덱스 없는 조건의 개수 (테이블 크기에 비례)
+    - point_lookup: 최근 리포트 payload 단건 조회
+    """
+    latest = conn.execute("SELECT id, user_id, country FROM reports ORDER BY created_at DESC LIMIT 1").fetchone()
+    if latest is None:
+        return {}
+    return {
+        "recent_list": _timed(
+            conn, "SELECT id, created_at, country, ocr_engine FROM reports ORDER BY created_at DESC LIMIT 20", (), repeat
+        ),
+        "user_list": _timed(
+            conn,
+            "SELECT id, created_at, country, ocr_engine FROM reports WHERE user_id = ? ORDER BY created_at DESC LIMIT 20",
+            (latest["user_id"],),
+            repeat
+        ),
+        "country_count": _timed(conn, "SELECT COUNT(*) FROM reports WHERE country = ?", (latest["country"],), repeat),
+        "point_lookup": _timed(conn, "SELECT payload FROM reports WHERE id = ?", (latest["id"],), repeat),
+    }
+
+
+# =============================================================================
+# 정리 작업
+# =============================================================================
+
+def _maintain_shard(
+    conn: sqlite3.Connection,
+    days: int,
+    batch_size: int,
+    convert: bool,
+    progress: Optional[ProgressFn]
+) -> Dict[str, Any]:
+    """리포트 샤드 하나의 보관 → 공간 회수 (보관 테이블/dictionary는 샤드마다 따로 있다)"""
+    before = file_stats(conn)
+    latency_before = measure_hot_latency(conn)
+    archived = archive_reports(conn, days, batch_size, progress) if days > 0 else 0
+    vacuum = reclaim_space(conn, convert)
+    after = file_stats(conn)
+    latency_after = measure_hot_latency(conn)
+    return {
+        "archived": archived,
+        "bytes_reclaimed": before["file_bytes"] - after["file_bytes"],
+        "vacuum": vacuum,
+        "before": before,
+        "after": after,
+        "latency_ms": {"before": latency_before, "after": latency_after},
+    }
+
+
+def run_maintenance(
+    days: Optional[int] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    convert: bool = False,
+    progress: Optional[ProgressFn] = None
+) -> Dict[str, Any]:
+    """
+    리포트 샤드마다 보관 → 공간 회수, 결과는 샤드 0의 maintenance_runs에 기록
+    (여러 프로세스가 동시에 호출해도 한 번에 하나만 실행)
+
+    Returns:
+        {"days", "archived", "bytes_reclaimed", "elapsed_sec",
+         "shards": [{"shard", "archived", "bytes_reclaimed", "vacuum", "before", "after", "latency_ms"}]}
+    """
+    from src.api.db import DB_PATH, SHARD_PATHS
+    from src.api.migrations import file_lock
+
+    days = retention_days() if days is None else days
+
+    with file_lock(DB_PATH + ".maintenance.lock"):
+        conn = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            started_at = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+            start = time.monotonic()
+            run_id = conn.execute(
+                "INSERT INTO maintenance_runs (started_at) VALUES (?)", (started_at,)
+            ).lastrowid
+
+            shards = [{"shard": 0, **_maintain_shard(conn, days, batch_size, convert, progress)}]
+            for shard, path in enumerate(SHARD_PATHS[1:], start=1):
+                shard_conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+                shard_conn.row_factory = sqlite3.Row
+                try:
+                    shards.append({"shard": shard, **_maintain_shard(shard_conn, days, batch_size, convert, progress)})
+                finally:
+                    shard_conn.close()
+
+            result = {
+                "days": days,
+                "archived": sum(s["archived"] for s in shards),
+                "bytes_reclaimed": sum(s["bytes_reclaimed"] for s in shards),
+                "shards": shards,
+                "elapsed_sec": round(time.monotonic() - start, 3),
+            }
+            conn.execute(
+                "UPDATE maintenance_runs SET finished_at = ?, result = ? WHERE id = ?",
+                (
+                    datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+                    json.dumps(result, ensure_ascii=False),
+                    run_id,
+                )
+            )
+            return result
+        finally:
+            conn.close()
+
+
+def recent_runs(limit: int = 10) -> List[Dict[str, Any]]:
+    from src.api.db import get_connection
+
+    with get_connection() as conn:
+        rows = conn.execute(
+            "SELECT id, started_at, finished_at, result FROM maintenance_runs ORDER BY id DESC LIMIT ?", (limit,)
+        ).fetchall()
+    return [
+        {**dict(row), "result": json.loads(row["result"]) if row["result"] else None}
+        for row in rows
+    ]
+
+
+def _last_finished_at(conn: sqlite3.Connection) -> Optional[datetime]:
+    row = conn.execute("SELECT MAX(finished_at) FROM maintenance_runs").fetchone()
+    if not row or not row[0]:
+        return None
+    return datetime.strptime(row[0], "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+
+
+class MaintenanceScheduler:
+    """
+    RETENTION_INTERVAL_HOURS마다 run_maintenance 실행 (데몬 스레드)
+    - 마지막 실행 시각을 DB에서 확인하므로 여러 워커가 떠 있어도 주기마다 한 번만 실행된다.
+    """
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._manual: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> bool:
+        if interval_hours() <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return False
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="retention", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run_now(self, days: Optional[int] = None) -> bool:
+        """관리자 API용: 즉시 한 번 실행 (이 프로세스에서 이미 실행 중이면 False)"""
+        with self._lock:
+            if self._manual is not None and self._manual.is_alive():
+                return False
+            self._manual = threading.Thread(target=self._run_once, args=(days,), name="retention-manual", daemon=True)
+            self._manual.start()
+            return True
+
+    def _run_once(self, days: Optional[int] = None) -> None:
+        try:
+            result = run_maintenance(days)
+            print(
+                f"[retention] 보관 {result['archived']:,}건,"
+                f" 회수 {result['bytes_reclaimed']:,} bytes ({result['elapsed_sec']}s)"
+            )
+        except Exception as e:
+            print(f"[retention] 정리 작업 실패: {type(e).__name__}: {e}")
+
+    def _due(self) -> bool:
+        from src.api.db import get_connection
+
+        with get_connection() as conn:
+            last = _last_finished_at(conn)
+        return last is None or datetime.now(timezone.utc) - last >= timedelta(hours=interval_hours())
+
+    def _loop(self) -> None:
+        # 기동 직후 부하를 피해 한 번 쉬고 시작 (이후 10분마다 실행 시점인지 확인)
+        while not self._stop.wait(min(600.0, interval_hours() * 3600)):
+            try:
+                due = self._due()
+            except Exception as e:
+                print(f"[retention] 실행 시점 확인 실패: {type(e).__name__}: {e}")
+                continue
+            if due:
+                self._run_once()
+
+
+scheduler = MaintenanceScheduler()
+
+
+def _print_progress(state: Dict[str, Any]) -> None:
+    print(f"[retention] {state['archived']:,}건 보관 (기준 {state['cutoff']} 이전)")
+
+
+def _print_result(result: Dict[str, Any]) -> None:
+    print(f"[retention] 보관: {result['archived']:,}건, 회수 {result['bytes_reclaimed']:,} bytes ({result['elapsed_sec']}s)")
+    for shard in result["shards"]:
+        before, after = shard["before"], shard["after"]
+        prefix = f"[retention] shard {shard['shard']}"
+        print(f"{prefix} 보관: {shard['archived']:,}건 (hot {before['hot_rows']:,} → {after['hot_rows']:,})")
+        print(
+            f"{prefix} 파일: {before['file_bytes']:,} → {after['file_bytes']:,} bytes"
+            f" (회수 {shard['bytes_reclaimed']:,}, 빈 공간 {after['free_bytes']:,})"
+        )
+        if after["hot_bytes"] is not None:
+            print(
+                f"{prefix} reports: {before['hot_bytes']:,} → {after['hot_bytes']:,} bytes,"
+                f" {ARCHIVE_TABLE}: {before['archive_bytes']:,} → {after['archive_bytes']:,} bytes"
+            )
+        if not shard["vacuum"]["method"] and after["auto_vacuum"] != 2:
+            print(f"{prefix} auto_vacuum이 INCREMENTAL이 아니어서 공간을 회수하지 않았습니다. (--convert로 전환)")
+        latency = shard["latency_ms"]
+        for name, value in latency["before"].items():
+            print(f"{prefix} {name}: {value} ms → {latency['after'].get(name)} ms")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="오래된 리포트 보관 + 공간 회수")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="보관/공간 회수 실행")
+    run.add_argument("--days", type=int, default=None, help="보관 기준 일수 (기본: REPORT_RETENTION_DAYS)")
+    run.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    run.add_argument("--convert", action="store_true", help="auto_vacuum=INCREMENTAL로 전환 (전체 VACUUM 1회)")
+    sub.add_parser("status", help="최근 정리 작업 결과 출력")
+    args = parser.parse_args(argv)
+
+    from src.api.db import init_db
+    init_db()
+
+    if args.command == "run":
+        _print_result(run_maintenance(args.days, args.batch_size, args.convert, _print_progress))
+    else:
+        for run_info in recent_runs():
+            result = run_info["result"] or {}
+            print(
+                f"#{run_info['id']} {run_info['started_at']} → {run_info['finished_at'] or '(실행 중/중단)'}:"
+                f" 보관 {result.get('archived', 0):,}건, 회수 {result.get('bytes_reclaimed', 0):,} bytes"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""
+리포트 전문 검색 (SQLite FTS5)
+
+인덱스 대상: ocr_text, 리스크 근거 문장(evidence.matched), 알레르겐(allergens + 리스크 allergen 이름)
+
+토크나이징:
+- FTS5 trigram 토크나이저는 3글자 미만 질의를 인덱스로 찾지 못해 "땅콩", "우유" 같은 2음절 한국어 검색에 쓸 수 없다.
+- 그래서 unicode61 토크나이저를 쓰되, 한글 연속 구간은 저장 전에 2-gram 토큰으로 바꾼다.
+  예) "땅콩버터" → "땅콩 콩버 버터"  (질의도 같은 방식으로 바꿔 phrase 검색)
+- 1음절 질의("밀")는 리포트에 등장한 한글 음절 집합(syllables 컬럼)에서 찾는다.
+- 영어는 unicode61 기본 규칙(대소문자/발음기호 무시)으로 토큰화된다.
+
+필터/행 식별:
+- user_id/country 필터는 facets 컬럼의 토큰("u<해시>", "c<국가>")으로 MATCH 안에서 처리한다.
+  (reports와 JOIN해서 거르면 넓은 검색어일수록 모든 매치 행을 조인하게 되어 느리다)
+- FTS rowid는 report_id(16진수)에서 결정적으로 계산하므로 삭제/갱신이 rowid 단건 연산이 된다.
+
+인덱스는 save_report / delete_report / 재평가 시 같은 트랜잭션에서 갱신된다. (db.py)
+"""
+import hashlib
+import html
+import re
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+FTS_TABLE = "reports_fts"
+
+# 리스크 allergen 값 중 실제 알레르겐이 아닌 항목
+_NON_ALLERGEN_RISKS = {"None", "PASS", "Unknown", "CROSS_CONTAMINATION"}
+
+_HANGUL_RUN = re.compile(r"[가-힣]+")
+_HANGUL_SYLLABLE = re.compile(r"[가-힣]")
+_QUERY_TERM = re.compile(r'"([^"]+)"|(\S+)')
+_HEX_ID = re.compile(r"[0-9a-f]{1,15}")
+
+SNIPPET_BEFORE = 30
+SNIPPET_AFTER = 70
+
+
+def create_fts_table(conn: sqlite3.Connection) -> None:
+    conn.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+            report_id UNINDEXED,
+            ocr_text,
+            evidence,
+            allergens,
+            syllables,
+            facets,
+            tokenize = 'unicode61 remove_diacritics 2'
+        );
+    """)
+
+
+def search_rowid(report_id: str) -> int:
+    """report_id → FTS rowid (16진수 ID는 그대로 정수로, 그 외는 해시 + 상위 비트로 구분)"""
+    if _HEX_ID.fullmatch(report_id):
+        return int(report_id, 16)
+    return int(hashlib.sha1(report_id.encode("utf-8")).hexdigest()[:15], 16) | (1 << 62)
+
+
+def user_facet(user_id: str) -> str:
+    return "u" + hashlib.sha1((user_id or "").encode("utf-8")).hexdigest()[:16]
+
+
+def country_facet(country: str) -> str:
+    return "c" + re.sub(r"[^0-9a-z]", "", (country or "").lower())
+
+
+def facets_text(user_id: str, country: str) -> str:
+    return f"{user_facet(user_id)} {country_facet(country)}"
+
+
+def _hangul_bigrams(match: "re.Match") -> str:
+    run = match.group(0)
+    if len(run) == 1:
+        return f" {run} "
+    return " " + " ".join(run[i:i + 2] for i in range(len(run) - 1)) + " "
+
+
+def to_search_text(text: Optional[str]) -> str:
+    """인덱스/질의 공통: 한글 연속 구간을 2-gram 토큰으로 변환"""
+    return _HANGUL_RUN.sub(_hangul_bigrams, text or "")
+
+
+def build_index_row(
+    report_id: str,
+    user_id: str,
+    country: str,
+    ocr_text: Optional[str],
+    risks: Optional[List[Dict[str, Any]]],
+    allergens: Optional[List[str]]
+) -> Tuple[int, str, str, str, str, str, str]:
+    """reports_fts에 넣을 (rowid, report_id, ocr_text, evidence, allergens, syllables, facets) 행 생성"""
+    evidence_text, allergen_text = index_texts(risks, allergens)
+    syllables = " ".join(sorted(set(_HANGUL_SYLLABLE.findall(
+        f"{ocr_text or ''}\n{evidence_text}\n{allergen_text}"
+    ))))
+
+    return (
+        search_rowid(report_id),
+        report_id,
+        to_search_text(ocr_text),
+        to_search_text(evidence_text),
+        to_search_text(allergen_text),
+        syllables,
+        facets_text(user_id, country),
+    )
+
+
+def index_texts(
+    risks: Optional[List[Dict[str, Any]]],
+    allergens: Optional[List[str]]
+) -> Tuple[str, str]:
+    """리스크/알레르겐에서 (근거 문장 텍스트, 알레르겐 텍스트) 추출"""
+    evidence_lines: List[str] = []
+    names: List[str] = list(allergens or [])
+    for risk in risks or []:
+        if not isinstance(risk, dict):
+            continue
+        evidence = risk.get("evidence") or {}
+        evidence_lines.extend(evidence.get("matched") or [])
+        name = risk.get("allergen")
+        if name and name not in _NON_ALLERGEN_RISKS:
+            names.append(name)
+
+    return "\n".join(evidence_lines), "\n".join(dict.fromkeys(names))
+
+
+def index_reports(conn: sqlite3.Connection, rows: Iterable[Tuple]) -> None:
+    """build_index_row 결과를 인덱스에 추가 (호출자가 commit)"""
+    conn.executemany(
+        f"""
+        INSERT INTO {FTS_TABLE} (rowid, report_id, ocr_text, evidence, allergens, syllables, facets)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+        rows
+    )
+
+
+def unindex_reports(conn: sqlite3.Connection, report_ids: Sequence[str]) -> None:
+    """리포트를 인덱스에서 제거 (호출자가 commit)"""
+    conn.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = ?", [(search_rowid(rid),) for rid in report_ids])
+
+
+def set_owner(conn: sqlite3.Connection, reports: Sequence[Tuple[str, str]], user_id: str) -> None:
+    """소유자가 바뀐 리포트의 facets 갱신 (reports: (report_id, country) 목록, 호출자가 commit)"""
+    conn.executemany(
+        f"UPDATE {FTS_TABLE} SET facets = ? WHERE rowid = ?",
+        [(facets_text(user_id, country), search_rowid(rid)) for rid, country in reports]
+    )
+
+
+def parse_query(query: str) -> List[str]:
+    """검색어를 용어 목록으로 분리 ("큰따옴표"로 묶은 구절은 하나의 용어)"""
+    terms = []
+    for phrase, word in _QUERY_TERM.findall(query or ""):
+        term = (phrase or word).strip()
+        if term:
+            terms.append(term)
+    return terms
+
+
+def build_match_query(terms: Sequence[str]) -> Optional[str]:
+    """
+    용어 목록을 FTS5 MATCH 식으로 변환 (모든 용어 AND)
+    - 1음절 한글 용어는 syllables 컬럼에서 검색
+    - 나머지는 2-gram 변환 후 phrase 검색 (마지막 토큰은 접두어 일치: peanut → peanuts)
+    """
+    clauses = []
+    for term in terms:
+        if _HANGUL_SYLLABLE.fullmatch(term):
+            clauses.append(f'syllables : "{term}"')
+            continue
+        tokens = to_search_text(term).split()
+        if not tokens:
+            continue
+        phrase = " ".join(tokens).replace('"', '""')
+        clauses.append(f'{{ocr_text evidence allergens}} : "{phrase}"*')
+    return " AND ".join(clauses) if clauses else None
+
+
+def with_filters(
+    match: str,
+    user_id: Optional[str] = None,
+    country: Optional[str] = None,
+    user_ids: Optional[Sequence[str]] = None
+) -> str:
+    """MATCH 식에 user_id/country facet 조건 추가 (user_ids: 소유권 이전 중인 ID까지 OR로 묶음)"""
+    owners = list(user_ids or ([user_id] if user_id else []))
+    if len(owners) == 1:
+        match += f' AND facets : "{user_facet(owners[0])}"'
+    elif owners:
+        match += " AND facets : (" + " OR ".join(f'"{user_facet(u)}"' for u in owners) + ")"
+    if country:
+        match += f' AND facets : "{country_facet(country)}"'
+    return match
+
+
+def make_snippet(text: str, terms: Sequence[str]) -> Optional[str]:
+    """
+    원문에서 첫 번째 검색어 위치 주변을 잘라 <mark>로 강조한 스니펫 생성 (HTML escape 처리)
+    검색어가 원문에 없으면 None
+    """
+    if not text:
+        return None
+    lower = text.lower()
+    needles = [t.lower() for t in terms if t]
+
+    first = min((p for p in (lower.find(n) for n in needles) if p >= 0), default=-1)
+    if first < 0:
+        return None
+
+    start = max(0, first - SNIPPET_BEFORE)
+    end = min(len(text), first + SNIPPET_AFTER)
+    window, window_lower = text[start:end], lower[start:end]
+
+    # 창 안의 모든 검색어 구간을 표시 (겹치면 병합)
+    spans = []
+    for n in needles:
+        pos = window_lower.find(n)
+        while pos >= 0:
+            spans.append((pos, pos + len(n)))
+            pos = window_lower.find(n, pos + 1)
+    spans.sort()
+    merged: List[List[int]] = []
+    for s, e in spans:
+        if merged and s <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], e)
+        else:
+            merged.append([s, e])
+
+    out, cursor = [], 0
+    for s, e in merged:
+        out.append(html.escape(window[cursor:s]))
+        out.append(f"<mark>{html.escape(window[s:e])}</mark>")
+        cursor = e
+    out.append(html.escape(window[cursor:]))
+
+    snippet = "".join(out).replace("\n", " ")
+    return ("…" if start > 0 else "") + snippet + ("…" if end < len(text) else "")
+
+
+def search_report_ids(
+    conn: sqlite3.Connection,
+    match: str,
+    limit: int = 20,
+    offset: int = 0
+) -> Tuple[List[Tuple[str, float]], int]:
+    """
+    MATCH 식으로 검색해 ([(report_id, score)] bm25 순 페이지, 전체 건수) 반환
+    컬럼 가중치: ocr_text 1.0, evidence 2.0, allergens 3.0, syllables 0.5
+    """
+    rows = conn.execute(f"""
+        SELECT report_id, bm25({FTS_TABLE}, 0.0, 1.0, 2.0, 3.0, 0.5, 0.0) AS score
+        FROM {FTS_TABLE}
+        WHERE {FTS_TABLE} MATCH ?
+        ORDER BY score
+        LIMIT ? OFFSET ?
+    """, (match, limit, offset)).fetchall()
+
+    total = conn.execute(
+        f"SELECT COUNT(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ?", (match,)
+    ).fetchone()[0]
+
+    return [(row[0], row[1]) for row in rows], total
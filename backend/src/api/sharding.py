@@ -0,0 +1,60 @@
+"""
+리포트 샤딩 (REPORT_SHARDS=N, 기본 1 = 샤딩 없음)
+
+SQLite는 DB 파일마다 writer가 하나라서, 분석 요청이 몰리면 모든 저장이 reports.db 하나에 줄을 선다.
+리포트를 report_id 해시로 N개의 SQLite 파일에 나눠 저장해 샤드끼리는 동시에 커밋되게 한다.
+
+- 샤드 0 = reports.db, 샤드 k = reports.shard{k}.db. 모든 샤드는 같은 스키마(마이그레이션을 샤드마다 실행)
+- 리포트와 그 검색 인덱스/통계 롤업/보관 행/rule_details는 같은 샤드에 있어 저장은 샤드 하나의 트랜잭션이다.
+- 사용자, 소유권 이전 작업, 정리 기록 같은 리포트 외 테이블은 샤드 0만 사용한다.
+- 단건 조회/삭제는 해시로 정해진 샤드부터 본다. 샤딩 도입 전 리포트(샤드 0)나 샤드 수를 바꾸기 전에
+  저장된 리포트는 다른 샤드에 있을 수 있으므로, 없을 때만 나머지 샤드를 확인한다. (리샤딩 없이 동작)
+- 목록/검색/내보내기는 샤드별로 정렬된 결과를 k-way merge(heapq.merge)로 합친다.
+
+월 단위 샤딩은 쓰지 않는다: report_id에 작성 시점 정보가 없어서 단건 조회를 샤드로 바로 보낼 수 없고,
+쓰기도 항상 "이번 달" 샤드 하나에 몰려 쓰기 분산 효과가 없다.
+"""
+import heapq
+import os
+import zlib
+from itertools import islice
+from typing import Callable, Iterable, List, TypeVar
+
+T = TypeVar("T")
+
+
+def shard_count() -> int:
+    return max(1, int(os.getenv("REPORT_SHARDS", "1")))
+
+
+def shard_paths(db_path: str, count: int) -> List[str]:
+    """샤드 번호 → DB 파일 경로 (샤드 0은 기존 reports.db)"""
+    base, ext = os.path.splitext(db_path)
+    return [db_path] + [f"{base}.shard{k}{ext}" for k in range(1, count)]
+
+
+def shard_for(report_id: str, count: int) -> int:
+    """report_id가 저장될 샤드 (프로세스/플랫폼과 무관하게 안정적인 crc32 사용)"""
+    if count <= 1:
+        return 0
+    return zlib.crc32(report_id.encode("utf-8")) % count
+
+
+def lookup_order(report_id: str, count: int) -> List[int]:
+    """단건 조회 시 확인할 샤드 순서 (해시 샤드 먼저)"""
+    owner = shard_for(report_id, count)
+    return [owner] + [k for k in range(count) if k != owner]
+
+
+def merge_page(
+    pages: Iterable[Iterable[T]],
+    key: Callable[[T], object],
+    offset: int,
+    limit: int,
+    reverse: bool = False
+) -> List[T]:
+    """
+    샤드별로 key 순 정렬된 결과(각각 offset + limit개 이상 또는 전부)를 합쳐 offset..offset+limit 구간 반환
+    """
+    merged = heapq.merge(*pages, key=key, reverse=reverse)
+    return list(islice(merged, offset, offset + limit))
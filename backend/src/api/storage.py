@@ -0,0 +1,500 @@
+"""
+리포트 페이로드 저장 포맷 (압축 단일 BLOB)
+
+storage_format 값:
+- 0 (레거시): ocr_text + JSON 텍스트 컬럼 7개(ensure_ascii=False)를 각각 저장
+- 2 (BLOB): ocr_text와 JSON 필드 전체를 하나의 JSON 문서로 묶어 압축한 뒤 payload 컬럼에 저장
+  (보관 테이블은 항상 이 포맷. 이전에 저장된 리포트도 그대로 읽는다)
+- 3 (SPLIT, 새 리포트 기본값): ocr_text만 ocr_payload 컬럼에 따로 압축하고, 나머지 JSON 필드를 payload에 저장
+  ocr_text가 가장 큰 필드라서, 목록/요약(fields=summary)/PDF처럼 ocr_text가 필요 없는 조회가
+  payload만 압축 해제하도록 나눈다. (BLOB 포맷은 필드 하나만 읽어도 ocr_text까지 모두 풀어야 한다)
+
+BLOB 구조: [코덱 1바이트][압축된 UTF-8 JSON] (ocr_payload는 [코덱 1바이트][압축된 UTF-8 텍스트])
+- b"S": zstd (zstandard 패키지가 설치된 경우 기본값)
+- b"Z": zlib (표준 라이브러리, 항상 사용 가능)
+- b"D": zlib + 공유 preset dictionary ([b"D"][dictionary id 4바이트][압축 데이터])
+  보관(archive) 테이블 전용. 리포트 JSON은 구조/규칙 문구가 거의 같아서 dictionary를 쓰면
+  행 단위 압축으로도 문서 간 중복을 줄일 수 있다. dictionary는 payload_dictionaries에 불변으로 저장.
+
+risks[].details 중복 제거:
+- 규칙 파일의 details(regulation/article/authority 등)는 같은 규칙이면 모든 리스크에 동일하게 복사된다.
+- 저장 시 details를 rule_details 테이블에 한 번만 저장하고, 리스크에는 {"$ref": "<rule_id>@<version>"}만 남긴다.
+- version은 details 내용의 해시이므로, 규칙 파일이 바뀌어도 기존 리포트는 당시의 details를 그대로 읽는다.
+
+레거시/BLOB 포맷 행은 읽기 시 투명하게 처리되며, SPLIT 포맷으로의 변환은 아래 마이그레이션 도구로 백그라운드 실행한다.
+
+    python -m src.api.storage stats
+    python -m src.api.storage migrate --batch-size 500
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import struct
+import time
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # 선택 의존성: 없으면 zlib만 사용
+    zstandard = None
+
+
+STORAGE_FORMAT_LEGACY = 0
+STORAGE_FORMAT_BLOB = 2
+STORAGE_FORMAT_SPLIT = 3
+
+# payload BLOB에 들어가는 필드 (레거시 포맷에서는 각각의 컬럼)
+PAYLOAD_FIELDS = (
+    "ocr_text", "allergens", "nutrition", "risks", "promo",
+    "summary", "input_data_status", "correction_guide", "regulatory_basis",
+)
+# SPLIT 포맷에서 ocr_payload 컬럼에 따로 저장하는 필드
+OCR_FIELD = "ocr_text"
+
+CODEC_ZLIB = b"Z"
+CODEC_ZSTD = b"S"
+CODEC_ZLIB_DICT = b"D"
+
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 10
+
+DETAILS_REF_KEY = "$ref"
+
+# zlib 윈도 크기 (preset dictionary는 마지막 32KB만 사용된다)
+DICTIONARY_SIZE = 32 * 1024
+
+# rule_details는 내용 해시로 주소가 정해지므로(불변) 프로세스 단위로 캐시해도 안전하다
+_details_cache: Dict[str, Dict[str, Any]] = {}
+_dictionary_cache: Dict[int, bytes] = {}
+
+
+def _default_codec() -> bytes:
+    """REPORT_STORAGE_CODEC 환경변수(zstd/zlib) 기준 코덱 선택"""
+    preferred = os.getenv("REPORT_STORAGE_CODEC", "zstd").lower()
+    if preferred == "zstd" and zstandard is not None:
+        return CODEC_ZSTD
+    return CODEC_ZLIB
+
+
+def compress(data: bytes, codec: Optional[bytes] = None) -> bytes:
+    """코덱 태그를 앞에 붙여 압축"""
+    codec = codec or _default_codec()
+    if codec == CODEC_ZSTD:
+        return CODEC_ZSTD + zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return CODEC_ZLIB + zlib.compress(data, ZLIB_LEVEL)
+
+
+def decompress(blob: bytes) -> bytes:
+    """코덱 태그를 보고 압축 해제"""
+    blob = bytes(blob)
+    codec, body = blob[:1], blob[1:]
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(body)
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstd로 압축된 리포트를 읽으려면 zstandard 패키지가 필요합니다. pip install zstandard")
+        return zstandard.ZstdDecompressor().decompress(body)
+    raise ValueError(f"알 수 없는 payload 코덱: {codec!r}")
+
+
+def _details_ref(rule_id: Optional[str], details: Dict[str, Any]) -> str:
+    """details 내용 해시를 버전으로 사용한 참조 키 생성"""
+    canonical = json.dumps(details, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    version = hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:12]
+    return f"{rule_id or 'details'}@{version}"
+
+
+def init_storage_schema(cursor: sqlite3.Cursor) -> None:
+    """rule_details 테이블 생성"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS rule_details (
+            ref TEXT PRIMARY KEY,
+            rule_id TEXT,
+            details TEXT NOT NULL
+        );
+    """)
+
+
+def init_dictionary_schema(conn: sqlite3.Connection) -> None:
+    """payload_dictionaries 테이블 생성 (b"D" 코덱용)"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS payload_dictionaries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            dictionary BLOB NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+
+
+def build_dictionary(samples: Iterable[bytes], size: int = DICTIONARY_SIZE) -> bytes:
+    """
+    압축 해제된 payload 샘플로 preset dictionary 생성
+    (샘플을 이어 붙인 마지막 size바이트. zlib은 dictionary 끝쪽 내용을 더 짧은 거리로 참조한다)
+    """
+    return b"".join(samples)[-size:]
+
+
+def save_dictionary(conn: sqlite3.Connection, dictionary: bytes) -> int:
+    """
+    dictionary 저장 후 id 반환 (호출자가 commit)
+    - id는 내용의 crc32: 리포트 샤드마다 payload_dictionaries가 따로 있어도
+      _dictionary_cache(프로세스 공용)에서 같은 id가 다른 dictionary를 가리키지 않는다.
+    """
+    dictionary_id = zlib.crc32(dictionary) or 1
+    conn.execute(
+        "INSERT OR IGNORE INTO payload_dictionaries (id, dictionary) VALUES (?, ?)", (dictionary_id, dictionary)
+    )
+    _dictionary_cache[dictionary_id] = dictionary
+    return dictionary_id
+
+
+def latest_dictionary(conn: sqlite3.Connection) -> Optional[Tuple[int, bytes]]:
+    row = conn.execute(
+        "SELECT id, dictionary FROM payload_dictionaries ORDER BY created_at DESC, id DESC LIMIT 1"
+    ).fetchone()
+    if row is None:
+        return None
+    _dictionary_cache[row[0]] = bytes(row[1])
+    return row[0], _dictionary_cache[row[0]]
+
+
+def compress_with_dictionary(data: bytes, dictionary_id: int, dictionary: bytes) -> bytes:
+    compressor = zlib.compressobj(9, zdict=dictionary)
+    return CODEC_ZLIB_DICT + struct.pack(">I", dictionary_id) + compressor.compress(data) + compressor.flush()
+
+
+def _load_dictionary(conn: sqlite3.Connection, dictionary_id: int) -> bytes:
+    dictionary = _dictionary_cache.get(dictionary_id)
+    if dictionary is None:
+        row = conn.execute("SELECT dictionary FROM payload_dictionaries WHERE id = ?", (dictionary_id,)).fetchone()
+        if row is None:
+            raise ValueError(f"payload dictionary {dictionary_id}가 없습니다.")
+        dictionary = _dictionary_cache[dictionary_id] = bytes(row[0])
+    return dictionary
+
+
+def decompress_payload(conn: sqlite3.Connection, blob: bytes) -> bytes:
+    """decompress + dictionary 코덱 처리 (dictionary는 DB에서 읽어 캐시)"""
+    blob = bytes(blob)
+    if blob[:1] != CODEC_ZLIB_DICT:
+        return decompress(blob)
+    (dictionary_id,) = struct.unpack(">I", blob[1:5])
+    decompressor = zlib.decompressobj(zdict=_load_dictionary(conn, dictionary_id))
+    return decompressor.decompress(blob[5:]) + decompressor.flush()
+
+
+def stored_value(value: Any) -> Any:
+    """
+    선택 필드(summary/input_data_status/correction_guide/regulatory_basis)를 저장하는 규칙: 빈 값([], {}, "")은 None
+    - 저장된 값과 새 판정 결과를 비교할 때(src/api/reevaluate.py)도 양쪽에 같은 규칙을 적용한다.
+    """
+    return value or None
+
+
+def serialize_payload(doc: Dict[str, Any]) -> Tuple[bytes, List[tuple]]:
+    """
+    payload 문서를 압축 전 UTF-8 JSON으로 직렬화 (DB 접근 없음).
+    risks[].details는 참조로 치환하고, rule_details에 저장할 (ref, rule_id, details) 행을 함께 반환한다.
+    """
+    risks = doc.get("risks") or []
+    packed_risks: List[Any] = []
+    referenced: Dict[str, tuple] = {}
+
+    for risk in risks:
+        details = risk.get("details") if isinstance(risk, dict) else None
+        if not details or not isinstance(details, dict):
+            packed_risks.append(risk)
+            continue
+
+        ref = _details_ref(risk.get("rule_id"), details)
+        referenced[ref] = (ref, risk.get("rule_id"), json.dumps(details, ensure_ascii=False))
+        packed_risks.append({**risk, "details": {DETAILS_REF_KEY: ref}})
+
+    packed = {k: v for k, v in doc.items() if k in PAYLOAD_FIELDS and v is not None}
+    if risks:
+        packed["risks"] = packed_risks
+
+    raw = json.dumps(packed, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return raw, list(referenced.values())
+
+
+def pack_payload(doc: Dict[str, Any]) -> Tuple[bytes, List[tuple]]:
+    """payload 문서를 압축 BLOB으로 변환 (DB 접근 없음, serialize_payload 참고)"""
+    raw, details_rows = serialize_payload(doc)
+    return compress(raw), details_rows
+
+
+def pack_report(doc: Dict[str, Any]) -> Tuple[bytes, Optional[bytes], List[tuple]]:
+    """
+    payload 문서를 SPLIT 포맷으로 변환 (DB 접근 없음)
+
+    Returns:
+        (payload: ocr_text를 뺀 압축 BLOB, ocr_payload: 압축된 ocr_text 또는 None, details 행)
+    """
+    payload, details_rows = pack_payload({k: v for k, v in doc.items() if k != OCR_FIELD})
+    ocr_text = doc.get(OCR_FIELD)
+    ocr_payload = compress(ocr_text.encode("utf-8")) if ocr_text is not None else None
+    return payload, ocr_payload, details_rows
+
+
+def save_details(conn: sqlite3.Connection, details_rows: Iterable[tuple]) -> None:
+    """
+    pack_payload가 반환한 details 행 저장 (호출자가 commit).
+    캐시 여부와 무관하게 INSERT OR IGNORE (롤백된 트랜잭션에서 캐시만 남는 경우 방지)
+    """
+    conn.executemany(
+        "INSERT OR IGNORE INTO rule_details (ref, rule_id, details) VALUES (?, ?, ?)",
+        details_rows
+    )
+
+
+def encode_payload(conn: sqlite3.Connection, doc: Dict[str, Any]) -> bytes:
+    """payload 문서를 압축 BLOB으로 인코딩하고 details를 저장 (호출자가 commit)"""
+    blob, details_rows = pack_payload(doc)
+    if details_rows:
+        save_details(conn, details_rows)
+    return blob
+
+
+def encode_report(conn: sqlite3.Connection, doc: Dict[str, Any]) -> Tuple[bytes, Optional[bytes]]:
+    """payload 문서를 SPLIT 포맷 (payload, ocr_payload)으로 인코딩하고 details를 저장 (호출자가 commit)"""
+    payload, ocr_payload, details_rows = pack_report(doc)
+    if details_rows:
+        save_details(conn, details_rows)
+    return payload, ocr_payload
+
+
+def decode_ocr_text(blob: Optional[bytes]) -> Optional[str]:
+    """SPLIT 포맷의 ocr_payload → ocr_text"""
+    return decompress(blob).decode("utf-8") if blob is not None else None
+
+
+def decode_payload(conn: sqlite3.Connection, blob: bytes) -> Dict[str, Any]:
+    """압축 BLOB을 payload 문서로 디코딩하고 details 참조를 복원"""
+    doc = json.loads(decompress_payload(conn, blob).decode("utf-8"))
+
+    risks = doc.get("risks") or []
+    refs = {
+        r["details"][DETAILS_REF_KEY]
+        for r in risks
+        if isinstance(r, dict) and isinstance(r.get("details"), dict) and DETAILS_REF_KEY in r["details"]
+    }
+    if refs:
+        _load_details(conn, refs)
+        for r in risks:
+            details = r.get("details") if isinstance(r, dict) else None
+            if isinstance(details, dict) and DETAILS_REF_KEY in details:
+                r["details"] = dict(_details_cache.get(details[DETAILS_REF_KEY], {}))
+
+    return doc
+
+
+def _load_details(conn: sqlite3.Connection, refs: Iterable[str]) -> None:
+    """캐시에 없는 details 참조를 한 번의 쿼리로 로드"""
+    missing = [ref for ref in refs if ref not in _details_cache]
+    if not missing:
+        return
+    placeholders = ", ".join("?" for _ in missing)
+    rows = conn.execute(
+        f"SELECT ref, details FROM rule_details WHERE ref IN ({placeholders})", missing
+    ).fetchall()
+    for row in rows:
+        _details_cache[row[0]] = json.loads(row[1])
+
+
+def legacy_row_to_doc(row: sqlite3.Row) -> Dict[str, Any]:
+    """레거시 포맷 행의 컬럼들을 payload 문서로 변환"""
+    doc: Dict[str, Any] = {"ocr_text": row["ocr_text"]}
+    for field in PAYLOAD_FIELDS[1:]:
+        value = row[field]
+        doc[field] = json.loads(value) if value else None
+    return doc
+
+
+def row_to_doc(conn: sqlite3.Connection, row: sqlite3.Row) -> Dict[str, Any]:
+    """
+    저장 포맷과 무관하게 행의 payload 문서 반환
+    (storage_format, payload, ocr_payload, PAYLOAD_FIELDS 컬럼 필요)
+    """
+    if row["storage_format"] == STORAGE_FORMAT_SPLIT:
+        return {OCR_FIELD: decode_ocr_text(row["ocr_payload"]), **decode_payload(conn, row["payload"])}
+    if row["storage_format"] == STORAGE_FORMAT_BLOB:
+        return decode_payload(conn, row["payload"])
+    return legacy_row_to_doc(row)
+
+
+def row_to_raw(conn: sqlite3.Connection, row: sqlite3.Row) -> Tuple[bytes, List[tuple]]:
+    """
+    행의 payload 문서를 BLOB 포맷의 압축 전 JSON으로 (보관 테이블 저장용, row_to_doc과 같은 컬럼 필요)
+    - BLOB 포맷은 압축만 풀고, SPLIT 포맷은 ocr_text만 합친다. (details 참조는 이미 rule_details에 있다)
+    - 레거시 행은 직렬화하면서 details 행을 함께 돌려준다.
+    """
+    if row["storage_format"] == STORAGE_FORMAT_BLOB:
+        return decompress_payload(conn, row["payload"]), []
+    if row["storage_format"] == STORAGE_FORMAT_SPLIT:
+        packed = json.loads(decompress_payload(conn, row["payload"]).decode("utf-8"))
+        ocr_text = decode_ocr_text(row["ocr_payload"])
+        if ocr_text is not None:
+            packed = {OCR_FIELD: ocr_text, **packed}
+        return json.dumps(packed, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), []
+    return serialize_payload(legacy_row_to_doc(row))
+
+
+def _stored_size(row: sqlite3.Row) -> int:
+    """변환 전 행의 payload 저장 바이트 수 (레거시 컬럼은 UTF-8 기준)"""
+    if row["storage_format"] == STORAGE_FORMAT_BLOB:
+        return len(row["payload"])
+    return sum(len((row[f] or "").encode("utf-8")) for f in PAYLOAD_FIELDS)
+
+
+# =============================================================================
+# 백그라운드 마이그레이션 도구
+# =============================================================================
+
+def migrate_legacy_rows(
+    batch_size: int = 500,
+    limit: Optional[int] = None,
+    dry_run: bool = False,
+    pause: float = 0.0
+) -> Dict[str, int]:
+    """
+    레거시/BLOB 포맷 리포트를 SPLIT 포맷으로 변환 (모든 리포트 샤드)
+    - batch_size 단위로 짧은 트랜잭션을 커밋하므로 서비스 중에도 실행 가능
+    - 중단 후 다시 실행하면 남은 행부터 이어서 처리
+
+    Returns:
+        {"rows": 변환 행 수, "bytes_before": ..., "bytes_after": ...}
+    """
+    from src.api.db import SHARD_COUNT, get_connection
+
+    stats = {"rows": 0, "bytes_before": 0, "bytes_after": 0}
+
+    for shard in range(SHARD_COUNT):
+        last_rowid = 0
+        while limit is None or stats["rows"] < limit:
+            take = batch_size if limit is None else min(batch_size, limit - stats["rows"])
+            with get_connection(shard=shard) as conn:
+                rows = conn.execute(
+                    f"""
+                    SELECT rowid, id, COALESCE(storage_format, 0) AS storage_format, payload,
+                           {', '.join(PAYLOAD_FIELDS)}
+                    FROM reports
+                    WHERE COALESCE(storage_format, 0) != ? AND rowid > ?
+                    ORDER BY rowid
+                    LIMIT ?
+                    """,
+                    (STORAGE_FORMAT_SPLIT, last_rowid, take)
+                ).fetchall()
+                if not rows:
+                    break
+
+                updates = []
+                for row in rows:
+                    payload, ocr_payload = encode_report(conn, row_to_doc(conn, row))
+                    stats["bytes_before"] += _stored_size(row)
+                    stats["bytes_after"] += len(payload) + len(ocr_payload or b"")
+                    updates.append((payload, ocr_payload, STORAGE_FORMAT_SPLIT, row["id"]))
+
+                if not dry_run:
+                    conn.executemany(
+                        f"""
+                        UPDATE reports
+                        SET payload = ?, ocr_payload = ?, storage_format = ?,
+                            {', '.join(f'{f} = NULL' for f in PAYLOAD_FIELDS)}
+                        WHERE id = ?
+                        """,
+                        updates
+                    )
+                    conn.commit()
+                else:
+                    conn.rollback()
+
+                stats["rows"] += len(rows)
+                last_rowid = rows[-1]["rowid"]
+
+            _print_progress(stats, dry_run)
+            if pause:
+                time.sleep(pause)
+
+    return stats
+
+
+def storage_stats() -> Dict[str, int]:
+    """포맷별 행 수와 저장 바이트 수 집계 (모든 리포트 샤드 합계)"""
+    from src.api.db import SHARD_COUNT, get_connection
+
+    stats = {
+        "legacy_rows": 0, "blob_rows": 0, "split_rows": 0, "legacy_bytes": 0, "blob_bytes": 0, "ocr_bytes": 0,
+        "rule_details_bytes": 0, "file_bytes": 0, "free_bytes": 0,
+    }
+    legacy_bytes = " + ".join(f"COALESCE(LENGTH(CAST({f} AS BLOB)), 0)" for f in PAYLOAD_FIELDS)
+    for shard in range(SHARD_COUNT):
+        with get_connection(shard=shard) as conn:
+            row = conn.execute(f"""
+                SELECT
+                    SUM(CASE WHEN COALESCE(storage_format, 0) = 0 THEN 1 ELSE 0 END) AS legacy_rows,
+                    SUM(CASE WHEN storage_format = 2 THEN 1 ELSE 0 END) AS blob_rows,
+                    SUM(CASE WHEN storage_format = 3 THEN 1 ELSE 0 END) AS split_rows,
+                    SUM({legacy_bytes}) AS legacy_bytes,
+                    SUM(COALESCE(LENGTH(payload), 0)) AS blob_bytes,
+                    SUM(COALESCE(LENGTH(ocr_payload), 0)) AS ocr_bytes
+                FROM reports
+            """).fetchone()
+            details_bytes = conn.execute(
+                "SELECT COALESCE(SUM(LENGTH(CAST(details AS BLOB))), 0) FROM rule_details"
+            ).fetchone()[0]
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+            page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+            freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+        stats["legacy_rows"] += row["legacy_rows"] or 0
+        stats["blob_rows"] += row["blob_rows"] or 0
+        stats["split_rows"] += row["split_rows"] or 0
+        stats["legacy_bytes"] += row["legacy_bytes"] or 0
+        stats["blob_bytes"] += row["blob_bytes"] or 0
+        stats["ocr_bytes"] += row["ocr_bytes"] or 0
+        stats["rule_details_bytes"] += details_bytes
+        stats["file_bytes"] += page_size * page_count
+        stats["free_bytes"] += page_size * freelist
+    return stats
+
+
+def _print_progress(stats: Dict[str, int], dry_run: bool) -> None:
+    before, after = stats["bytes_before"], stats["bytes_after"]
+    ratio = (1 - after / before) * 100 if before else 0.0
+    prefix = "[storage][dry-run]" if dry_run else "[storage]"
+    print(f"{prefix} {stats['rows']} rows: {before:,} → {after:,} bytes ({ratio:.1f}% 절감)")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="리포트 저장 포맷 마이그레이션 도구")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    migrate = sub.add_parser("migrate", help="레거시/BLOB 포맷 행을 SPLIT 포맷으로 변환")
+    migrate.add_argument("--batch-size", type=int, default=500)
+    migrate.add_argument("--limit", type=int, default=None)
+    migrate.add_argument("--pause", type=float, default=0.0, help="배치 사이 대기(초)")
+    migrate.add_argument("--dry-run", action="store_true", help="변환 없이 절감량만 계산")
+
+    sub.add_parser("stats", help="포맷별 행 수/용량 출력")
+
+    args = parser.parse_args(argv)
+
+    from src.api.db import init_db
+    init_db()
+
+    if args.command == "migrate":
+        stats = migrate_legacy_rows(args.batch_size, args.limit, args.dry_run, args.pause)
+        _print_progress(stats, args.dry_run)
+        if stats["rows"] and not args.dry_run:
+            print("[storage] 해제된 페이지는 VACUUM 이후 파일 크기에 반영됩니다.")
+    else:
+        for key, value in storage_stats().items():
+            print(f"{key}: {value:,}")
+
+
+if __name__ == "__main__":
+    main()
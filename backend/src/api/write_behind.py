@@ -0,0 +1,121 @@
+"""
+그룹 커밋(write-behind) 리포트 writer
+
+버스트성 업로드에서는 save_report마다 커밋(fsync)이 발생해 쓰기 처리량이 fsync에 묶인다.
+GroupCommitWriter는 여러 요청의 INSERT를 모아 작은 트랜잭션 하나로 커밋한다.
+- max_batch 행이 모이거나, 첫 행 도착 후 max_delay_ms가 지나면 커밋
+- 각 호출자는 자신의 행이 커밋(내구성 확보)된 뒤에만 반환된다
+- 배치 커밋이 실패하면 행 단위로 다시 커밋해, 실패한 행의 호출자에게만 예외가 전달된다
+
+환경변수:
+- REPORT_WRITE_BEHIND=1        그룹 커밋 사용 (기본: 사용 안 함)
+- REPORT_WRITE_BATCH_ROWS=64   트랜잭션당 최대 행 수
+- REPORT_WRITE_BATCH_MS=5      첫 행 이후 최대 대기 시간(ms)
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple
+
+
+def write_behind_enabled() -> bool:
+    return os.getenv("REPORT_WRITE_BEHIND", "0").lower() in ("1", "true", "yes")
+
+
+class GroupCommitWriter:
+    """write_fn(batch)를 전용 스레드에서 배치 단위로 호출하는 writer"""
+
+    def __init__(
+        self,
+        write_fn: Callable[[List[Any]], None],
+        max_batch: int = 64,
+        max_delay_ms: float = 5.0,
+        name: str = "report-writer"
+    ):
+        self._write_fn = write_fn
+        self._max_batch = max(1, max_batch)
+        self._max_delay = max(0.0, max_delay_ms) / 1000.0
+        self._queue: "queue.Queue[Optional[Tuple[Any, Future]]]" = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+        # 관측용 카운터
+        self.batches = 0
+        self.rows = 0
+
+    @classmethod
+    def from_env(cls, write_fn: Callable[[List[Any]], None], name: str = "report-writer") -> "GroupCommitWriter":
+        return cls(
+            write_fn,
+            max_batch=int(os.getenv("REPORT_WRITE_BATCH_ROWS", "64")),
+            max_delay_ms=float(os.getenv("REPORT_WRITE_BATCH_MS", "5")),
+            name=name,
+        )
+
+    def submit(self, item: Any) -> Future:
+        """행을 큐에 넣고, 커밋 완료 시 resolve되는 Future 반환"""
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("GroupCommitWriter is closed")
+            self._queue.put((item, future))
+        return future
+
+    def write(self, item: Any, timeout: Optional[float] = None) -> None:
+        """행을 제출하고 커밋될 때까지 대기"""
+        self.submit(item).result(timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """남은 행을 모두 커밋한 뒤 writer 스레드 종료"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+
+            batch = [first]
+            stop = False
+            deadline = time.monotonic() + self._max_delay
+            while len(batch) < self._max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is None:
+                    stop = True
+                    break
+                batch.append(entry)
+
+            self._flush(batch)
+            if stop:
+                return
+
+    def _flush(self, batch: List[Tuple[Any, Future]]) -> None:
+        items = [item for item, _ in batch]
+        try:
+            self._write_fn(items)
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            # 한 행의 실패(예: report_id 충돌)가 배치 전체를 실패시키지 않도록 행 단위로 재시도
+            for entry in batch:
+                self._flush([entry])
+            return
+
+        self.batches += 1
+        self.rows += len(items)
+        for _, future in batch:
+            future.set_result(None)
@@ -1,5 +1,7 @@
 import re
-from typing import List
+from typing import List, Union
+
+from src.rules.document import LabelDocument
 
 ALLERGEN_KEYWORDS = [
     "밀", "대두", "계란", "우유", "돼지고기", "쇠고기", "닭고기",
@@ -13,25 +15,25 @@ CONTEXT_PATTERNS = [
     r"같은\s*제조\s*시설",
 ]
 
+_CONTEXT_RE = re.compile("|".join(CONTEXT_PATTERNS))
+
 
-def extract_allergens(text: str) -> List[str]:
+def extract_allergens(text: Union[str, LabelDocument]) -> List[str]:
     """
-    OCR 텍스트에서 알레르기 키워드를 추출한다.
+    OCR 텍스트(또는 LabelDocument)에서 알레르기 키워드를 추출한다.
     "함유", "포함", "사용한 제품", "같은 제조 시설" 문맥 내에서만 탐지.
 
     Returns:
         중복 제거된 알레르기 리스트
     """
-    if not text:
+    doc = LabelDocument.of(text)
+    if not doc:
         return []
 
     found = set()
-    sentences = re.split(r'[.。\n]', text)
-
-    for sentence in sentences:
-        has_context = any(re.search(pattern, sentence) for pattern in CONTEXT_PATTERNS)
 
-        if has_context:
+    for sentence in doc.sentences:
+        if _CONTEXT_RE.search(sentence):
             for allergen in ALLERGEN_KEYWORDS:
                 if allergen in sentence:
                     found.add(allergen)
@@ -0,0 +1,159 @@
+# backend/src/rules/analyzer.py
+"""
+통합 라벨 분석 (라벨 검증 + 알레르기 추출 + 영양성분 + 규정 검사)
+
+api_analyze는 validate_label_image, extract_allergens, parse_nutrition, check_risks를 차례로 호출했고
+각 함수가 자기 키워드 목록/정규식으로 텍스트를 다시 훑었다.
+analyze_label은 네 분석기의 키워드(라벨 검증 키워드, 알레르기 키워드 + 문맥 표현, 국가 규칙 키워드)를
+매처 하나로 합쳐 소문자 텍스트를 한 번만 스캔하고, 매칭을 각 분석기로 나눠 준다.
+
+- 라벨 검증 키워드: 영어는 단어 경계, 한글은 부분 문자열 (validate_label_image와 같은 조건)
+- 규칙 매처(국가 키워드 + 알레르겐 이름 + 경고 마커): 줄 안의 매칭 위치를 그대로 check_risks에 넘긴다.
+- 알레르기 추출: 부분 문자열. 문맥 표현('사용한\\s*제품' 등)은 첫 단어로 찾은 뒤 그 위치에서 정규식 확인
+- 줄/문장 번호는 LabelDocument의 spans / sentence_breaks로 위치에서 바로 구한다.
+- 영양성분은 공백/쉼표를 뺀 텍스트(doc.compact)가 기준이라 위치를 공유할 수 없어 parse_nutrition의 한 번 스캔을 그대로 쓴다.
+- 소문자 변환이 위치를 바꾸는 텍스트('İ', 'Σ' 포함, LabelDocument.lower_aligned)는 분석기를 하나씩 호출한다.
+
+결과는 네 함수를 따로 호출한 것과 같다. (결과 비교: tests/test_analyzer.py, CPU 시간: scripts/bench_analyzer.py)
+"""
+import re
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, NamedTuple, Optional, Pattern, Set, Tuple, Union
+
+from src.rules.allergen_parser import ALLERGEN_KEYWORDS, CONTEXT_PATTERNS, extract_allergens
+from src.rules.checker import check_risks, rule_registry
+from src.rules.document import LabelDocument
+from src.rules.label_validator import LABEL_KEYWORDS, validate_label_image
+from src.rules.matcher import MultiKeywordMatcher, is_word_match
+from src.rules.nutrition_parser import parse_nutrition
+from src.rules.registry import RuleSet
+
+
+class LabelAnalysis(NamedTuple):
+    validation: Tuple[bool, str, dict]  # validate_label_image 결과
+    allergens: List[str]
+    nutrition: Dict[str, Any]
+    report_pack: Dict[str, Any]
+
+
+class _FusedScanner:
+    """규칙 세트 하나에 대한 통합 매처 + 키워드(통합 매처 id)별 용도"""
+
+    def __init__(self, rules: RuleSet):
+        self.rules = rules
+        validation_keywords = [kw for keywords in LABEL_KEYWORDS.values() for kw in keywords]
+        contexts = [(re.match(r"\w+", p).group(), re.compile(p)) for p in CONTEXT_PATTERNS]
+
+        self.matcher = MultiKeywordMatcher(
+            validation_keywords + list(rules.matcher.keywords) + ALLERGEN_KEYWORDS + [anchor for anchor, _ in contexts]
+        )
+        size = len(self.matcher)
+        # 통합 매처 id → LABEL_KEYWORDS 원본 / rules.matcher의 keyword_id / ALLERGEN_KEYWORDS 원본 / 문맥 정규식 (해당 없으면 None)
+        self.validation: List[Optional[str]] = [None] * size
+        self.rule: List[Optional[int]] = [None] * size
+        self.allergen: List[Optional[str]] = [None] * size
+        self.context: List[Optional[Pattern[str]]] = [None] * size
+        for kw in validation_keywords:
+            self.validation[self.matcher.id_of(kw)] = kw
+        for rule_id, kw in enumerate(rules.matcher.keywords):
+            self.rule[self.matcher.id_of(kw)] = rule_id
+        for kw in ALLERGEN_KEYWORDS:
+            self.allergen[self.matcher.id_of(kw)] = kw
+        for anchor, pattern in contexts:
+            self.context[self.matcher.id_of(anchor)] = pattern
+        # 영어 키워드는 단어 경계 조건 (라벨 검증 / 규칙 키워드 매칭 조건, 알레르기 추출은 부분 문자열)
+        self.bounded = [self.matcher.is_bounded(i) for i in range(size)]
+
+    def scan(self, doc: LabelDocument) -> Tuple[Set[str], List[Tuple[int, int, int, int, bool]], List[str]]:
+        """
+        소문자 텍스트 한 번 스캔
+        Returns:
+            (찾은 LABEL_KEYWORDS, 규칙 매처 매칭 (check_risks의 line_hits), extract_allergens 결과)
+        """
+        text = doc.lower
+        spans = doc.spans
+        starts = [start for start, _ in spans]
+        breaks = doc.sentence_breaks
+        validation, rule, allergen, context, bounded = self.validation, self.rule, self.allergen, self.context, self.bounded
+
+        validation_found: Set[str] = set()
+        rule_hits: List[Tuple[int, int, int, int, bool]] = []
+        allergen_hits: List[Tuple[int, str]] = []
+        context_sentences: Set[int] = set()
+
+        for kid, start, end in self.matcher.positions(text):
+            rule_id = rule[kid]
+            if validation[kid] is not None or rule_id is not None:
+                matched = not bounded[kid] or is_word_match(text, start, end)
+                if matched and validation[kid] is not None:
+                    validation_found.add(validation[kid])
+
+            # 규칙 매처(키워드/알레르겐 이름/경고 마커)는 근접 문맥 줄 하나 안의 매칭만 넘긴다.
+            # 마커 근접 판정은 교차오염 문맥을 뺀 텍스트 기준이라 check_risks가 한다.
+            if rule_id is not None:
+                line = bisect_right(starts, start) - 1
+                if line >= 0 and end <= spans[line][1]:
+                    line_start = starts[line]
+                    rule_hits.append((rule_id, line, start - line_start, end - line_start, matched))
+
+            # 알레르기 추출은 문장([.。\n]) 단위 부분 문자열: 매칭 구간 안에 문장 구분 문자가 없어야 한다
+            if allergen[kid] is not None or context[kid] is not None:
+                sentence = bisect_left(breaks, start)
+                if allergen[kid] is not None and bisect_left(breaks, end) == sentence:
+                    allergen_hits.append((sentence, allergen[kid]))
+                if context[kid] is not None:
+                    m = context[kid].match(text, start)
+                    if m and bisect_left(breaks, m.end()) == sentence:
+                        context_sentences.add(sentence)
+
+        allergens = list({kw for sentence, kw in allergen_hits if sentence in context_sentences})
+        return validation_found, rule_hits, allergens
+
+
+# 국가 → 스캐너 (규칙이 다시 로딩되면 RuleSet이 바뀌므로 새로 만든다)
+_scanners: Dict[str, _FusedScanner] = {}
+
+
+def _scanner_for(country: str, rules: RuleSet) -> _FusedScanner:
+    scanner = _scanners.get(country)
+    if scanner is None or scanner.rules is not rules:
+        scanner = _FusedScanner(rules)
+        _scanners[country] = scanner
+    return scanner
+
+
+def analyze_label(
+    text: Union[str, LabelDocument],
+    country: str = "US",
+    ocr_confidence: Optional[str] = None,
+    detected_language: Optional[str] = None
+) -> LabelAnalysis:
+    """
+    validate_label_image + extract_allergens + parse_nutrition + check_risks를 한 번에 수행
+    - check_risks의 nutrition_detected는 parse_nutrition 결과로 정한다. (api_analyze와 동일)
+    """
+    doc = LabelDocument.of(text)
+    country = (country or "US").upper()
+
+    if not doc.lower_aligned:
+        nutrition = parse_nutrition(doc)
+        return LabelAnalysis(
+            validation=validate_label_image(doc),
+            allergens=extract_allergens(doc),
+            nutrition=nutrition,
+            report_pack=check_risks(doc, country, ocr_confidence, detected_language, bool(nutrition)),
+        )
+
+    rules = rule_registry.get(country)
+    validation_found, rule_hits, allergens = _scanner_for(country, rules).scan(doc)
+    nutrition = parse_nutrition(doc)
+    report_pack = check_risks(
+        doc, country, ocr_confidence, detected_language, bool(nutrition),
+        rules=rules, line_hits=rule_hits,
+    )
+    return LabelAnalysis(
+        validation=validate_label_image(doc, found_keywords=validation_found),
+        allergens=allergens,
+        nutrition=nutrition,
+        report_pack=report_pack,
+    )
@@ -0,0 +1,264 @@
+# backend/src/rules/artifact.py
+"""
+컴파일된 규칙 아티팩트 (배포/규칙 변경 시 한 번 빌드, 워커 프로세스는 mmap으로 읽기 전용 공유)
+
+uvicorn 워커마다 규칙 JSON을 파싱하고 키워드 정규화 / 접두어 표 / trie 정규식을 다시 만들던 것을
+빌드 단계에서 한 번 계산해 바이너리 파일 하나로 저장한다. RuleRegistry는 규칙 파일 내용의 버전이
+아티팩트와 같으면 JSON 대신 아티팩트에서 RuleSet을 만든다.
+
+파일 구조 (숫자 표는 빌드한 머신의 바이트 순서, 4바이트 부호 없는 정수):
+  [MAGIC 8바이트][FORMAT u32][헤더 길이 u32][헤더 JSON]
+  헤더 JSON: checker_version, byteorder, markers, countries: {국가: {version, offset, length}}
+  국가 섹션 (8바이트 정렬):
+    [u32 × 6: 키워드 수, 접두어 id 수, 정규식 길이, 키워드 blob 길이, 메타 JSON 길이, 예약]
+    [u32 키워드 blob 오프셋 (n+1)][u32 키워드 길이 (n)][u32 접두어 시작 (n+1)][u32 접두어 id]
+    [u8 단어 경계 여부 (n, 4바이트 정렬)][정규식 UTF-8][키워드 blob UTF-8]
+    [메타 JSON UTF-8: data(규칙 파일 내용), allergens([keyword_ids, name_id, [[파생 원재료 id, 사슬], ...]]), marker_ids]
+
+- 숫자 표는 mmap 위의 memoryview를 그대로 매처에 넘긴다. (페이지 캐시를 워커끼리 공유)
+- 정규식 객체는 프로세스마다 컴파일한다. (re 객체는 공유/직렬화할 수 없다)
+- 섹션 version(= rules_version)이 현재 규칙 파일(+ 원재료 온톨로지)과 다르거나 FORMAT / 바이트 순서 / checker_version / markers가
+  다르면 아티팩트를 쓰지 않고 JSON에서 컴파일한다. (규칙 파일을 고친 뒤 다시 빌드하기 전까지)
+- 빌드는 임시 파일에 쓴 뒤 os.replace로 교체한다. 이미 mmap한 워커는 이전 파일을 그대로 읽는다.
+
+    python -m src.rules.artifact                    # 기본 경로(RULES_ARTIFACT 또는 src/rules/rules.bin)에 빌드
+    python -m src.rules.artifact --out /tmp/rules.bin
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+from src.rules.matcher import MultiKeywordMatcher
+
+if TYPE_CHECKING:
+    from src.rules.registry import RuleSet
+
+ARTIFACT_MAGIC = b"KFRULES\x00"
+ARTIFACT_FORMAT = 2
+
+_PREAMBLE = struct.Struct("<8sII")  # magic, format, 헤더 길이
+_SECTION = struct.Struct("=6I")
+_ALIGN = 8
+
+
+def default_artifact_path() -> str:
+    return os.getenv("RULES_ARTIFACT") or os.path.join(os.path.dirname(__file__), "rules.bin")
+
+
+class ArtifactSection(NamedTuple):
+    """국가 하나의 컴파일 결과 (RuleRegistry가 RuleSet으로 조립)"""
+    data: Dict[str, Any]                               # 규칙 파일 내용
+    # major_allergens 순서, (keyword_ids, name_id, [(파생 원재료 id, 사슬)])
+    allergens: List[Tuple[List[Optional[int]], Optional[int], List[Tuple[int, List[str]]]]]
+    matcher: MultiKeywordMatcher
+    marker_ids: List[int]
+
+
+def _pad(buf: bytearray, align: int) -> None:
+    buf.extend(b"\x00" * (-len(buf) % align))
+
+
+def _u32(values: Sequence[int]) -> bytes:
+    return array("I", values).tobytes()
+
+
+def _encode_section(rules: "RuleSet") -> bytes:
+    from src.rules.registry import thaw
+
+    keywords, lengths, bounded, prefix_ptr, prefix_ids, pattern = rules.matcher.tables()
+    blob = bytearray()
+    blob_offsets = [0]
+    for kw in keywords:
+        blob += kw.encode("utf-8")
+        blob_offsets.append(len(blob))
+    pattern_bytes = pattern.encode("utf-8")
+    meta = json.dumps({
+        "data": thaw(rules.data),
+        "allergens": [
+            [list(a.keyword_ids), a.name_id, [[d.term_id, list(d.chain)] for d in a.derived]]
+            for a in rules.allergens
+        ],
+        "marker_ids": sorted(rules.marker_ids),
+    }, ensure_ascii=False).encode("utf-8")
+
+    out = bytearray(_SECTION.pack(len(keywords), len(prefix_ids), len(pattern_bytes), len(blob), len(meta), 0))
+    for table in (blob_offsets, lengths, prefix_ptr, prefix_ids):
+        out += _u32(table)
+    out += bytes(bounded)
+    _pad(out, 4)
+    out += pattern_bytes + blob + meta
+    return bytes(out)
+
+
+def _decode_section(view: memoryview) -> ArtifactSection:
+    n, n_prefix_ids, pattern_len, blob_len, meta_len, _ = _SECTION.unpack_from(view, 0)
+    pos = _SECTION.size
+
+    def take(count: int, fmt: str, size: int) -> memoryview:
+        nonlocal pos
+        table = view[pos:pos + count * size].cast(fmt)
+        pos += count * size
+        return table
+
+    blob_offsets = take(n + 1, "I", 4)
+    lengths = take(n, "I", 4)
+    prefix_ptr = take(n + 1, "I", 4)
+    prefix_ids = take(n_prefix_ids, "I", 4)
+    bounded = take(n, "B", 1)
+    pos += -pos % 4
+    pattern = str(view[pos:pos + pattern_len], "utf-8")
+    pos += pattern_len
+    blob = bytes(view[pos:pos + blob_len])
+    pos += blob_len
+    meta = json.loads(str(view[pos:pos + meta_len], "utf-8"))
+
+    keywords = [blob[blob_offsets[i]:blob_offsets[i + 1]].decode("utf-8") for i in range(n)]
+    matcher = MultiKeywordMatcher.from_tables(keywords, lengths, bounded, prefix_ptr, prefix_ids, pattern)
+    allergens = [
+        (keyword_ids, name_id, [(term_id, chain) for term_id, chain in derived])
+        for keyword_ids, name_id, derived in meta["allergens"]
+    ]
+    return ArtifactSection(meta["data"], allergens, matcher, meta["marker_ids"])
+
+
+def write_artifact(
+    path: str,
+    rule_sets: Mapping[str, "RuleSet"],
+    checker_version: str,
+    markers: Sequence[str]
+) -> Dict[str, Any]:
+    """국가 → RuleSet을 아티팩트 파일로 저장 (임시 파일에 쓴 뒤 교체). 헤더 반환"""
+    if array("I").itemsize != 4:
+        raise RuntimeError("4바이트 unsigned int 배열을 지원하지 않는 플랫폼입니다.")
+
+    sections = {country: _encode_section(rules) for country, rules in rule_sets.items() if rules}
+    header: Dict[str, Any] = {
+        "checker_version": checker_version,
+        "byteorder": sys.byteorder,
+        "markers": list(markers),
+        "countries": {},
+    }
+    # 섹션 오프셋은 헤더 길이에 따라 달라지므로, 오프셋 자리수가 바뀌지 않을 때까지 다시 계산한다
+    header_bytes = b""
+    for _ in range(4):
+        offset = _PREAMBLE.size + len(header_bytes)
+        offset += -offset % _ALIGN
+        for country, section in sections.items():
+            header["countries"][country] = {
+                "version": rule_sets[country].version, "offset": offset, "length": len(section),
+            }
+            offset += len(section)
+            offset += -offset % _ALIGN
+        encoded = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        if encoded == header_bytes:
+            break
+        header_bytes = encoded
+
+    out = bytearray(_PREAMBLE.pack(ARTIFACT_MAGIC, ARTIFACT_FORMAT, len(header_bytes)))
+    out += header_bytes
+    for section in sections.values():
+        _pad(out, _ALIGN)
+        out += section
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(out)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return header
+
+
+class RuleArtifact:
+    """
+    아티팩트 파일 읽기 (mmap, 읽기 전용). 파일이 교체되면((mtime, 크기) 변경) 다시 연다.
+    파일이 없거나 형식이 맞지 않으면 section()이 None을 반환한다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._header: Optional[Dict[str, Any]] = None
+        self._view: Optional[memoryview] = None
+
+    def section(
+        self,
+        country: str,
+        version: str,
+        checker_version: str,
+        markers: Sequence[str]
+    ) -> Optional[ArtifactSection]:
+        header, view = self._open()
+        if header is None or view is None:
+            return None
+        if header.get("checker_version") != checker_version or header.get("markers") != list(markers):
+            return None
+        entry = header.get("countries", {}).get(country)
+        if not entry or entry.get("version") != version:
+            return None
+        return _decode_section(view[entry["offset"]:entry["offset"] + entry["length"]])
+
+    def _open(self) -> Tuple[Optional[Dict[str, Any]], Optional[memoryview]]:
+        try:
+            st = os.stat(self.path)
+            stamp: Optional[Tuple[int, int]] = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stamp = None
+        with self._lock:
+            if stamp != self._stamp:
+                # 이전 mmap은 닫지 않는다. 그 위의 memoryview를 쓰는 RuleSet이 남아 있을 수 있다. (참조가 없어지면 해제)
+                self._stamp = stamp
+                self._header, self._view = self._load() if stamp else (None, None)
+            return self._header, self._view
+
+    def _load(self) -> Tuple[Optional[Dict[str, Any]], Optional[memoryview]]:
+        try:
+            with open(self.path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None, None
+        view = memoryview(mm)
+        if len(view) < _PREAMBLE.size:
+            return None, None
+        magic, fmt, header_len = _PREAMBLE.unpack_from(view, 0)
+        if magic != ARTIFACT_MAGIC or fmt != ARTIFACT_FORMAT:
+            return None, None
+        try:
+            header = json.loads(str(view[_PREAMBLE.size:_PREAMBLE.size + header_len], "utf-8"))
+        except ValueError:
+            return None, None
+        if header.get("byteorder") != sys.byteorder:
+            return None, None
+        return header, view
+
+
+def main() -> None:
+    from src.rules.checker import CHECKER_VERSION, ONTOLOGY_PATH, RULE_FILES, RULES_DIR, WARNING_MARKERS
+    from src.rules.registry import RuleRegistry
+
+    parser = argparse.ArgumentParser(description="규칙 JSON → 컴파일된 규칙 아티팩트 빌드")
+    parser.add_argument("--out", default=default_artifact_path(), help="출력 경로 (기본: RULES_ARTIFACT 또는 src/rules/rules.bin)")
+    args = parser.parse_args()
+
+    # 기존 아티팩트를 거치지 않고 규칙 파일에서 바로 컴파일 (rule_description은 런타임에 만든다)
+    registry = RuleRegistry(
+        RULE_FILES, RULES_DIR, CHECKER_VERSION, lambda country, name: "",
+        markers=WARNING_MARKERS, ontology_path=ONTOLOGY_PATH,
+    )
+    rule_sets = {country: registry.get(country) for country in RULE_FILES}
+    header = write_artifact(args.out, rule_sets, CHECKER_VERSION, WARNING_MARKERS)
+    print(f"{args.out} ({os.path.getsize(args.out)} bytes)")
+    for country, entry in header["countries"].items():
+        print(f"  {country}: {entry['version']} ({entry['length']} bytes)")
+
+
+if __name__ == "__main__":
+    main()
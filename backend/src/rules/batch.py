@@ -0,0 +1,222 @@
+# backend/src/rules/batch.py
+"""
+대량 규정 검사 (저장된 리포트 재평가, 일괄 업로드 채점)
+
+check_risks는 텍스트마다 알레르겐을 하나씩 돌며 키워드 발견/경고 문구/확신도를 판정한다.
+check_risks_batch는 같은 국가의 텍스트를 묶어, 매처 스캔 결과로 희소 행렬을 만들고 판정을 한 번에 계산한다.
+
+- K: 문서 × 키워드 (교차오염 문맥을 뺀 텍스트에서 키워드 매칭, 영어는 단어 경계 조건)
+- A: 키워드 × 알레르겐 (CompiledAllergen.keyword_ids + 파생 원재료 derived), N: 알레르겐 이름 × 알레르겐 (name_id)
+- W: 문서 × 용어 (용어 출현 중 하나라도 경고 마커 window 안에 있는지. 모든 문서의 마커 위치를 이어 붙여 searchsorted 한 번)
+- L: (문서, 줄) × 키워드 → L·A로 알레르겐별 근거 줄, 같은 문장은 한 번만 세서 확신도
+- 발견 = K·A > 0, 경고 = (W∘K)·A + W·N > 0, HIGH = 발견 & ~경고 & 확신도 >= 0.4
+- OCR 오인식 유사 표기(checker.find_fuzzy_allergens)는 문서마다 따로 찾는다. (유사 표기가 있는 문서만 다시 스캔)
+
+근거 문장/리포트 조립은 check_risks(findings=...)가 그대로 하므로 결과는 텍스트마다 check_risks를 호출한 것과 같다.
+저장된 리포트 재평가(src/api/reevaluate.py)가 워커마다 배치 한 덩어리씩 이 함수로 판정한다.
+numpy / scipy가 없거나 국가별 묶음이 작으면(MIN_VECTORIZED_GROUP) 텍스트마다 check_risks를 호출한다.
+(결과 비교: tests/test_batch.py, 처리량: scripts/bench_batch.py)
+"""
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Union
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # requirements.txt에 있지만, 없는 환경에서는 텍스트마다 check_risks
+    np = None
+    sparse = None
+
+from src.rules.checker import (
+    WARNING_WINDOW, AllergenFinding, check_risks, derivation_chains, evidence_confidence, find_fuzzy_allergens,
+    rule_registry, scan_rule_hits
+)
+from src.rules.document import LabelDocument
+from src.rules.registry import RuleSet
+
+
+# 국가별 묶음이 이보다 작으면 행렬 구성 비용이 더 커서 텍스트마다 check_risks를 호출한다
+MIN_VECTORIZED_GROUP = 64
+# 한 번에 행렬로 만드는 최대 문서 수 (문서/매칭 목록을 모두 들고 있지 않도록 나눠 처리)
+CHUNK_SIZE = 2048
+
+
+class BatchItem(NamedTuple):
+    """check_risks 인자 하나 분량"""
+    text: Union[str, LabelDocument]
+    country: str = "US"
+    ocr_confidence: Optional[str] = None
+    detected_language: Optional[str] = None
+    nutrition_detected: Optional[bool] = None
+
+
+def vectorized_available() -> bool:
+    return np is not None and sparse is not None
+
+
+def check_risks_batch(items: Sequence[BatchItem]) -> List[Dict[str, Any]]:
+    """
+    여러 텍스트의 check_risks를 한 번에 수행 (입력 순서대로 결과 반환)
+    - items: BatchItem 또는 같은 순서의 튜플
+    """
+    items = [BatchItem(*item) for item in items]
+    if not vectorized_available():
+        return [check_risks(*item) for item in items]
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    groups: Dict[str, List[int]] = {}
+    for index, item in enumerate(items):
+        groups.setdefault((item.country or "US").upper(), []).append(index)
+
+    for country, indexes in groups.items():
+        if len(indexes) < MIN_VECTORIZED_GROUP:
+            for index in indexes:
+                results[index] = check_risks(*items[index])
+            continue
+        rules = rule_registry.get(country)
+        for chunk_start in range(0, len(indexes), CHUNK_SIZE):
+            chunk = indexes[chunk_start:chunk_start + CHUNK_SIZE]
+            docs = [LabelDocument.of(items[i].text) for i in chunk]
+            # 빈 텍스트 / 규칙 없음은 check_risks가 알레르겐 판정 없이 바로 반환한다
+            active = [k for k, doc in enumerate(docs) if rules and doc.text.strip()]
+            findings = _find_allergens_batch(rules, [docs[k] for k in active])
+            by_doc: Dict[int, List[AllergenFinding]] = dict(zip(active, findings))
+            for k, index in enumerate(chunk):
+                item = items[index]
+                results[index] = check_risks(
+                    docs[k], country, item.ocr_confidence, item.detected_language, item.nutrition_detected,
+                    rules=rules, findings=by_doc.get(k, []),
+                )
+    return results
+
+
+def _find_allergens_batch(rules: RuleSet, docs: Sequence[LabelDocument]) -> List[List[AllergenFinding]]:
+    """같은 규칙 세트로 판정할 문서들의 알레르겐 판정 (문서마다 checker._find_allergens와 같은 결과)"""
+    n_docs = len(docs)
+    n_terms = len(rules.matcher)
+    n_allergens = len(rules.allergens)
+    if not n_docs:
+        return []
+    if not n_terms or not n_allergens:
+        return [[] for _ in docs]
+
+    # 1) 문서마다 매처 스캔 (교차오염 문맥 제외) → 평평한 배열
+    #    위치는 문서마다 base를 더한 전역 위치: 문서 사이 간격을 window보다 크게 두어 다른 문서의 마커와 묶이지 않게 한다
+    hit_doc: List[int] = []
+    hit_term: List[int] = []
+    hit_start: List[int] = []
+    hit_end: List[int] = []
+    hit_line: List[int] = []
+    hit_matched: List[bool] = []
+    marker_positions: List[int] = []
+    marker_ids = rules.marker_ids
+    base = 0
+    for d, doc in enumerate(docs):
+        length, hits = scan_rule_hits(doc, rules)
+        marker_ends: Dict[int, int] = {}
+        for kid, start, end, line, matched in hits:
+            hit_doc.append(d)
+            hit_term.append(kid)
+            hit_start.append(base + start)
+            hit_end.append(base + end)
+            hit_line.append(line)
+            hit_matched.append(matched)
+            # 마커마다 re.finditer로 찾던 것과 같게 겹치는 출현은 건너뛴다 (순서 의존이라 여기서 처리)
+            if kid in marker_ids and start >= marker_ends.get(kid, 0):
+                marker_positions.append(base + start)
+                marker_ends[kid] = end
+        base += length + 2 * WARNING_WINDOW + 1
+
+    if not hit_doc:
+        return [[] for _ in docs]
+
+    docs_arr = np.asarray(hit_doc, dtype=np.int64)
+    terms_arr = np.asarray(hit_term, dtype=np.int64)
+    starts_arr = np.asarray(hit_start, dtype=np.int64)
+    ends_arr = np.asarray(hit_end, dtype=np.int64)
+    lines_arr = np.asarray(hit_line, dtype=np.int64)
+    matched_arr = np.asarray(hit_matched, dtype=bool)
+    markers = np.asarray(marker_positions, dtype=np.int64)
+
+    # 2) 규칙 행렬: 키워드 × 알레르겐, 이름 × 알레르겐
+    a_rows, a_cols, n_rows, n_cols = [], [], [], []
+    for g, allergen in enumerate(rules.allergens):
+        for kid in set(allergen.keyword_ids) | {d.term_id for d in allergen.derived}:
+            if kid is not None:
+                a_rows.append(kid)
+                a_cols.append(g)
+        if allergen.name_id is not None:
+            n_rows.append(allergen.name_id)
+            n_cols.append(g)
+    A = sparse.csr_matrix((np.ones(len(a_rows)), (a_rows, a_cols)), shape=(n_terms, n_allergens))
+    N = sparse.csr_matrix((np.ones(len(n_rows)), (n_rows, n_cols)), shape=(n_terms, n_allergens))
+
+    # 3) K: 문서 × 키워드 매칭, W: 문서 × 용어 경고 근접
+    #    출현 [s, e)가 마커 p의 window 안: e - window <= p <= s + window → e - window 이상인 첫 마커만 확인
+    shape = (n_docs, n_terms)
+    K = sparse.csr_matrix(
+        (np.ones(int(matched_arr.sum())), (docs_arr[matched_arr], terms_arr[matched_arr])), shape=shape
+    )
+    K.data[:] = 1.0
+    if not K.nnz:
+        return [[] for _ in docs]
+    if len(markers):
+        first = np.searchsorted(markers, ends_arr - WARNING_WINDOW, side="left")
+        near = first < len(markers)
+        near[near] = markers[first[near]] <= starts_arr[near] + WARNING_WINDOW
+    else:
+        near = np.zeros(len(docs_arr), dtype=bool)
+    W = sparse.csr_matrix((np.ones(int(near.sum())), (docs_arr[near], terms_arr[near])), shape=shape)
+    W.data[:] = 1.0
+
+    found = (K @ A).toarray() > 0
+    warned = ((W.multiply(K)) @ A + W @ N).toarray() > 0
+
+    # 4) 근거 줄: (문서, 줄) × 키워드 → × A, 같은 문장(줄 텍스트)은 한 번만 센다
+    stride = int(lines_arr.max()) + 1
+    line_keys, line_rows = np.unique(docs_arr[matched_arr] * stride + lines_arr[matched_arr], return_inverse=True)
+    L = sparse.csr_matrix(
+        (np.ones(len(line_rows)), (line_rows, terms_arr[matched_arr])), shape=(len(line_keys), n_terms)
+    )
+    evidence = (L @ A).tocoo()
+    row_doc = line_keys // stride
+    row_line = line_keys % stride
+    text_ids: Dict[str, int] = {}
+    row_text = np.asarray(
+        [text_ids.setdefault(docs[d].lines[i].strip(), len(text_ids)) for d, i in zip(row_doc.tolist(), row_line.tolist())],
+        dtype=np.int64,
+    )
+    ev_doc = row_doc[evidence.row]
+    ev_allergen = evidence.col.astype(np.int64)
+    pairs = np.unique(np.stack([ev_doc, ev_allergen, row_text[evidence.row]]), axis=1)
+    counts = np.zeros((n_docs, n_allergens), dtype=np.int64)
+    np.add.at(counts, (pairs[0], pairs[1]), 1)
+
+    table = np.asarray([evidence_confidence(n) for n in range(int(counts.max()) + 1)])
+    confidence = table[counts]
+    high = found & ~warned & (confidence >= 0.4)
+
+    # 5) 문서별 AllergenFinding (근거 문장/발견 키워드 목록은 리포트에 들어가는 값이라 원본 순서대로 만든다)
+    high_lines: Dict[tuple, List[int]] = {}
+    for d, g, r in zip(ev_doc.tolist(), ev_allergen.tolist(), evidence.row.tolist()):
+        if high[d, g]:
+            high_lines.setdefault((d, g), []).append(int(row_line[r]))
+
+    results: List[List[AllergenFinding]] = []
+    for d, doc in enumerate(docs):
+        row = K.indices[K.indptr[d]:K.indptr[d + 1]]
+        matched_terms = set(row.tolist())
+        findings: List[AllergenFinding] = []
+        for g in np.flatnonzero(found[d]).tolist():
+            allergen = rules.allergens[g]
+            found_keywords = [kw for kw, kid in zip(allergen.keywords, allergen.keyword_ids) if kid in matched_terms]
+            derived = [t for t in allergen.derived if t.term_id in matched_terms]
+            found_keywords += [t.term for t in derived]
+            derivations = derivation_chains(allergen, derived)
+            if high[d, g]:
+                sentences = list(dict.fromkeys(doc.lines[i].strip() for i in sorted(high_lines[(d, g)])))
+                findings.append(AllergenFinding(allergen, found_keywords, sentences, float(confidence[d, g]), derivations))
+            else:
+                findings.append(AllergenFinding(allergen, found_keywords, None, 0.0, derivations))
+        findings += find_fuzzy_allergens(doc, rules, findings)
+        results.append(findings)
+    return results
@@ -1,10 +1,19 @@
 # backend/src/rules/checker.py
 import os
-import json
 import re
-from typing import List, Dict, Any, Optional, Tuple
+from bisect import bisect_left, bisect_right
+from typing import Iterable, List, Dict, Any, NamedTuple, Optional, Sequence, Tuple, Union
+
+from src.rules.artifact import RuleArtifact, default_artifact_path
+from src.rules.document import LabelDocument
+from src.rules.fuzzy import FuzzyHit, fuzzy_index_for
+from src.rules.matcher import MultiKeywordMatcher, is_word_match
+from src.rules.ontology import ONTOLOGY_FILE
+from src.rules.registry import CompiledAllergen, DerivedTerm, RuleRegistry, RuleSet, thaw
 
 RULES_DIR = os.path.dirname(__file__)
+# 파생 원재료 온톨로지 (유청단백분말 → 유청 등, src/rules/ontology.py)
+ONTOLOGY_PATH = os.path.join(RULES_DIR, ONTOLOGY_FILE)
 
 COUNTRY_NAMES = {
     "US": "US FDA",
@@ -22,228 +31,129 @@ WARNING_MARKERS = [
     "allergen", "allergy", "알레르기",
     "warning", "주의", "경고"
 ]
+# 마커 중 하나라도 포함하는지 (PASS 근거 줄 판정)
+_WARNING_MARKER_RE = re.compile("|".join(re.escape(m) for m in WARNING_MARKERS))
+# 경고 마커 앞뒤로 알레르겐 이름/키워드를 찾는 범위 (글자 수)
+WARNING_WINDOW = 120
+
+
+RULE_FILES = {
+    "US": "us_fda.json",
+    "JP": "jp_food_label.json",
+    "VN": "vn_food_label.json",
+    "EU": "eu_food_label.json",
+    "CN": "cn_food_label.json",
+}
 
-
-def _load_rules(country: str) -> Dict[str, Any]:
-    """국가별 규칙 파일 로드"""
-    rule_files = {
-        "US": "us_fda.json",
-        "JP": "jp_food_label.json",
-        "VN": "vn_food_label.json",
-        "EU": "eu_food_label.json",
-        "CN": "cn_food_label.json",
-    }
-    filename = rule_files.get((country or "").upper())
-    if not filename:
-        return {}
-
-    filepath = os.path.join(RULES_DIR, filename)
-    if not os.path.isfile(filepath):
-        return {}
-
-    with open(filepath, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-
-def _is_korean(s: str) -> bool:
-    """문자열에 한글이 포함되어 있으면 True"""
-    for ch in s:
-        if "\uac00" <= ch <= "\ud7a3":
-            return True
-    return False
-
-
-def _keyword_found(text_lower: str, kw: str) -> bool:
-    """
-    키워드 매칭:
-    - 영어/숫자 위주 키워드는 단어 경계(\b)로 매칭 (오탐 감소)
-    - 한글 키워드는 부분 매칭 허용 (OCR 특성상 띄어쓰기/조사 등 변형이 많음)
-    """
-    k = (kw or "").strip().lower()
-    if not k:
-        return False
-
-    if _is_korean(k):
-        return k in text_lower
-
-    return re.search(rf"\b{re.escape(k)}\b", text_lower) is not None
+# 판정 로직(이 파일)이 바뀌어 기존 리포트를 다시 판정해야 하면 올린다
+CHECKER_VERSION = "3"
+# OCR 오인식 유사 표기로만 찾은 알레르겐의 확신도 배율 (src/rules/fuzzy.py)
+FUZZY_CONFIDENCE_FACTOR = 0.6
 
 
-def _split_lines_for_context(text: str) -> List[str]:
+def get_rules_version(country: str) -> str:
     """
-    OCR 텍스트를 '근접 문맥' 단위로 쪼갠다.
-    - 줄바꿈 + 문장 구분(., 。 등) 기준
+    국가별 규칙 버전 (CHECKER_VERSION + 규칙 파일/원재료 온톨로지 내용 해시, src/rules/registry.py)
+    - 리포트에 함께 저장해, 규칙이 바뀐 뒤 다시 판정해야 할 리포트를 찾는 데 쓴다.
+    - check_risks 결과의 "rules_version"은 실제 판정에 쓴 규칙의 버전이다. (판정 직후 파일이 바뀌어도 일치)
     """
-    return [
-        ln.strip()
-        for ln in re.split(r"[\n\r]+|[.。]", text or "")
-        if ln.strip()
-    ]
+    return rule_registry.version(country)
 
 
-def _detect_cross_contamination(text: str) -> bool:
-    """
-    교차오염(동일 시설/장비 제조, may contain 등) 문구 감지 (bool)
-    """
-    t = (text or "").lower()
-    markers = [
-        "같은 제조",
-        "같은 제조시설",
-        "같은 시설",
-        "제조 시설",
-        "동일한 제조",
-        "동일 시설",
-        "같은 장비",
-        "shared facility",
-        "shared equipment",
-        "processed in a facility",
-        "processed on shared equipment",
-        "may contain",
-    ]
-    return any(m in t for m in markers)
-
-
-def _find_cross_contamination_evidence(text: str, limit: int = 2) -> List[str]:
+def _find_cross_contamination_evidence(doc: LabelDocument, limit: int = 2) -> List[str]:
     """
     교차오염 관련 문장이 포함된 라인만 근거로 뽑는다. (List[str])
     ✅ MEDIUM(CROSS_CONTAMINATION) 근거는 이 함수로만 고정 사용
     """
-    t = text or ""
-    lines = _split_lines_for_context(t)
-    markers = [
-        "같은 제조", "같은 제조시설", "같은 시설", "제조 시설",
-        "동일한 제조", "동일 시설", "같은 장비",
-        "may contain", "processed in a facility",
-        "processed on shared equipment", "shared facility", "shared equipment"
-    ]
-
     hits: List[str] = []
-    for ln in lines:
-        ln_lower = ln.lower()
-        if any(m.lower() in ln_lower for m in markers):
-            hits.append(ln.strip())
+    for ln, is_marker in zip(doc.lines, doc.cc_marker_flags):
+        if is_marker:
+            hits.append(ln)
         if len(hits) >= limit:
             break
     return hits
 
 
-def _build_non_cc_text(text: str, window: int = 2) -> str:
+def _index_hits(
+    rules: RuleSet,
+    hits: Iterable[Tuple[int, int, int, int, bool]]
+) -> Tuple[Dict[int, List[int]], List[int], Dict[int, List[Tuple[int, int]]]]:
     """
-    교차오염(같은 제조시설/may contain 등) '문맥'에 해당하는 라인들을 제거한 텍스트를 만든다.
-    - 교차오염 마커가 등장한 라인 기준으로 앞/뒤 window 라인을 함께 제거
-    - 이렇게 해야 '- 이 제품은 난류, 게, 새우...' 같은 '앞줄'도 같이 제거됨(중요)
+    rules.matcher 매칭을 용도별로 정리한다.
+    - hits: (keyword_id, start, end, doc.lines 번호, 키워드 매칭 여부(영어 키워드는 단어 경계 조건)),
+      start/end는 교차오염 문맥을 뺀 텍스트(non_cc_lower) 기준, 시작 위치 순
+    Returns:
+        (keyword_id → 매칭된 doc.lines 번호,
+         경고 마커 위치 (오름차순),
+         keyword_id → 부분 문자열 매칭 구간 [start, end) 목록)
     """
-    lines = _split_lines_for_context(text or "")
-    if not lines:
-        return ""
-
-    # 교차오염 마커가 있는 라인 인덱스 찾기
-    marker_idx = []
-    for i, ln in enumerate(lines):
-        if _is_cross_contamination_line(ln):
-            marker_idx.append(i)
-
-    if not marker_idx:
-        return "\n".join(lines)
-
-    # 마커 주변 라인까지 제거 대상으로 확장
-    remove_idx = set()
-    for i in marker_idx:
-        start = max(0, i - window)
-        end = min(len(lines), i + window + 1)
-        for j in range(start, end):
-            remove_idx.add(j)
-
-    # 제거되지 않은 라인만 합쳐서 반환
-    kept = [ln for idx, ln in enumerate(lines) if idx not in remove_idx]
-    return "\n".join(kept)
-
-
-def _is_cross_contamination_line(line: str) -> bool:
-    t = (line or "").lower()
-    markers = [
-        "같은 제조", "같은 제조시설", "같은 시설", "제조 시설",
-        "동일한 제조", "동일 시설", "같은 장비",
-        "may contain", "processed in a facility",
-        "processed on shared equipment", "shared facility", "shared equipment"
-    ]
-    if any(m.lower() in t for m in markers):
-        return True
-
-    stripped = (line or "").strip()
-    if (stripped.startswith("-") or stripped.startswith("•")):
-        if ("이 제품은" in line or "본 제품은" in line):
-            allergen_indicators = ["난류", "새우", "게", "땅콩", "호두", "대두", "밀", "우유", "메밀", "고등어", "돼지고기", "복숭아", "토마토", "아황산"]
-            comma_count = line.count(",")
-            allergen_count = sum(1 for a in allergen_indicators if a in line)
-            if comma_count >= 2 and allergen_count >= 2:
-                return True
-
-    return False
-    
-def _has_explicit_warning(text: str, allergen_name: str, keywords: List[str]) -> bool:
+    marker_ids = rules.marker_ids
+    keyword_lines: Dict[int, List[int]] = {}
+    marker_positions: List[int] = []
+    marker_ends: Dict[int, int] = {}
+    term_spans: Dict[int, List[Tuple[int, int]]] = {}
+
+    for kid, start, end, line, matched in hits:
+        term_spans.setdefault(kid, []).append((start, end))
+        # 마커는 마커마다 re.finditer로 찾던 것과 같게 겹치는 출현은 건너뛴다
+        if kid in marker_ids and start >= marker_ends.get(kid, 0):
+            marker_positions.append(start)
+            marker_ends[kid] = end
+        if matched:
+            lines = keyword_lines.setdefault(kid, [])
+            if not lines or lines[-1] != line:
+                lines.append(line)
+
+    return keyword_lines, marker_positions, term_spans
+
+
+def _has_explicit_warning(
+    marker_positions: Sequence[int],
+    spans: Iterable[Tuple[int, int]],
+    window: int = WARNING_WINDOW
+) -> bool:
     """
     '명시적 경고 문구' 인정:
     - WARNING_MARKERS 중 하나가 등장하고
     - 그 주변(window) 안에 해당 알레르겐(이름 또는 키워드)이 함께 있으면 True
+    - marker_positions: 마커 시작 위치 (오름차순), spans: 알레르겐 용어의 매칭 구간 [start, end)
+    마커 위치 p의 주변 text[p - window : p + window] 안에 구간이 들어가는 조건은 end - window <= p <= start + window 이므로
+    구간마다 end - window 이상인 첫 마커 하나만 보면 된다. (bisect)
     """
-    t = (text or "").lower()
-    if not t.strip():
-        return False
-
-    allergen_terms: List[str] = []
-    if allergen_name:
-        allergen_terms.append(allergen_name.lower())
-    allergen_terms.extend([(kw or "").lower().strip() for kw in keywords if (kw or "").strip()])
-
-    window = 120
-
-    marker_positions: List[int] = []
-    for marker in WARNING_MARKERS:
-        for m in re.finditer(re.escape(marker), t):
-            marker_positions.append(m.start())
-
     if not marker_positions:
         return False
-
-    for pos in marker_positions:
-        start = max(0, pos - window)
-        end = min(len(t), pos + window)
-        context = t[start:end]
-        if any(term and term in context for term in allergen_terms):
+    count = len(marker_positions)
+    for start, end in spans:
+        i = bisect_left(marker_positions, end - window)
+        if i < count and marker_positions[i] <= start + window:
             return True
-
     return False
 
 
-def _get_evidence_and_confidence(text: str, keywords: List[str]) -> Tuple[List[str], float]:
+def _get_evidence_and_confidence(lines: List[str], matched_idx: Iterable[int]) -> Tuple[List[str], float]:
     """
-    OCR 텍스트에서 근거 문장과 확신도를 계산한다.
+    근거 문장과 확신도를 계산한다.
+    - lines: 검사한 텍스트의 줄 목록 (LabelDocument.lines), matched_idx: 키워드가 매칭된 줄 번호
     - 근거 문장: 키워드가 포함된 문장/줄 (원문 유지)
     - 확신도: 근거 문장 수 기반 휴리스틱
     """
-    if not text or not keywords:
+    if not lines or not matched_idx:
         return [], 0.0
 
-    lines = _split_lines_for_context(text)  # ✅ 원문 기준
-    matched_lines: List[str] = []
-
-    for line in lines:
-        line_lower = line.lower()
-        if any(_keyword_found(line_lower, kw) for kw in keywords):
-            matched_lines.append(line.strip())
-
     # 순서 유지 중복 제거
-    matched_lines = list(dict.fromkeys(matched_lines))
+    matched_lines = list(dict.fromkeys(lines[i].strip() for i in sorted(matched_idx)))
+    return matched_lines, evidence_confidence(len(matched_lines))
+
 
-    if len(matched_lines) > 1:
-        confidence = 0.85 + min(0.1, (len(matched_lines) - 2) * 0.05)  # 0.85~0.95
-    elif len(matched_lines) == 1:
+def evidence_confidence(count: int) -> float:
+    """근거 문장 수 → 확신도 (src/rules/batch.py도 같은 함수로 표를 만든다)"""
+    if count > 1:
+        confidence = 0.85 + min(0.1, (count - 2) * 0.05)  # 0.85~0.95
+    elif count == 1:
         confidence = 0.7
     else:
         confidence = 0.0
-
-    return matched_lines, round(confidence, 2)
+    return round(confidence, 2)
 
 
 def _get_allergen_rule_description(country: str, allergen_name: str) -> str:
@@ -261,51 +171,271 @@ def _get_allergen_rule_description(country: str, allergen_name: str) -> str:
     return f"[{country}] 식품 규정은 '{allergen_name}'에 대한 적절한 알레르겐 표시를 요구합니다."
 
 
-def _find_pass_evidence(text: str, found_keywords: List[str], limit: int = 2) -> List[str]:
+# 국가별 규칙 (파일을 한 번만 읽어 컴파일, 파일이 바뀌면 자동 재로딩, 빌드된 아티팩트가 있으면 그걸 사용)
+rule_registry = RuleRegistry(
+    RULE_FILES, RULES_DIR, CHECKER_VERSION, _get_allergen_rule_description,
+    markers=WARNING_MARKERS, artifact=RuleArtifact(default_artifact_path()), ontology_path=ONTOLOGY_PATH,
+)
+
+
+def _find_pass_evidence(doc: LabelDocument, found_keywords: List[str], limit: int = 2) -> List[str]:
     """
     PASS 근거 라인 뽑기:
     - WARNING_MARKERS(함유/contains/알레르기/경고 등) + (발견된 알레르겐 키워드) 같이 있는 라인만 뽑는다.
     ✅ '주의사항' 같은 무관 문장이 섞이는 걸 줄이기 위해, 키워드 동시 포함 조건을 건다.
     """
-    if not text or not found_keywords:
+    if not doc or not found_keywords:
         return []
 
-    lines = _split_lines_for_context(text)
     keywords_lower = [(k or "").strip().lower() for k in found_keywords if (k or "").strip()]
     hits: List[str] = []
 
-    for ln in lines:
-        ln_lower = ln.lower()
-        has_marker = any(m.lower() in ln_lower for m in WARNING_MARKERS)
+    for ln, ln_lower in zip(doc.lines, doc.lines_lower):
+        has_marker = _WARNING_MARKER_RE.search(ln_lower) is not None
         has_kw = any(kw in ln_lower for kw in keywords_lower)
         if has_marker and has_kw:
-            hits.append(ln.strip())
+            hits.append(ln)
         if len(hits) >= limit:
             break
 
     return hits
 
 
+class AllergenFinding(NamedTuple):
+    """키워드가 발견된 알레르겐 하나의 판정 결과 (rules.allergens 순서)"""
+    allergen: CompiledAllergen
+    found_keywords: List[str]          # 발견된 원본 키워드 (allergen.keywords 순서, 그 뒤에 파생 원재료)
+    evidence: Optional[List[str]]      # HIGH(경고 문구 없음)이면 근거 문장, 아니면 None
+    confidence: float                  # HIGH일 때의 확신도 (아니면 0.0)
+    derivations: List[str]             # 발견된 파생 원재료의 사슬 (derivation_chains)
+    fuzzy_matches: Tuple[str, ...] = ()  # 유사 표기로 찾았을 때 '텍스트 표기 ≈ 키워드' (정확 매칭이면 비어 있음)
+
+
+def derivation_chains(allergen: CompiledAllergen, derived: Iterable[DerivedTerm]) -> List[str]:
+    """
+    파생 원재료 → 알레르겐 사슬 표시 (예: '유청단백분말 → 유청단백 → 유청 → Milk')
+    - 다른 발견 원재료의 사슬 중간에 있는 원재료(유청단백분말의 '유청단백')는 따로 표시하지 않는다.
+    """
+    derived = list(derived)
+    covered = {term for d in derived for term in d.chain[1:]}
+    return [" → ".join(d.chain + (allergen.name,)) for d in derived if d.term not in covered]
+
+
+def scan_rule_hits(
+    doc: LabelDocument,
+    rules: RuleSet,
+    line_hits: Optional[Iterable[Tuple[int, int, int, int, bool]]] = None
+) -> Tuple[int, List[Tuple[int, int, int, int, bool]]]:
+    """
+    교차오염 문맥(마커 줄 + 주변 2줄)을 뺀 텍스트에서 rules.matcher 매칭
+    - 이렇게 해야 '- 이 제품은 난류, 게, 새우...' 같은 '앞줄'도 같이 제거됨(중요)
+    - line_hits: 이미 스캔한 결과 (check_risks 참고). 없으면 여기서 스캔한다.
+    Returns:
+        (교차오염 문맥을 뺀 텍스트 길이,
+         [(keyword_id, start, end, doc.lines 번호, 키워드 매칭 여부)] (start/end는 그 텍스트 기준, 시작 위치 순))
+    """
+    kept = doc.non_cc_line_indexes(window=2)
+    non_cc_lower = "\n".join(doc.lines_lower[i] for i in kept)
+    # kept 줄마다 non_cc_lower에서의 시작 위치
+    offsets: List[int] = []
+    pos = 0
+    for i in kept:
+        offsets.append(pos)
+        pos += len(doc.lines_lower[i]) + 1
+    if line_hits is None:
+        # 규칙 세트의 키워드/알레르겐 이름/경고 마커를 한 번에 스캔
+        matcher = rules.matcher
+        hits = [
+            (
+                kid, start, end, kept[bisect_right(offsets, start) - 1],
+                not matcher.is_bounded(kid) or is_word_match(non_cc_lower, start, end),
+            )
+            for kid, start, end in matcher.positions(non_cc_lower)
+        ]
+    else:
+        # doc.lines 번호 → non_cc_lower에서의 시작 위치 (교차오염 문맥 줄은 None)
+        line_offsets: List[Optional[int]] = [None] * len(doc.lines)
+        for i, offset in zip(kept, offsets):
+            line_offsets[i] = offset
+        hits = [
+            (kid, base + start, base + end, line, matched)
+            for kid, line, start, end, matched in line_hits
+            for base in (line_offsets[line],)
+            if base is not None
+        ]
+    return len(non_cc_lower), hits
+
+
+def _find_allergens(
+    doc: LabelDocument,
+    rules: RuleSet,
+    line_hits: Optional[Iterable[Tuple[int, int, int, int, bool]]] = None,
+    fuzzy: bool = True
+) -> List[AllergenFinding]:
+    """교차오염 문맥을 뺀 텍스트에서 알레르겐 키워드 검색 + 경고 문구 판정 (텍스트 하나)"""
+    _, hits = scan_rule_hits(doc, rules, line_hits)
+    keyword_lines, marker_positions, term_spans = _index_hits(rules, hits)
+
+    # 용어(알레르겐 이름/키워드) → 경고 마커 근접 여부 (여러 알레르겐이 같은 키워드를 쓰므로 용어마다 한 번만 판정)
+    warned: Dict[int, bool] = {}
+
+    def _term_warned(kid: Optional[int]) -> bool:
+        if kid is None:
+            return False
+        if kid not in warned:
+            warned[kid] = _has_explicit_warning(marker_positions, term_spans.get(kid, ()))
+        return warned[kid]
+
+    findings: List[AllergenFinding] = []
+    for allergen in rules.allergens:
+        found_ids = [kid for kid in allergen.keyword_ids if kid in keyword_lines]
+        found_keywords = [
+            kw for kw, kid in zip(allergen.keywords, allergen.keyword_ids)
+            if kid in keyword_lines
+        ]
+        # 온톨로지 파생 원재료도 키워드처럼 근거 줄 / 경고 문구 근접 판정에 쓴다
+        derived = [d for d in allergen.derived if d.term_id in keyword_lines]
+        if not found_keywords and not derived:
+            continue
+        found_ids += [d.term_id for d in derived]
+        found_keywords += [d.term for d in derived]
+
+        evidence: Optional[List[str]] = None
+        confidence = 0.0
+        # 경고 문구가 "없다"면 HIGH (표기 누락 가능)
+        if not (_term_warned(allergen.name_id) or any(_term_warned(kid) for kid in found_ids)):
+            matched_idx = {i for kid in found_ids for i in keyword_lines[kid]}
+            matched_sentences, matched_confidence = _get_evidence_and_confidence(doc.lines, matched_idx)
+            # 너무 낮으면 오탐 방지
+            if matched_confidence >= 0.4:
+                evidence, confidence = matched_sentences, matched_confidence
+
+        findings.append(AllergenFinding(
+            allergen, found_keywords, evidence, confidence, derivation_chains(allergen, derived)
+        ))
+    if fuzzy:
+        findings += find_fuzzy_allergens(doc, rules, findings, hits)
+    return findings
+
+
+def find_fuzzy_allergens(
+    doc: LabelDocument,
+    rules: RuleSet,
+    findings: Sequence[AllergenFinding],
+    hits: Optional[List[Tuple[int, int, int, int, bool]]] = None
+) -> List[AllergenFinding]:
+    """
+    정확 매칭으로 찾지 못한 알레르겐을 OCR 오인식 유사 표기로 찾는다. (src/rules/fuzzy.py)
+    - findings: 정확 매칭 판정 (이 알레르겐들은 건너뛴다), hits: scan_rule_hits 결과 (없으면 유사 표기가 있을 때만 스캔)
+    - 정확히 매칭된 다른 키워드와 겹치는 표기는 뺀다. ('유청단백분말'의 '단백분' ≈ 난백분 등)
+    - 경고 문구 판정은 정확 매칭과 같고(유사 표기 또는 알레르겐 이름 주변의 마커), 확신도는 FUZZY_CONFIDENCE_FACTOR배
+    Returns: 유사 표기로 찾은 알레르겐 판정 (rules.allergens 순서)
+    """
+    found = {id(f.allergen) for f in findings}
+    missing = [a for a in rules.allergens if id(a) not in found]
+    if not missing:
+        return []
+    owner: Dict[int, List[CompiledAllergen]] = {}
+    for allergen in missing:
+        for kid in list(allergen.keyword_ids) + [d.term_id for d in allergen.derived]:
+            if kid is not None:
+                owner.setdefault(kid, []).append(allergen)
+
+    kept = doc.non_cc_line_indexes(window=2)
+    fuzzy_hits = [h for h in fuzzy_index_for(rules).search(doc.lines_lower, kept) if h.keyword_id in owner]
+    if not fuzzy_hits:
+        return []
+
+    if hits is None:
+        _, hits = scan_rule_hits(doc, rules)
+    _, marker_positions, term_spans = _index_hits(rules, hits)
+    # 교차오염 문맥을 뺀 텍스트(non_cc_lower) 기준 위치로 맞춘다
+    line_offsets: Dict[int, int] = {}
+    pos = 0
+    for i in kept:
+        line_offsets[i] = pos
+        pos += len(doc.lines_lower[i]) + 1
+    # 정확 매칭 구간 (시작 위치 순)과 그 앞쪽 구간들의 가장 먼 끝 (겹침 판정)
+    exact_starts: List[int] = []
+    reach: List[int] = []
+    for start, end in sorted(
+        (start, end) for kid, start, end, _, matched in hits
+        if matched and kid not in rules.marker_ids
+    ):
+        exact_starts.append(start)
+        reach.append(max(end, reach[-1]) if reach else end)
+
+    by_allergen: Dict[int, List[Tuple[int, int, int, FuzzyHit]]] = {}
+    for hit in fuzzy_hits:
+        start = line_offsets[hit.line] + hit.start
+        end = line_offsets[hit.line] + hit.end
+        i = bisect_left(exact_starts, end)
+        if i and reach[i - 1] > start:
+            continue
+        for allergen in owner[hit.keyword_id]:
+            by_allergen.setdefault(id(allergen), []).append((start, end, hit.line, hit))
+
+    result: List[AllergenFinding] = []
+    for allergen in missing:
+        matches = by_allergen.get(id(allergen))
+        if not matches:
+            continue
+        spans = [(start, end) for start, end, _, _ in matches] + list(term_spans.get(allergen.name_id, ()))
+        evidence: Optional[List[str]] = None
+        confidence = 0.0
+        if not _has_explicit_warning(marker_positions, sorted(spans)):
+            matched_sentences, matched_confidence = _get_evidence_and_confidence(doc.lines, {m[2] for m in matches})
+            evidence, confidence = matched_sentences, round(matched_confidence * FUZZY_CONFIDENCE_FACTOR, 2)
+        keywords = rules.matcher.keywords
+        matched_ids = {m[3].keyword_id for m in matches}
+        result.append(AllergenFinding(
+            allergen,
+            list(dict.fromkeys(m[3].text for m in matches)),
+            evidence,
+            confidence,
+            derivation_chains(allergen, [d for d in allergen.derived if d.term_id in matched_ids]),
+            tuple(dict.fromkeys(f"{m[3].text} ≈ {keywords[m[3].keyword_id]}" for m in matches)),
+        ))
+    return result
+
+
 def check_risks(
-    text: str,
+    text: Union[str, LabelDocument],
     country: str = "US",
     ocr_confidence: Optional[str] = None,
     detected_language: Optional[str] = None,
-    nutrition_detected: Optional[bool] = None
+    nutrition_detected: Optional[bool] = None,
+    *,
+    rules: Optional[RuleSet] = None,
+    line_hits: Optional[Iterable[Tuple[int, int, int, int, bool]]] = None,
+    findings: Optional[Sequence[AllergenFinding]] = None,
+    fuzzy: bool = True
 ) -> Dict[str, Any]:
     """
     텍스트에서 알레르기 누락 가능성 검사 + 리포트 패키지 반환
+    - text: OCR 텍스트 또는 LabelDocument (분석기끼리 줄 분리/소문자화 결과 공유)
+    - rules / line_hits: 통합 분석기(src/rules/analyzer.py)가 이미 스캔한 결과를 넘길 때 사용.
+      line_hits는 rules.matcher의 부분 문자열 매칭
+      (keyword_id, doc.lines 번호, 줄 안 시작, 줄 안 끝, 키워드 매칭 여부(영어 키워드는 단어 경계 조건)),
+      doc 위치 순, 교차오염 문맥 포함 전체 줄 기준 (줄 하나 안의 매칭만)
+    - findings: 알레르겐별 판정을 이미 계산했을 때 (src/rules/batch.py). 주어지면 텍스트를 스캔하지 않고 리포트만 만든다.
+    - fuzzy: 정확 매칭으로 못 찾은 알레르겐을 OCR 오인식 유사 표기('rnilk', '땅코ㅇ')로도 찾는다. (find_fuzzy_allergens)
+      유사 표기로 찾은 HIGH는 확신도가 낮고 evidence.fuzzy에 '표기 ≈ 키워드'가 들어간다.
     returns:
       {
         risks: [...],
         summary: {...},
         input_data_status: {...},
         correction_guide: [...],
-        regulatory_basis: [...]
+        regulatory_basis: [...],
+        rules_version: 판정에 사용한 규칙 버전
       }
     """
+    doc = LabelDocument.of(text)
+    text = doc.text
     country = (country or "US").upper()
-    rules = _load_rules(country)
+    if rules is None:
+        rules = rule_registry.get(country)
     country_name = COUNTRY_NAMES.get(country, country)
 
     input_data_status = {
@@ -336,7 +466,8 @@ def check_risks(
             },
             "input_data_status": input_data_status,
             "correction_guide": [],
-            "regulatory_basis": []
+            "regulatory_basis": [],
+            "rules_version": rules.version,
         }
 
     if not rules:
@@ -359,74 +490,70 @@ def check_risks(
             },
             "input_data_status": input_data_status,
             "correction_guide": [],
-            "regulatory_basis": []
+            "regulatory_basis": [],
+            "rules_version": rules.version,
         }
 
-    text_lower = text.lower()
-    non_cc_text = _build_non_cc_text(text, window=2)
-    non_cc_lower = non_cc_text.lower()
+    if findings is None:
+        findings = _find_allergens(doc, rules, line_hits, fuzzy=fuzzy)
 
     risks: List[Dict[str, Any]] = []
     detected_any_allergen_keyword = False
 
     # ✅ 2번(MEDIUM) 교차오염 감지 (있냐/없냐)
-    cross_contamination = _detect_cross_contamination(text)
+    cross_contamination = doc.has_cross_contamination
 
     # PASS 근거를 위해 "발견된 알레르겐 키워드"를 모아둔다
     all_found_keywords: List[str] = []
 
-    # 1) 알레르겐 키워드 기반 HIGH 리스크 탐지
-    for allergen in rules.get("major_allergens", []):
-        allergen_name = (allergen.get("name", "") or "").strip()
-        keywords = allergen.get("keywords", []) or []
-
-        # 교차오염 문맥(마커 줄 + 주변 2줄)을 제거한 텍스트에서 키워드 검색
-        found_keywords = [kw for kw in keywords if _keyword_found(non_cc_lower, kw)]
-
-        if not found_keywords:
-            continue
-
+    # 1) 알레르겐 키워드 기반 HIGH 리스크
+    for finding in findings:
         detected_any_allergen_keyword = True
-        all_found_keywords.extend(found_keywords)
-
-        has_warning = _has_explicit_warning(non_cc_text, allergen_name, found_keywords)
-
-        # 경고 문구가 "없다"면 HIGH (표기 누락 가능)
-        if not has_warning:
-            matched_sentences, confidence = _get_evidence_and_confidence(non_cc_text, found_keywords)
-
-            # 너무 낮으면 오탐 방지
-            if confidence < 0.4:
-                continue
+        all_found_keywords.extend(finding.found_keywords)
+        if finding.evidence is None:
+            continue
 
-            details = allergen.get("details", {})
-            next_step = f"라벨에 '{allergen_name}'에 대한 명시적인 알레르기 경고(예: 'Contains {allergen_name}')가 있는지 확인하세요."
+        allergen_name = finding.allergen.name
+        details = thaw(finding.allergen.details)
+        next_step = f"라벨에 '{allergen_name}'에 대한 명시적인 알레르기 경고(예: 'Contains {allergen_name}')가 있는지 확인하세요."
+        risk_evidence: Dict[str, Any] = {
+            "matched": finding.evidence,
+            "hint": f"'{', '.join(finding.found_keywords)}' 키워드가 발견되었습니다."
+        }
+        if finding.derivations:
+            # 파생 원재료로 찾은 경우 어떤 상위 원재료를 거쳐 이 알레르겐이 되었는지
+            risk_evidence["derivation"] = finding.derivations
+        risk_text = (
+            f"[{country_name}] 필수 알레르겐 '{allergen_name}' 포함 가능성이 있으나, "
+            "명시적인 경고 문구가 확인되지 않았습니다."
+        )
+        if finding.fuzzy_matches:
+            # OCR 오인식으로 보이는 유사 표기로만 찾은 경우 (원문 확인 필요)
+            risk_evidence["fuzzy"] = list(finding.fuzzy_matches)
+            risk_evidence["hint"] = (
+                f"'{', '.join(finding.found_keywords)}' 표기가 알레르겐 키워드와 비슷합니다. (OCR 오인식 가능)"
+            )
+            risk_text += " (OCR 오인식으로 보이는 유사 표기로 감지되어 원문 확인이 필요합니다.)"
 
-            risks.append({
-                "allergen": allergen_name,
-                "risk": (
-                    f"[{country_name}] 필수 알레르겐 '{allergen_name}' 포함 가능성이 있으나, "
-                    "명시적인 경고 문구가 확인되지 않았습니다."
-                ),
-                "severity": "HIGH",
-                "confidence": confidence,
-                "details": details,
-                "evidence": {
-                    "matched": matched_sentences,
-                    "hint": f"'{', '.join(found_keywords)}' 키워드가 발견되었습니다."
-                },
-                "next_step": next_step,
-                "expert_check_required": True,
-                "rule_id": f"{country}_{allergen_name.upper().replace(' ', '_')}_LABELING_001",
-                "rule_description": _get_allergen_rule_description(country, allergen_name),
-            })
+        risks.append({
+            "allergen": allergen_name,
+            "risk": risk_text,
+            "severity": "HIGH",
+            "confidence": finding.confidence,
+            "details": details,
+            "evidence": risk_evidence,
+            "next_step": next_step,
+            "expert_check_required": True,
+            "rule_id": finding.allergen.rule_id,
+            "rule_description": finding.allergen.rule_description,
+        })
 
     input_data_status["allergens_detected"] = detected_any_allergen_keyword
 
     # 2) ✅ MEDIUM: 교차오염 문구가 있을 경우
     #    - 규정 "위반"이라기보단 수출 라벨에서 표현/표기 확인 필요 → MEDIUM
     if cross_contamination:
-        evidence = _find_cross_contamination_evidence(text, limit=2)  # ✅ 여기! (너가 헷갈린 그 라인)
+        evidence = _find_cross_contamination_evidence(doc, limit=2)  # ✅ 여기! (너가 헷갈린 그 라인)
         risks.append({
             "allergen": "CROSS_CONTAMINATION",
             "risk": f"[{country_name}] 동일 제조시설/교차오염 가능성 문구가 감지되었습니다. 수출 라벨에서 문구 처리/표기 방식 확인이 필요합니다.",
@@ -459,7 +586,7 @@ def check_risks(
         high_exists = any(r.get("severity") == "HIGH" for r in risks)
         if not high_exists:
             # ✅ PASS 근거: "마커 + 알레르겐키워드"가 같이 있는 라인만
-            pass_evidence = _find_pass_evidence(text, all_found_keywords, limit=2)
+            pass_evidence = _find_pass_evidence(doc, all_found_keywords, limit=2)
             hint = "Allergen keywords were found with explicit warning statements."
             if cross_contamination:
                 hint += " Cross-contamination marker also detected."
@@ -578,4 +705,89 @@ def check_risks(
         "input_data_status": input_data_status,
         "correction_guide": correction_guide,
         "regulatory_basis": regulatory_basis,
+        "rules_version": rules.version,
+    }
+
+
+class _CountryUnion:
+    """
+    여러 국가 규칙 세트의 매처를 합친 매처
+    - 국가 규칙 파일은 키워드가 대부분 겹친다('milk', '우유' 등). 합친 매처로 텍스트를 한 번만 훑고
+      매칭마다 그 키워드를 가진 국가들의 keyword_id로 나눠 준다.
+    - owners[통합 id] = ((국가 순번, 그 국가 rules.matcher의 keyword_id), ...)
+      (keyword_id → 알레르겐은 CompiledAllergen.keyword_ids / name_id, 경고 마커는 RuleSet.marker_ids)
+    """
+
+    def __init__(self, rule_sets: Tuple[RuleSet, ...]):
+        self.rule_sets = rule_sets
+        self.matcher = MultiKeywordMatcher(kw for rules in rule_sets for kw in rules.matcher.keywords)
+        owners: List[List[Tuple[int, int]]] = [[] for _ in range(len(self.matcher))]
+        for index, rules in enumerate(rule_sets):
+            for kid, kw in enumerate(rules.matcher.keywords):
+                owners[self.matcher.id_of(kw)].append((index, kid))
+        self.owners = [tuple(o) for o in owners]
+
+    def scan(self, doc: LabelDocument) -> List[List[Tuple[int, int, int, int, bool]]]:
+        """국가 순번 → check_risks의 line_hits (근접 문맥 줄 하나 안의 매칭, doc 위치 순)"""
+        text = doc.lower
+        spans = doc.spans
+        starts = [start for start, _ in spans]
+        owners = self.owners
+        bounded = self.matcher.is_bounded
+        line_hits: List[List[Tuple[int, int, int, int, bool]]] = [[] for _ in self.rule_sets]
+        for uid, start, end in self.matcher.positions(text):
+            line = bisect_right(starts, start) - 1
+            if line < 0 or end > spans[line][1]:
+                continue
+            # 줄 경계 밖은 공백/구분 문자라 줄 안에서 본 단어 경계와 같다
+            hit = (line, start - starts[line], end - starts[line], not bounded(uid) or is_word_match(text, start, end))
+            for index, kid in owners[uid]:
+                line_hits[index].append((kid,) + hit)
+        return line_hits
+
+
+# 국가 목록 → 합친 매처 (목록 중 한 국가라도 규칙이 다시 로딩되면 새로 만든다)
+_unions: Dict[Tuple[str, ...], _CountryUnion] = {}
+
+
+def _union_for(countries: Tuple[str, ...], rule_sets: Tuple[RuleSet, ...]) -> _CountryUnion:
+    union = _unions.get(countries)
+    if union is None or any(a is not b for a, b in zip(union.rule_sets, rule_sets)):
+        union = _CountryUnion(rule_sets)
+        _unions[countries] = union
+    return union
+
+
+def check_risks_multi(
+    text: Union[str, LabelDocument],
+    countries: Iterable[str],
+    ocr_confidence: Optional[str] = None,
+    detected_language: Optional[str] = None,
+    nutrition_detected: Optional[bool] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    여러 수출국 기준 check_risks를 텍스트 한 번 스캔으로 수행
+    - 결과는 국가마다 check_risks를 호출한 것과 같다.
+    - 국가 코드는 대문자로 바꾸고 중복을 뺀다. (입력 순서 유지)
+    returns:
+      { 국가 코드: check_risks 결과 }
+    """
+    doc = LabelDocument.of(text)
+    codes = tuple(dict.fromkeys((country or "US").upper() for country in countries))
+    rule_sets = tuple(rule_registry.get(country) for country in codes)
+
+    # 소문자 변환이 위치를 바꾸는 텍스트(LabelDocument.lower_aligned)나 빈 텍스트는 국가별로 호출
+    if not doc.lower_aligned or not doc.text.strip():
+        return {
+            country: check_risks(doc, country, ocr_confidence, detected_language, nutrition_detected, rules=rules)
+            for country, rules in zip(codes, rule_sets)
+        }
+
+    line_hits = _union_for(codes, rule_sets).scan(doc)
+    return {
+        country: check_risks(
+            doc, country, ocr_confidence, detected_language, nutrition_detected,
+            rules=rules, line_hits=hits,
+        )
+        for country, rules, hits in zip(codes, rule_sets, line_hits)
     }
@@ -0,0 +1,157 @@
+# backend/src/rules/document.py
+"""
+라벨 문서 모델 (OCR 텍스트를 한 번만 나누고 소문자화해서 모든 분석기가 공유)
+
+예전에는 같은 OCR 텍스트를 분석기마다 따로 처리했다.
+- checker: 근접 문맥 분리(_split_lines_for_context)를 교차오염 제거, 근거 문장(알레르겐마다), PASS 근거, 교차오염 근거에서 반복
+- allergen_parser / nutrition_parser / label_validator: 각자 문장 분리, 공백 제거, 소문자화
+
+LabelDocument는 OCR 직후 한 번 만들어 validate_label_image, extract_allergens, parse_nutrition, check_risks에 그대로 넘긴다.
+각 뷰는 처음 쓸 때 한 번만 계산해서 캐시한다. (cached_property, 요청 하나 안에서만 쓰므로 락 불필요)
+분석 함수들은 문자열도 그대로 받는다. (LabelDocument.of로 감싸서 처리)
+"""
+import re
+from functools import cached_property
+from typing import Dict, List, Tuple, Union
+
+# 근접 문맥 단위: 줄바꿈 + 문장 구분(., 。 등)
+_CONTEXT_SPLIT = re.compile(r"[\n\r]+|[.。]")
+# allergen_parser의 문장 단위 (줄바꿈 중 \r는 구분자로 보지 않는다)
+_SENTENCE_SPLIT = re.compile(r"[.。\n]")
+
+# 교차오염(동일 시설/장비 제조, may contain 등) 문구 마커 (소문자)
+CROSS_CONTAMINATION_MARKERS = [
+    "같은 제조", "같은 제조시설", "같은 시설", "제조 시설",
+    "동일한 제조", "동일 시설", "같은 장비",
+    "may contain", "processed in a facility",
+    "processed on shared equipment", "shared facility", "shared equipment"
+]
+# 마커 중 하나라도 포함하는지 (줄마다 마커를 하나씩 `in`으로 확인하던 것과 같은 판정)
+_CC_MARKER_RE = re.compile("|".join(re.escape(m) for m in CROSS_CONTAMINATION_MARKERS))
+
+# '- 이 제품은 난류, 새우, 게...' 처럼 교차오염 문장의 앞줄로 쓰이는 알레르겐 나열 판정용
+_LISTING_ALLERGENS = ["난류", "새우", "게", "땅콩", "호두", "대두", "밀", "우유", "메밀", "고등어", "돼지고기", "복숭아", "토마토", "아황산"]
+
+
+def _is_allergen_listing_line(line: str) -> bool:
+    """'- 이 제품은 난류, 새우, 게 ...' 형태 (글머리표 + 이 제품은/본 제품은 + 알레르겐 2개 이상 나열)"""
+    stripped = line.strip()
+    if not (stripped.startswith("-") or stripped.startswith("•")):
+        return False
+    if "이 제품은" not in line and "본 제품은" not in line:
+        return False
+    allergen_count = sum(1 for a in _LISTING_ALLERGENS if a in line)
+    return line.count(",") >= 2 and allergen_count >= 2
+
+
+class LabelDocument:
+    """
+    OCR 텍스트 하나에 대한 공유 뷰
+
+    - text / lower: 원문, 소문자
+    - spans / lines / lines_lower: 근접 문맥 단위 줄 (원문 오프셋, strip된 줄, 소문자 줄)
+    - cc_marker_flags: 줄마다 교차오염 마커 포함 여부
+    - cc_line_flags: 줄마다 교차오염 문맥 줄 여부 (마커 또는 '- 이 제품은 ...' 알레르겐 나열)
+    - sentences / sentence_breaks: allergen_parser의 문장 목록과 구분 문자 위치
+    - compact: nutrition_parser의 공백/쉼표 제거 텍스트
+    """
+
+    def __init__(self, text: str):
+        self.text = text or ""
+        self._non_cc: Dict[int, List[int]] = {}
+
+    @classmethod
+    def of(cls, text: Union[str, "LabelDocument", None]) -> "LabelDocument":
+        """문자열이면 새 문서로 감싸고, 이미 문서면 그대로 반환"""
+        if isinstance(text, LabelDocument):
+            return text
+        return cls(text or "")
+
+    def __bool__(self) -> bool:
+        return bool(self.text)
+
+    @cached_property
+    def lower(self) -> str:
+        return self.text.lower()
+
+    @cached_property
+    def lower_aligned(self) -> bool:
+        """
+        소문자 텍스트의 위치가 원문과 같은지 (True면 lower의 오프셋을 spans/문장 경계에 그대로 쓸 수 있다)
+        - 'İ'(U+0130)는 소문자가 두 글자가 되고, 'Σ'는 앞뒤 문맥에 따라 소문자가 달라진다. (줄 단위 소문자와 다를 수 있음)
+        """
+        return "\u0130" not in self.text and "\u03a3" not in self.text
+
+    @cached_property
+    def spans(self) -> List[Tuple[int, int]]:
+        """근접 문맥 단위 줄의 원문 구간 [start, end) (앞뒤 공백 제외, 빈 줄 제외)"""
+        text = self.text
+        spans: List[Tuple[int, int]] = []
+        pos = 0
+        for m in _CONTEXT_SPLIT.finditer(text):
+            self._add_span(spans, pos, m.start())
+            pos = m.end()
+        self._add_span(spans, pos, len(text))
+        return spans
+
+    def _add_span(self, spans: List[Tuple[int, int]], start: int, end: int) -> None:
+        piece = self.text[start:end]
+        stripped = piece.strip()
+        if stripped:
+            start += len(piece) - len(piece.lstrip())
+            spans.append((start, start + len(stripped)))
+
+    @cached_property
+    def lines(self) -> List[str]:
+        """OCR 텍스트를 '근접 문맥' 단위로 쪼갠 줄 (줄바꿈 + 문장 구분(., 。 등) 기준)"""
+        return [self.text[start:end] for start, end in self.spans]
+
+    @cached_property
+    def lines_lower(self) -> List[str]:
+        return [ln.lower() for ln in self.lines]
+
+    @cached_property
+    def cc_marker_flags(self) -> List[bool]:
+        search = _CC_MARKER_RE.search
+        return [search(ln) is not None for ln in self.lines_lower]
+
+    @cached_property
+    def cc_line_flags(self) -> List[bool]:
+        return [
+            marker or _is_allergen_listing_line(ln)
+            for marker, ln in zip(self.cc_marker_flags, self.lines)
+        ]
+
+    @cached_property
+    def has_cross_contamination(self) -> bool:
+        # 마커에는 줄 구분 문자가 없으므로 줄 단위 판정의 합이 전체 텍스트 판정과 같다
+        return any(self.cc_marker_flags)
+
+    def non_cc_line_indexes(self, window: int = 2) -> List[int]:
+        """교차오염 문맥 줄과 그 앞/뒤 window 줄을 뺀 나머지 줄 번호 (window별로 캐시, 여러 국가 판정이 공유)"""
+        kept = self._non_cc.get(window)
+        if kept is None:
+            kept = self._non_cc[window] = self._non_cc_line_indexes(window)
+        return kept
+
+    def _non_cc_line_indexes(self, window: int) -> List[int]:
+        flags = self.cc_line_flags
+        removed = [False] * len(flags)
+        for i, flag in enumerate(flags):
+            if flag:
+                for j in range(max(0, i - window), min(len(flags), i + window + 1)):
+                    removed[j] = True
+        return [i for i, r in enumerate(removed) if not r]
+
+    @cached_property
+    def sentences(self) -> List[str]:
+        return _SENTENCE_SPLIT.split(self.text)
+
+    @cached_property
+    def sentence_breaks(self) -> List[int]:
+        """sentences 구분 문자의 원문 위치 (bisect로 위치 → 문장 번호)"""
+        return [m.start() for m in _SENTENCE_SPLIT.finditer(self.text)]
+
+    @cached_property
+    def compact(self) -> str:
+        return self.text.replace(" ", "").replace(",", "")
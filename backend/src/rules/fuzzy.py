@@ -0,0 +1,319 @@
+# backend/src/rules/fuzzy.py
+"""
+OCR 오인식 허용 유사 키워드 매칭 (check_risks의 fuzzy 단계)
+
+OCR은 'rnilk'(milk), 'peanuf'(peanut), 자모가 떨어진 한글('땅코ㅇ') 같은 근사 표기를 자주 만든다.
+정확 매칭(src/rules/matcher.py)으로 찾지 못한 알레르겐에 한해, 규칙 키워드(+ 파생 원재료)와
+편집 거리가 가까운 표기를 찾는다. 허용 편집 거리는 키워드 길이에 따라 0~2 (max_edits)
+
+- 영어/라틴 문자: 단어(토큰) 단위. OCR 정규화('rn' → 'm', '0' → 'o' 등) 후
+  SymSpell 방식 삭제 사전(키워드에서 글자를 최대 k개 지운 문자열 → 키워드)으로 후보를 찾고 거리로 확인한다.
+  치환은 OCR이 잘 헷갈리는 글자 쌍(t/f, c/e, i/l 등)만 1, 나머지는 2로 센다. (butter ↔ bitter 같은 다른 단어 배제)
+  8글자 이하 키워드는 글자 수가 같은 혼동 치환만 허용한다. (삽입/삭제를 허용하면 heat ≈ wheat, four ≈ flour,
+  drum ≈ durum처럼 흔한 단어가 알레르겐이 된다) 예외로 복수형(키워드 + 's', almonds ≈ almond)은 찾는다.
+  흔한 영어 단어(COMMON_WORDS)는 유사 매칭하지 않는다. (spell ≈ spelt, butler ≈ butter처럼 혼동 치환 하나 차이인 단어)
+- 한글: 음절을 자모로 풀어(떨어진 자모 'ㅇ'도 같은 글자) 부분 문자열로 비교한다.
+  키워드 자모열을 k+1 조각으로 나누면 편집이 k개 이하인 출현에는 조각 하나가 그대로 남으므로(비둘기집 원리)
+  조각을 매처 하나로 찾은 뒤(n-gram 후보 거르기) 그 주변만 편집 거리로 확인한다.
+  매칭은 음절 경계에서 시작/끝나야 한다. ('밀'(ㅁㅣㄹ)이 '미리'(ㅁㅣㄹㅣ) 안에서 매칭되지 않도록)
+  허용 거리 0인 짧은 키워드는 떨어진 자모만 복원하므로 낱자모가 있는 단어에서만 찾는다.
+- 비용은 텍스트 길이에 선형 (토큰마다 삭제 문자열 수십 개 사전 조회 + 한글 단어마다 매처 스캔 한 번).
+  토큰/한글 단어별 결과는 캐시해 요청 사이에도 재사용한다.
+- 다중 단어/숫자/한자·가나 키워드는 유사 매칭하지 않는다.
+"""
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from src.rules.matcher import MultiKeywordMatcher, is_korean
+from src.rules.registry import RuleSet
+
+# 한글 음절 → 호환 자모 (OCR이 떨어뜨린 자모와 같은 글자로 비교)
+_CHO = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_JUNG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+_JONG = ("",) + tuple("ㄱㄲㄳㄴㄵㄶㄷㄹㄺㄻㄼㄽㄾㄿㅀㅁㅂㅄㅅㅆㅇㅈㅊㅋㅌㅍㅎ")
+_JAMO_TABLE = {
+    0xAC00 + i: _CHO[i // 588] + _JUNG[(i % 588) // 28] + _JONG[i % 28]
+    for i in range(11172)
+}
+# 한글 단어 (음절 + OCR이 떨어뜨린 낱자모), 낱자모
+_HANGUL_WORD_RE = re.compile("[가-힣ㄱ-ㆎ]+")
+_BROKEN_JAMO_RE = re.compile("[ㄱ-ㆎ]")
+_VOWELS = frozenset(_JUNG)
+_JAMO = frozenset(chr(c) for c in range(0x3131, 0x318F))
+
+# 라틴 문자 토큰 (베트남어 포함, OCR이 글자 대신 읽는 숫자/'|' 포함)
+_LATIN_TOKEN_RE = re.compile("[a-z0-9|À-ɏḀ-ỿ]+")
+_LATIN_KEYWORD_RE = re.compile("[a-zÀ-ɏḀ-ỿ]+")
+# OCR 정규화: 여러 글자 → 한 글자, 글자로 잘못 읽은 숫자/기호
+_OCR_SEQUENCES = (("rn", "m"), ("vv", "w"))
+_OCR_CHARS = str.maketrans({"0": "o", "1": "l", "|": "l", "5": "s", "9": "g"})
+# OCR이 잘 헷갈리는 글자 쌍 (치환 비용 1, 나머지 치환은 2)
+_CONFUSABLE = {
+    frozenset(pair) for pair in
+    ("ce", "co", "eo", "ao", "ae", "il", "ij", "lt", "it", "tf", "fr", "uv", "vy", "nh", "nm", "nu", "rn", "hb", "gq")
+}
+
+# 이 길이 이하 라틴 키워드는 글자 수가 같은 혼동 치환(+ 복수형 's')만 허용 (max_edits가 1인 구간)
+STRICT_KEYWORD_LENGTH = 8
+
+# 유사 매칭하지 않는 흔한 영어 단어
+# - 혼동 치환 하나 / 9글자 이상 키워드의 편집 2 이내인 단어 (spell ≈ spelt, selfish ≈ shellfish)
+# - 조리/보관 문구에 자주 나오는 단어 (STRICT_KEYWORD_LENGTH 규칙으로도 걸러지지만 명시)
+COMMON_WORDS = frozenset((
+    "spell", "spells", "selfish", "butler", "butlers", "harley", "academia", "salman",
+    "heat", "four", "bitter", "drum", "scream",
+))
+
+# 토큰 결과 캐시 크기 (넘으면 비운다)
+_TOKEN_CACHE_SIZE = 65536
+
+
+class FuzzyHit(NamedTuple):
+    keyword_id: int    # RuleSet.matcher id
+    line: int          # doc.lines 번호
+    start: int         # 줄 안 위치 [start, end)
+    end: int
+    text: str          # 텍스트에 실제로 있던 표기 (소문자)
+    distance: int
+
+
+def jamo(text: str) -> str:
+    """한글 음절을 호환 자모로 푼 문자열 (다른 글자는 그대로)"""
+    return text.translate(_JAMO_TABLE)
+
+
+def ocr_normalize(token: str) -> str:
+    for seq, repl in _OCR_SEQUENCES:
+        token = token.replace(seq, repl)
+    return token.translate(_OCR_CHARS)
+
+
+def max_edits(form: str, hangul: bool) -> int:
+    """
+    키워드(정규화/자모 형태) 길이별 허용 편집 거리
+    - 라틴: 4글자 이하 0 (OCR 정규화만), 5~8글자 1 (혼동 치환/복수형만, STRICT_KEYWORD_LENGTH), 9글자 이상 2
+    - 한글 자모: 6자모(2음절) 이하 0 (떨어진 자모만 복원), 7~11자모 1, 12자모 이상 2
+    """
+    n = len(form)
+    if hangul:
+        return 0 if n < 7 else 1 if n < 12 else 2
+    return 0 if n <= 4 else 1 if n <= 8 else 2
+
+
+def ocr_distance(a: str, b: str, limit: int, hangul: bool = False) -> int:
+    """
+    a와 b의 편집 거리 (삽입/삭제 1, 치환 1(한글 자모 / 라틴의 OCR 혼동 쌍) 또는 2)
+    limit보다 크면 limit + 1을 돌려준다. (조기 종료)
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        best = i
+        for j, cb in enumerate(b, 1):
+            if ca == cb:
+                cost = 0
+            elif hangul or frozenset((ca, cb)) in _CONFUSABLE:
+                cost = 1
+            else:
+                cost = 2
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            current[j] = value
+            if value < best:
+                best = value
+        if best > limit:
+            return limit + 1
+        previous = current
+    return min(previous[-1], limit + 1)
+
+
+def _syllable_boundary(form: str, pos: int) -> bool:
+    """자모열 form의 pos가 음절(또는 자모가 아닌 글자) 경계인지 (다음이 자음+모음 = 초성이면 음절 시작)"""
+    if pos <= 0 or pos >= len(form):
+        return True
+    if form[pos - 1] not in _JAMO or form[pos] not in _JAMO:
+        return True
+    return form[pos] not in _VOWELS and pos + 1 < len(form) and form[pos + 1] in _VOWELS
+
+
+def _deletes(word: str, depth: int) -> Set[str]:
+    """word에서 글자를 최대 depth개 지운 문자열 (word 포함)"""
+    result = {word}
+    frontier = {word}
+    for _ in range(depth):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        result |= frontier
+    return result
+
+
+class FuzzyIndex:
+    """
+    규칙 세트 하나의 유사 매칭 색인 (알레르겐 키워드 + 파생 원재료)
+    - search()는 정확 매칭 결과와 관계없이 유사 표기를 모두 돌려준다. 정확히 매칭된 토큰(규칙 매처의 키워드)은 뺀다.
+    """
+
+    def __init__(self, rules: RuleSet):
+        self.rules = rules
+        keywords = rules.matcher.keywords
+        term_ids = sorted({
+            kid for allergen in rules.allergens
+            for kid in list(allergen.keyword_ids) + [d.term_id for d in allergen.derived]
+            if kid is not None
+        })
+        self._exact: Set[str] = set(keywords)
+
+        # 라틴: OCR 정규화 형태 → (id, 허용 거리), 삭제 문자열 → 형태
+        self._latin: Dict[str, List[Tuple[int, int]]] = {}
+        self._deleted: Dict[str, Set[str]] = {}
+        # 한글: 자모 형태 (id, 자모열, 허용 거리)
+        # - 허용 거리 1 이상: 조각 → (형태 번호, 조각 시작 위치)
+        # - 허용 거리 0: 자모열 전체 → 형태 번호 (정확 매칭과 다른 건 떨어진 자모뿐이라 낱자모가 있는 단어에서만 찾는다)
+        self._hangul: List[Tuple[int, str, int]] = []
+        pieces: Dict[str, List[Tuple[int, int]]] = {}
+        whole: Dict[str, List[Tuple[int, int]]] = {}
+
+        for kid in term_ids:
+            kw = keywords[kid]
+            if is_korean(kw):
+                if not all("가" <= ch <= "힣" for ch in kw):
+                    continue
+                form = jamo(kw)
+                k = max_edits(form, hangul=True)
+                index = len(self._hangul)
+                self._hangul.append((kid, form, k))
+                if k == 0:
+                    whole.setdefault(form, []).append((index, 0))
+                    continue
+                size = -(-len(form) // (k + 1))
+                for offset in range(0, len(form), size):
+                    pieces.setdefault(form[offset:offset + size], []).append((index, offset))
+            elif _LATIN_KEYWORD_RE.fullmatch(kw):
+                form = ocr_normalize(kw)
+                k = max_edits(form, hangul=False)
+                self._latin.setdefault(form, []).append((kid, k))
+                for deleted in _deletes(form, k):
+                    self._deleted.setdefault(deleted, set()).add(form)
+
+        self._piece_matcher = _PieceMatcher(pieces)
+        self._broken_matcher = _PieceMatcher(whole)
+        # 토큰/한글 단어 → 결과 (라벨 문구는 반복이 많아 요청 사이에도 재사용된다)
+        self._token_cache: Dict[str, List[Tuple[int, int]]] = {}
+        self._word_cache: Dict[str, List[Tuple[int, int, int, int]]] = {}
+
+    def search(self, lines: Sequence[str], indexes: Iterable[int]) -> List[FuzzyHit]:
+        """
+        lines: 소문자 줄 (LabelDocument.lines_lower), indexes: 검사할 줄 번호
+        Returns: 유사 표기 목록 (줄 순서, 줄 안에서는 라틴 → 한글)
+        """
+        hits: List[FuzzyHit] = []
+        for line in indexes:
+            text = lines[line]
+            if self._latin:
+                for m in _LATIN_TOKEN_RE.finditer(text):
+                    for kid, distance in self._match_token(m.group()):
+                        hits.append(FuzzyHit(kid, line, m.start(), m.end(), m.group(), distance))
+            if self._hangul:
+                for m in _HANGUL_WORD_RE.finditer(text):
+                    base = m.start()
+                    for kid, start, end, distance in self._match_word(m.group()):
+                        hits.append(FuzzyHit(kid, line, base + start, base + end, text[base + start:base + end], distance))
+        return hits
+
+    def _match_token(self, token: str) -> List[Tuple[int, int]]:
+        cached = self._token_cache.get(token)
+        if cached is not None:
+            return cached
+        result: List[Tuple[int, int]] = []
+        if len(token) >= 3 and token not in self._exact and token not in COMMON_WORDS and not token.isdigit():
+            form = ocr_normalize(token)
+            depth = 2 if len(form) >= 7 else 1 if len(form) >= 4 else 0
+            candidates: Set[str] = set()
+            for deleted in _deletes(form, depth):
+                candidates |= self._deleted.get(deleted, set())
+            for candidate in sorted(candidates):
+                if len(candidate) <= STRICT_KEYWORD_LENGTH and len(form) != len(candidate) \
+                        and form != candidate + "s":
+                    continue
+                limit = max(k for _, k in self._latin[candidate])
+                distance = ocr_distance(form, candidate, limit)
+                result.extend((kid, distance) for kid, k in self._latin[candidate] if distance <= k)
+        if len(self._token_cache) >= _TOKEN_CACHE_SIZE:
+            self._token_cache.clear()
+        self._token_cache[token] = result
+        return result
+
+    def _match_word(self, word: str) -> List[Tuple[int, int, int, int]]:
+        """한글 단어 하나 → (keyword_id, 단어 안 시작, 끝, 거리)"""
+        cached = self._word_cache.get(word)
+        if cached is not None:
+            return cached
+        form = jamo(word)
+        found: Dict[Tuple[int, int], Tuple[int, int]] = {}  # (형태 번호, 자모 시작) → (자모 끝, 거리)
+        checked: Set[Tuple[int, int]] = set()
+        anchors = list(self._piece_matcher.anchors(form))
+        if _BROKEN_JAMO_RE.search(word):
+            anchors += self._broken_matcher.anchors(form)
+        for index, anchor in anchors:
+            if (index, anchor) in checked:
+                continue
+            checked.add((index, anchor))
+            _, keyword_form, k = self._hangul[index]
+            if k == 0:
+                if form.startswith(keyword_form, anchor) and _syllable_boundary(form, anchor) \
+                        and _syllable_boundary(form, anchor + len(keyword_form)):
+                    found.setdefault((index, anchor), (anchor + len(keyword_form), 0))
+                continue
+            best: Optional[Tuple[int, int, int]] = None
+            for s in range(max(0, anchor - k), anchor + k + 1):
+                if not _syllable_boundary(form, s):
+                    continue
+                for length in range(len(keyword_form) - k, len(keyword_form) + k + 1):
+                    if s + length > len(form) or length <= 0 or not _syllable_boundary(form, s + length):
+                        continue
+                    distance = ocr_distance(form[s:s + length], keyword_form, k, hangul=True)
+                    if distance <= k and (best is None or distance < best[2]):
+                        best = (s, s + length, distance)
+            if best is not None and (index, best[0]) not in found:
+                found[(index, best[0])] = (best[1], best[2])
+
+        result: List[Tuple[int, int, int, int]] = []
+        if found:
+            # 자모 위치 → 단어 안 글자 위치
+            origin: List[int] = []
+            for pos, ch in enumerate(word):
+                origin.extend([pos] * len(_JAMO_TABLE.get(ord(ch), ch)))
+            for (index, start), (end, distance) in sorted(found.items(), key=lambda item: item[0][1]):
+                result.append((self._hangul[index][0], origin[start], origin[end - 1] + 1, distance))
+        if len(self._word_cache) >= _TOKEN_CACHE_SIZE:
+            self._word_cache.clear()
+        self._word_cache[word] = result
+        return result
+
+
+class _PieceMatcher:
+    """자모 조각 → (형태 번호, 조각 시작 위치) 매처. anchors()는 형태가 시작될 자모 위치 후보"""
+
+    def __init__(self, pieces: Dict[str, List[Tuple[int, int]]]):
+        self._pieces = pieces
+        self._matcher = MultiKeywordMatcher(pieces) if pieces else None
+        self._keys = list(self._matcher.keywords) if self._matcher else []
+
+    def anchors(self, form: str) -> Iterable[Tuple[int, int]]:
+        if self._matcher is None:
+            return
+        for pid, start, _ in self._matcher.positions(form):
+            for index, offset in self._pieces[self._keys[pid]]:
+                yield index, start - offset
+
+
+# 국가 → 색인 (규칙이 다시 로딩되면 RuleSet이 바뀌므로 새로 만든다)
+_indexes: Dict[str, FuzzyIndex] = {}
+
+
+def fuzzy_index_for(rules: RuleSet) -> FuzzyIndex:
+    index = _indexes.get(rules.country)
+    if index is None or index.rules is not rules:
+        index = FuzzyIndex(rules)
+        _indexes[rules.country] = index
+    return index
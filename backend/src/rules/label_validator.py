@@ -3,9 +3,11 @@
 OCR 텍스트를 분석하여 식품 라벨인지 판단합니다.
 """
 
-from typing import Tuple, List
+from typing import AbstractSet, Optional, Tuple, List, Union
 import re
 
+from src.rules.document import LabelDocument
+
 # 최소 텍스트 길이 (너무 짧으면 라벨이 아닐 가능성 높음)
 MIN_TEXT_LENGTH = 30
 
@@ -41,12 +43,17 @@ LABEL_KEYWORDS = {
 }
 
 
-def validate_label_image(ocr_text: str) -> Tuple[bool, str, dict]:
+def validate_label_image(
+    ocr_text: Union[str, LabelDocument],
+    found_keywords: Optional[AbstractSet[str]] = None
+) -> Tuple[bool, str, dict]:
     """
     OCR 텍스트를 분석하여 식품 라벨인지 검증합니다.
 
     Args:
-        ocr_text: OCR로 추출된 텍스트
+        ocr_text: OCR로 추출된 텍스트 (또는 LabelDocument)
+        found_keywords: 텍스트에서 이미 찾은 LABEL_KEYWORDS (src/rules/analyzer.py의 통합 스캔 결과).
+            없으면 여기서 직접 찾는다.
 
     Returns:
         Tuple[bool, str, dict]: (유효 여부, 메시지, 상세 정보)
@@ -58,11 +65,14 @@ def validate_label_image(ocr_text: str) -> Tuple[bool, str, dict]:
         "confidence": 0.0,
     }
 
+    doc = LabelDocument.of(ocr_text)
+    ocr_text = doc.text
+
     # 텍스트가 없는 경우
     if not ocr_text or not ocr_text.strip():
         return False, "이미지에서 텍스트를 인식할 수 없습니다. 식품 라벨 이미지를 업로드해주세요.", details
 
-    text_lower = ocr_text.lower()
+    text_lower = doc.lower
     text_length = len(ocr_text.strip())
     details["text_length"] = text_length
 
@@ -74,15 +84,18 @@ def validate_label_image(ocr_text: str) -> Tuple[bool, str, dict]:
     total_matches = 0
     matched_categories = 0
 
-    for category, keywords in LABEL_KEYWORDS.items():
+    for category, patterns in _KEYWORD_PATTERNS.items():
         category_matches = []
-        for keyword in keywords:
+        for keyword, pattern in patterns:
+            if found_keywords is not None:
+                if keyword in found_keywords:
+                    category_matches.append(keyword)
             # 한글은 부분 매칭, 영어는 단어 경계 매칭
-            if _is_korean(keyword):
+            elif pattern is None:
                 if keyword in ocr_text:
                     category_matches.append(keyword)
             else:
-                if re.search(rf'\b{re.escape(keyword)}\b', text_lower):
+                if pattern.search(text_lower):
                     category_matches.append(keyword)
 
         details["category_matches"][category] = category_matches
@@ -120,6 +133,16 @@ def _is_korean(text: str) -> bool:
     return bool(re.search(r'[가-힣]', text))
 
 
+# 카테고리 → [(키워드, 영어 키워드의 단어 경계 정규식 또는 None)] (한 번만 컴파일)
+_KEYWORD_PATTERNS = {
+    category: [
+        (keyword, None if _is_korean(keyword) else re.compile(rf'\b{re.escape(keyword)}\b'))
+        for keyword in keywords
+    ]
+    for category, keywords in LABEL_KEYWORDS.items()
+}
+
+
 def get_validation_summary(details: dict) -> str:
     """검증 상세 정보를 요약 문자열로 반환"""
     summary_parts = []
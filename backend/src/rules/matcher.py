@@ -0,0 +1,210 @@
+# backend/src/rules/matcher.py
+"""
+다중 키워드 매처 (규칙 세트의 모든 키워드를 텍스트 한 번 스캔으로 찾기)
+
+키워드마다 정규식을 돌리면 O(키워드 수 × 텍스트 길이)라서 키워드가 많은 국가(EU 127개)에서 느리다.
+모든 키워드를 trie 모양의 정규식 하나로 합쳐 텍스트를 한 번만 훑는다.
+
+- 패턴은 (?=[첫 글자])(?=(trie)) 형태라 위치마다 그 위치에서 시작하는 가장 긴 키워드 하나를 돌려준다.
+  같은 위치에서 시작하는 다른 키워드는 반드시 그 키워드의 접두어이므로 미리 계산한 접두어 목록으로 모두 복원한다.
+  (겹치는 매칭도 빠짐없이 찾는다: 예) '대두유' 안의 '대두', '두유')
+- 정규식 엔진은 trie 노드의 분기를 하나씩 비교하므로, 분기가 많은 노드(원재료 온톨로지로 용어가 수만 개일 때 첫 글자 등)는
+  분기를 글자 집합 lookahead로 묶어 단계마다 비교 횟수가 용어 수에 거의 무관하게(로그) 한다. (_BRANCH_GROUP)
+- 영어/숫자 키워드는 정규식 \\b...\\b와 같은 단어 경계 조건을 적용하고,
+  한글이 들어간 키워드는 부분 문자열로 매칭한다. (OCR 특성상 띄어쓰기/조사 등 변형이 많음)
+- 입력은 이미 소문자로 바꾼 텍스트, 키워드는 normalize_keyword 결과 기준
+"""
+import re
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+
+def is_korean(s: str) -> bool:
+    """문자열에 한글이 포함되어 있으면 True"""
+    for ch in s:
+        if "\uac00" <= ch <= "\ud7a3":
+            return True
+    return False
+
+
+def normalize_keyword(kw: Optional[str]) -> str:
+    return (kw or "").strip().lower()
+
+
+class KeywordHit(NamedTuple):
+    keyword_id: int
+    start: int
+    end: int
+    line: int  # 텍스트의 '\n' 기준 줄 번호 (0부터)
+
+
+def _is_word_char(ch: str) -> bool:
+    # 정규식 \w (유니코드)와 같은 판정
+    return ch.isalnum() or ch == "_"
+
+
+def _is_boundary(text: str, pos: int) -> bool:
+    """정규식 \\b와 같은 판정: pos 앞뒤 문자 중 정확히 하나만 단어 문자"""
+    before = pos > 0 and _is_word_char(text[pos - 1])
+    after = pos < len(text) and _is_word_char(text[pos])
+    return before != after
+
+
+def is_word_match(text: str, start: int, end: int) -> bool:
+    """text[start:end]가 \\b...\\b 조건을 만족하는지 (영어/숫자 키워드 매칭 조건)"""
+    return _is_boundary(text, start) and _is_boundary(text, end)
+
+
+# trie 노드 하나에서 글자 집합으로 묶지 않고 바로 비교하는 최대 분기 수
+_BRANCH_GROUP = 8
+
+
+def _alternation(branches: Sequence[Tuple[str, str]]) -> str:
+    """
+    (첫 글자, 분기 패턴) 목록 → 분기 중 하나 (첫 글자가 모두 다르므로 맞는 분기는 많아야 하나)
+    분기가 _BRANCH_GROUP개보다 많으면 _BRANCH_GROUP개 이하의 묶음으로 나누고 묶음마다 (?=[첫 글자들]) 검사를 앞에 둔다. (재귀)
+    """
+    if len(branches) == 1:
+        return branches[0][1]
+    if len(branches) <= _BRANCH_GROUP:
+        return "(?:" + "|".join(pattern for _, pattern in branches) + ")"
+    size = -(-len(branches) // _BRANCH_GROUP)
+    groups = [branches[i:i + size] for i in range(0, len(branches), size)]
+    return "(?:" + "|".join(
+        "(?=[" + "".join(re.escape(ch) for ch, _ in group) + "])" + _alternation(group) for group in groups
+    ) + ")"
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """키워드 목록 → trie 정규식 (같은 접두어는 한 번만 비교, 끝난 키워드 뒤는 greedy optional → 가장 긴 매칭 우선)"""
+    root: Dict[str, dict] = {}
+    for word in words:
+        node = root
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [(ch, re.escape(ch) + build(child)) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = _alternation(branches)
+        if "" in node:
+            return f"(?:{body})?"
+        return body
+
+    return build(root)
+
+
+class MultiKeywordMatcher:
+    """
+    키워드 목록을 한 번 컴파일해 두고 텍스트 한 번 스캔으로 모든 출현 위치를 찾는다.
+
+    keyword_id는 정규화한 키워드의 순번이다. 같은 키워드가 여러 번 들어오면 같은 id를 쓴다. (id_of 참고)
+    """
+
+    def __init__(self, keywords: Iterable[Optional[str]]):
+        self.keywords: List[str] = []
+        self._ids: Dict[str, int] = {}
+        for kw in keywords:
+            k = normalize_keyword(kw)
+            if k and k not in self._ids:
+                self._ids[k] = len(self.keywords)
+                self.keywords.append(k)
+
+        self._lengths: Sequence[int] = tuple(len(k) for k in self.keywords)
+        # 단어 경계 검사가 필요한 키워드 (한글이 없는 키워드)
+        self._bounded: Sequence[int] = tuple(not is_korean(k) for k in self.keywords)
+        # 가장 긴 매칭 키워드 → 같은 위치에서 함께 매칭되는 키워드 id (자기 자신 포함, 짧은 순)
+        self._prefixes: Dict[str, Tuple[int, ...]] = {
+            k: tuple(sorted(
+                (self._ids[k[:n]] for n in range(1, len(k) + 1) if k[:n] in self._ids),
+                key=lambda i: len(self.keywords[i])
+            ))
+            for k in self.keywords
+        }
+        self._pattern = None
+        if self.keywords:
+            # 앞의 문자 집합 검사는 키워드 첫 글자가 아닌 위치를 trie 비교 없이 빨리 건너뛰기 위한 것
+            first_chars = "".join(sorted({re.escape(k[0]) for k in self.keywords}))
+            self._pattern = re.compile(f"(?=[{first_chars}])(?=({_trie_pattern(self.keywords)}))")
+
+    @classmethod
+    def from_tables(
+        cls,
+        keywords: List[str],
+        lengths: Sequence[int],
+        bounded: Sequence[int],
+        prefix_ptr: Sequence[int],
+        prefix_ids: Sequence[int],
+        pattern: str
+    ) -> "MultiKeywordMatcher":
+        """
+        미리 계산한 표로 매처 복원 (src/rules/artifact.py)
+        - 정규화/접두어 계산/trie 생성 없이 정규식 컴파일만 한다.
+        - lengths / bounded는 mmap한 파일의 memoryview를 그대로 쓸 수 있다. (프로세스끼리 페이지 공유)
+        """
+        matcher = cls.__new__(cls)
+        matcher.keywords = keywords
+        matcher._ids = {k: i for i, k in enumerate(keywords)}
+        matcher._lengths = lengths
+        matcher._bounded = bounded
+        matcher._prefixes = {
+            k: tuple(prefix_ids[prefix_ptr[i]:prefix_ptr[i + 1]]) for i, k in enumerate(keywords)
+        }
+        matcher._pattern = re.compile(pattern) if keywords else None
+        return matcher
+
+    def tables(self) -> Tuple[List[str], List[int], List[int], List[int], List[int], str]:
+        """from_tables로 복원할 수 있는 표 (keywords, lengths, bounded, prefix_ptr, prefix_ids, pattern)"""
+        prefix_ptr = [0]
+        prefix_ids: List[int] = []
+        for k in self.keywords:
+            prefix_ids.extend(self._prefixes[k])
+            prefix_ptr.append(len(prefix_ids))
+        pattern = self._pattern.pattern if self._pattern is not None else ""
+        return list(self.keywords), list(self._lengths), [int(b) for b in self._bounded], prefix_ptr, prefix_ids, pattern
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    def id_of(self, keyword: Optional[str]) -> Optional[int]:
+        """원본 키워드 → keyword_id (빈 키워드/목록에 없는 키워드는 None)"""
+        return self._ids.get(normalize_keyword(keyword))
+
+    def is_bounded(self, keyword_id: int) -> bool:
+        """단어 경계 검사 대상 키워드인지 (한글이 없는 키워드)"""
+        return bool(self._bounded[keyword_id])
+
+    def positions(self, text_lower: str) -> Iterator[Tuple[int, int, int]]:
+        """
+        단어 경계 검사 없이 모든 부분 문자열 출현 (keyword_id, start, end), 시작 위치 순
+        - 키워드마다 매칭 조건이 다른 호출자가 is_bounded / is_word_match로 직접 판정할 때 쓴다. (줄 번호 계산 없음)
+        """
+        if self._pattern is None or not text_lower:
+            return
+        prefixes = self._prefixes
+        lengths = self._lengths
+        for m in self._pattern.finditer(text_lower):
+            start = m.start()
+            for keyword_id in prefixes[m.group(1)]:
+                yield keyword_id, start, start + lengths[keyword_id]
+
+    def finditer(self, text_lower: str) -> Iterator[KeywordHit]:
+        """모든 키워드 출현 위치 (시작 위치 순, 같은 위치는 짧은 키워드 먼저)"""
+        line = 0
+        line_pos = 0
+        for keyword_id, start, end in self.positions(text_lower):
+            if self._bounded[keyword_id] and not is_word_match(text_lower, start, end):
+                continue
+            line += text_lower.count("\n", line_pos, start)
+            line_pos = start
+            yield KeywordHit(keyword_id, start, end, line)
+
+    def lines_by_keyword(self, text_lower: str) -> Dict[int, List[int]]:
+        """keyword_id → 매칭된 줄 번호 목록 (오름차순, 중복 없음). 매칭 안 된 키워드는 키가 없다."""
+        lines: Dict[int, List[int]] = {}
+        for hit in self.finditer(text_lower):
+            found = lines.setdefault(hit.keyword_id, [])
+            if not found or found[-1] != hit.line:
+                found.append(hit.line)
+        return lines
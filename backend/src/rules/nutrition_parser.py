@@ -1,15 +1,27 @@
 import re
-from typing import Dict, Any
+from typing import Dict, Any, Union
+
+from src.rules.document import LabelDocument
 
 NUTRITION_KEYWORDS = [
     "나트륨", "탄수화물", "당류", "지방", "트랜스지방",
     "포화지방", "콜레스테롤", "단백질", "칼슘"
 ]
 
+# 모든 키워드를 한 번에 찾는 패턴: "키워드[:공백]*숫자 단위"
+# - lookahead라서 '트랜스지방' 안의 '지방'처럼 겹치는 위치도 빠짐없이 검사한다.
+# - 키워드마다 처음 값이 붙은 위치를 쓰므로 키워드별로 re.search하던 결과와 같다.
+_NUTRITION_SCAN = re.compile(
+    "(?=("
+    + "|".join(re.escape(k) for k in sorted(NUTRITION_KEYWORDS, key=len, reverse=True))
+    + r")[:\s]*(\d+(?:\.\d+)?)\s*(mg|g|㎎|㎍|ug|mcg))",
+    re.IGNORECASE
+)
+
 
-def parse_nutrition(text: str) -> Dict[str, Any]:
+def parse_nutrition(text: Union[str, LabelDocument]) -> Dict[str, Any]:
     """
-    OCR 텍스트에서 영양성분 정보를 추출한다.
+    OCR 텍스트(또는 LabelDocument)에서 영양성분 정보를 추출한다.
 
     Returns:
         {
@@ -18,19 +30,22 @@ def parse_nutrition(text: str) -> Dict[str, Any]:
             ...
         }
     """
-    if not text:
+    doc = LabelDocument.of(text)
+    if not doc:
         return {}
 
+    first: Dict[str, Any] = {}
+    for match in _NUTRITION_SCAN.finditer(doc.compact):
+        first.setdefault(match.group(1), match)
+
     result = {}
-    text_clean = text.replace(" ", "").replace(",", "")
 
     for keyword in NUTRITION_KEYWORDS:
-        pattern = rf"{keyword}[:\s]*(\d+(?:\.\d+)?)\s*(mg|g|㎎|㎍|ug|mcg)"
-        match = re.search(pattern, text_clean, re.IGNORECASE)
+        match = first.get(keyword)
 
         if match:
-            value = float(match.group(1))
-            unit = match.group(2)
+            value = float(match.group(2))
+            unit = match.group(3)
             unit = unit.replace("㎎", "mg").replace("㎍", "ug")
 
             if value == int(value):
@@ -0,0 +1,120 @@
+# backend/src/rules/ontology.py
+"""
+파생 원재료 온톨로지 (src/rules/ingredient_ontology.json)
+
+국가 규칙 파일의 키워드는 알레르겐마다 수십 개라, 실제 라벨에 쓰이는 파생 원재료
+(유청단백분말, sodium caseinate, 탈지분유, 대두레시틴 등)는 놓치기 쉽다.
+온톨로지는 '파생 원재료 → 상위 원재료' 관계를 규칙 파일과 따로 관리한다.
+
+- derivations: {부모: [자식, ...]}. 한 원재료가 여러 부모를 가질 수 있다. (예: 간장 → 대두, 밀)
+- 국가마다 원재료에서 부모를 따라가 처음 만나는 그 국가의 규칙 키워드로 알레르겐을 정한다. (resolve)
+  예) US: 유청단백분말 → 유청단백 → 유청 (Milk 키워드), JP: ... → 유청 → 우유 (乳 (Milk) 키워드)
+- 규칙 키워드에 닿지 않는 원재료는 그 국가에서 쓰지 않는다. 이미 규칙 키워드인 원재료도 키워드로 판정한다.
+- 원재료는 RuleSet.matcher(trie 정규식)에 규칙 키워드와 함께 들어가므로 용어 수가 늘어도 텍스트는 한 번만 스캔한다.
+"""
+import json
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Set, Tuple
+
+from src.rules.matcher import normalize_keyword
+
+ONTOLOGY_FILE = "ingredient_ontology.json"
+
+
+class IngredientOntology:
+    """
+    파생 원재료 → 부모 관계 (정규화한 용어 기준)
+
+    Args:
+        derivations: {부모: [자식, ...]} (ingredient_ontology.json의 derivations)
+    """
+
+    def __init__(self, derivations: Mapping[str, Sequence[str]]):
+        # 정규화한 용어 → 부모 목록 (파일 순서), 원본 표기 (처음 나온 것)
+        self._parents: Dict[str, List[str]] = {}
+        self._display: Dict[str, str] = {}
+        for parent, children in derivations.items():
+            p = normalize_keyword(parent)
+            if not p:
+                continue
+            self._display.setdefault(p, parent.strip())
+            for child in children or []:
+                c = normalize_keyword(child)
+                if not c or c == p:
+                    continue
+                self._display.setdefault(c, child.strip())
+                parents = self._parents.setdefault(c, [])
+                if p not in parents:
+                    parents.append(p)
+        self._check_cycles()
+
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> "IngredientOntology":
+        data = json.loads(raw.decode("utf-8")) if raw else {}
+        return cls(data.get("derivations", {}) or {})
+
+    def __len__(self) -> int:
+        return len(self._parents)
+
+    def terms(self) -> List[str]:
+        """파생 원재료 (부모가 있는 용어, 정규화, 파일 순서)"""
+        return list(self._parents)
+
+    def display(self, term: str) -> str:
+        return self._display.get(term, term)
+
+    def parents(self, term: str) -> List[str]:
+        return self._parents.get(normalize_keyword(term), [])
+
+    def resolve(self, term: str, is_target: Callable[[str], bool]) -> List[Tuple[str, ...]]:
+        """
+        term에서 부모를 따라가 is_target인 첫 조상까지의 사슬 (정규화, term부터 조상까지)
+        - 경로마다 처음 만난 조상에서 멈추고, 같은 조상에 닿는 사슬은 먼저 찾은(짧은) 것 하나만 돌려준다.
+        """
+        term = normalize_keyword(term)
+        chains: Dict[str, Tuple[str, ...]] = {}
+        # 너비 우선: 같은 조상에 닿는 사슬 중 짧은 것이 먼저 나온다
+        frontier: List[Tuple[str, ...]] = [(term,)]
+        seen: Set[str] = {term}
+        while frontier:
+            next_frontier: List[Tuple[str, ...]] = []
+            for chain in frontier:
+                for parent in self._parents.get(chain[-1], ()):
+                    if is_target(parent):
+                        chains.setdefault(parent, chain + (parent,))
+                    elif parent not in seen:
+                        seen.add(parent)
+                        next_frontier.append(chain + (parent,))
+            frontier = next_frontier
+        return list(chains.values())
+
+    def _check_cycles(self) -> None:
+        state: Dict[str, int] = {}  # 1: 방문 중, 2: 완료
+
+        def visit(term: str, path: List[str]) -> None:
+            mark = state.get(term)
+            if mark == 2:
+                return
+            if mark == 1:
+                cycle = path[path.index(term):] + [term]
+                raise ValueError(f"원재료 온톨로지에 순환 관계가 있습니다: {' → '.join(cycle)}")
+            state[term] = 1
+            path.append(term)
+            for parent in self._parents.get(term, ()):
+                visit(parent, path)
+            path.pop()
+            state[term] = 2
+
+        for term in self._parents:
+            visit(term, [])
+
+
+def load_ontology(path: Optional[str]) -> Tuple[bytes, IngredientOntology]:
+    """온톨로지 파일 → (원본 바이트, IngredientOntology). 파일이 없으면 빈 온톨로지"""
+    raw = b""
+    if path:
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+        except FileNotFoundError:
+            raw = b""
+    return raw, IngredientOntology.from_bytes(raw)
@@ -0,0 +1,301 @@
+# backend/src/rules/registry.py
+"""
+국가별 규칙 레지스트리
+
+check_risks가 호출될 때마다 규칙 JSON을 열어 파싱하고, 키워드를 다시 strip/lower하던 것을
+국가마다 한 번만 읽어 불변 구조(RuleSet)로 컴파일해 두고 모든 요청/스레드가 공유한다.
+
+- RuleSet: 정규화된 키워드, 전체 키워드를 한 번에 찾는 매처(src/rules/matcher.py),
+  미리 만든 rule_id / rule_description, 규칙 버전(rules_version)
+  매처에는 알레르겐 키워드 외에 알레르겐 이름과 경고 마커(markers)도 넣어, 경고 문구 근접 판정에 쓸 위치를 같은 스캔에서 얻는다.
+- get()은 파일의 (mtime, 크기)를 확인해 바뀌었으면 다시 읽는다. 내용 해시까지 같으면(touch 등)
+  기존 RuleSet을 그대로 쓴다. 새 RuleSet은 다 만든 뒤 한 번에 교체하므로,
+  요청은 항상 옛 규칙 또는 새 규칙 중 하나 전체로 판정된다.
+  다시 읽다가 실패하면(쓰는 중인 파일, JSON 오류, 온톨로지 순환 등) 로그를 남기고 이전 RuleSet을 계속 쓴다.
+  실패한 stamp도 기록하므로 파일이 다시 바뀔 때까지 재시도하지 않는다. (처음 읽을 때의 실패는 그대로 예외)
+- rules_version = CHECKER_VERSION + 규칙 파일 내용 해시. check_risks 결과에 포함되어 리포트와 함께 저장된다.
+- 배포 때 빌드한 규칙 아티팩트(src/rules/artifact.py)가 있고 버전이 같으면 JSON 파싱/매처 생성 없이 아티팩트에서 읽는다.
+- 파생 원재료 온톨로지(src/rules/ontology.py)가 있으면 국가 키워드에 닿는 원재료를 매처 끝에 넣고
+  알레르겐마다 파생 사슬(CompiledAllergen.derived)을 둔다. 온톨로지 파일 내용도 rules_version에 들어간다.
+"""
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Set, Tuple
+
+from src.rules.artifact import RuleArtifact
+from src.rules.matcher import MultiKeywordMatcher, normalize_keyword
+from src.rules.ontology import IngredientOntology, load_ontology
+
+
+class DerivedTerm(NamedTuple):
+    """온톨로지에서 온 파생 원재료 하나 (알레르겐 키워드에 닿는 사슬)"""
+    term: str                  # 원재료 원본 표기 (리포트 hint에 그대로 표시)
+    term_id: int               # RuleSet.matcher id
+    chain: Tuple[str, ...]     # 원재료 → ... → 규칙 키워드 (예: 유청단백분말, 유청단백, 유청)
+
+
+@dataclass(frozen=True)
+class CompiledAllergen:
+    """major_allergens 항목 하나의 컴파일 결과"""
+    name: str
+    keywords: Tuple[str, ...]                      # 원본 키워드 (리포트 hint에 그대로 표시)
+    normalized: Tuple[str, ...]                    # strip().lower() 결과
+    keyword_ids: Tuple[Optional[int], ...]         # keywords와 같은 순서, RuleSet.matcher의 id (빈 키워드는 None)
+    name_id: Optional[int]                         # 알레르겐 이름의 RuleSet.matcher id (빈 이름은 None)
+    details: Mapping[str, Any]
+    rule_id: str
+    rule_description: str
+    derived: Tuple[DerivedTerm, ...] = ()          # 이 알레르겐 키워드에 닿는 파생 원재료 (온톨로지 순서)
+
+
+@dataclass(frozen=True)
+class RuleSet:
+    country: str
+    version: str
+    data: Mapping[str, Any] = field(default_factory=dict)
+    allergens: Tuple[CompiledAllergen, ...] = ()
+    matcher: MultiKeywordMatcher = field(default_factory=lambda: MultiKeywordMatcher(()))
+    marker_ids: FrozenSet[int] = frozenset()      # 경고 마커의 matcher id
+
+    def __bool__(self) -> bool:
+        # 규칙 파일이 없거나 비어 있으면 False (기존 `if not rules` 판정과 동일)
+        return bool(self.data)
+
+
+def _freeze(value: Any) -> Any:
+    """JSON 값을 읽기 전용 구조로 변환 (공유 RuleSet이 요청 중에 수정되지 않도록)"""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """_freeze의 역변환 (리포트에 넣을 수정 가능한 사본)"""
+    if isinstance(value, Mapping):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(v) for v in value]
+    return value
+
+
+class RuleRegistry:
+    """
+    국가 코드 → RuleSet 캐시 (스레드 안전, 파일 변경 시 자동 재로딩)
+
+    Args:
+        files: 국가 코드 → 규칙 파일명
+        rules_dir: 규칙 파일 디렉토리
+        checker_version: 판정 로직 버전 (rules_version 접두어)
+        describe: (country, allergen_name) → rule_description
+        markers: 경고 마커 (소문자, RuleSet.matcher에 함께 넣는다)
+        artifact: 컴파일된 규칙 아티팩트 (있으면 버전이 같은 국가는 JSON 대신 아티팩트에서 읽는다)
+        ontology_path: 파생 원재료 온톨로지 파일 (없으면 규칙 키워드만 쓴다)
+    """
+
+    def __init__(
+        self,
+        files: Mapping[str, str],
+        rules_dir: str,
+        checker_version: str,
+        describe: Callable[[str, str], str],
+        markers: Sequence[str] = (),
+        artifact: Optional[RuleArtifact] = None,
+        ontology_path: Optional[str] = None
+    ):
+        self._files = dict(files)
+        self._rules_dir = rules_dir
+        self._checker_version = checker_version
+        self._describe = describe
+        self._markers = tuple(markers)
+        self._artifact = artifact
+        self._ontology_path = ontology_path
+        self._lock = threading.Lock()
+        # country → ((규칙 파일 stamp, 온톨로지 파일 stamp), RuleSet). stamp는 (mtime_ns, size) 또는 None
+        self._entries: Dict[str, Tuple[Tuple[Optional[Tuple[int, int]], ...], RuleSet]] = {}
+        # 온톨로지는 국가끼리 공유 (stamp, 원본 바이트, 파싱 결과)
+        self._ontology: Optional[Tuple[Optional[Tuple[int, int]], bytes, IngredientOntology]] = None
+
+    def path(self, country: str) -> Optional[str]:
+        filename = self._files.get((country or "").upper())
+        if not filename:
+            return None
+        filepath = os.path.join(self._rules_dir, filename)
+        return filepath if os.path.isfile(filepath) else None
+
+    def get(self, country: str) -> RuleSet:
+        """현재 규칙 (파일이 바뀌었으면 다시 컴파일해서 교체)"""
+        country = (country or "").upper()
+        filepath = self.path(country)
+        stamp = (self._stamp(filepath), self._stamp(self._ontology_path))
+        entry = self._entries.get(country)
+        if entry is not None and entry[0] == stamp:
+            return entry[1]
+
+        with self._lock:
+            entry = self._entries.get(country)
+            if entry is not None and entry[0] == stamp:
+                return entry[1]
+            try:
+                stamp, rule_set = self._reload(country, filepath, entry)
+            except Exception as e:
+                if entry is None:
+                    raise
+                # 쓰는 중이거나 잘못된 규칙/온톨로지 파일: 이전 규칙을 계속 쓰고,
+                # 실패한 stamp를 기록해 파일이 다시 바뀔 때까지 매 요청 재시도하지 않는다.
+                print(f"[rules] {country} 규칙 재로딩 실패, 이전 규칙 유지 ({entry[1].version}): {type(e).__name__}: {e}")
+                stamp, rule_set = (self._stamp(filepath), self._stamp(self._ontology_path)), entry[1]
+            self._entries[country] = (stamp, rule_set)
+            return rule_set
+
+    def _reload(
+        self,
+        country: str,
+        filepath: Optional[str],
+        entry: Optional[Tuple[Tuple[Optional[Tuple[int, int]], ...], RuleSet]]
+    ) -> Tuple[Tuple[Optional[Tuple[int, int]], ...], RuleSet]:
+        """규칙/온톨로지 파일을 읽어 (stamp, RuleSet). 파싱/컴파일 실패는 예외 그대로 (self._lock 안에서 호출)"""
+        raw = b""
+        if filepath:
+            with open(filepath, "rb") as f:
+                raw = f.read()
+        ontology_stamp, ontology_raw, ontology = self._read_ontology()
+        # 읽는 도중 파일이 바뀌었을 수 있으므로 읽은 뒤의 stamp로 기록 (다음 호출에서 다시 확인)
+        stamp = (self._stamp(filepath), ontology_stamp)
+        version = self._version(raw, ontology_raw)
+        if entry is not None and entry[1].version == version:
+            return stamp, entry[1]
+        rule_set = self._load_artifact(country, version)
+        if rule_set is None:
+            rule_set = self._compile(country, raw, version, ontology)
+        return stamp, rule_set
+
+    def version(self, country: str) -> str:
+        return self.get(country).version
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    @staticmethod
+    def _stamp(filepath: Optional[str]) -> Optional[Tuple[int, int]]:
+        if not filepath:
+            return None
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _read_ontology(self) -> Tuple[Optional[Tuple[int, int]], bytes, IngredientOntology]:
+        """온톨로지 (파일이 바뀌었을 때만 다시 읽는다. self._lock 안에서 호출)"""
+        stamp = self._stamp(self._ontology_path)
+        if self._ontology is None or self._ontology[0] != stamp:
+            raw, ontology = load_ontology(self._ontology_path if stamp else None)
+            self._ontology = (stamp, raw, ontology)
+        return self._ontology
+
+    def _version(self, raw: bytes, ontology_raw: bytes = b"") -> str:
+        digest = hashlib.sha1(self._checker_version.encode("utf-8"))
+        digest.update(raw)
+        if ontology_raw:
+            digest.update(b"\x00")
+            digest.update(ontology_raw)
+        return f"{self._checker_version}-{digest.hexdigest()[:12]}"
+
+    def _compile(self, country: str, raw: bytes, version: str, ontology: IngredientOntology) -> RuleSet:
+        data = json.loads(raw.decode("utf-8")) if raw else {}
+        entries = data.get("major_allergens", [])
+        names = [(allergen.get("name", "") or "").strip() for allergen in entries]
+        keywords = [list(allergen.get("keywords", []) or []) for allergen in entries]
+        derived = self._resolve_derived(ontology, keywords, names)
+        # 알레르겐 키워드가 먼저 id를 받는다. 이름/마커가 키워드와 같으면 같은 id를 쓴다. 파생 원재료는 맨 뒤
+        matcher = MultiKeywordMatcher(
+            [kw for kws in keywords for kw in kws] + names + list(self._markers)
+            + [chain[0] for chains in derived for chain in chains]
+        )
+        ids = [
+            (
+                [matcher.id_of(kw) for kw in kws],
+                matcher.id_of(name),
+                [(matcher.id_of(chain[0]), chain) for chain in chains],
+            )
+            for kws, name, chains in zip(keywords, names, derived)
+        ]
+        marker_ids = [matcher.id_of(m) for m in self._markers if matcher.id_of(m) is not None]
+        return self._assemble(country, version, data, matcher, ids, marker_ids)
+
+    def _resolve_derived(
+        self,
+        ontology: IngredientOntology,
+        keywords: Sequence[Sequence[str]],
+        names: Sequence[str]
+    ) -> List[List[Tuple[str, ...]]]:
+        """
+        알레르겐마다 온톨로지 파생 원재료의 사슬 (원본 표기, 원재료 → ... → 이 국가 규칙 키워드)
+        - 규칙 키워드/알레르겐 이름/경고 마커와 같은 원재료는 빼고, 원재료 하나는 알레르겐마다 사슬 하나만 둔다.
+        """
+        owners: Dict[str, List[int]] = {}  # 정규화한 규칙 키워드 → 그 키워드를 가진 알레르겐 순번
+        for index, kws in enumerate(keywords):
+            for kw in kws:
+                k = normalize_keyword(kw)
+                if k and index not in owners.setdefault(k, []):
+                    owners[k].append(index)
+        taken = set(owners) | {normalize_keyword(n) for n in names} | {normalize_keyword(m) for m in self._markers}
+
+        derived: List[List[Tuple[str, ...]]] = [[] for _ in keywords]
+        for term in ontology.terms():
+            if term in taken:
+                continue
+            assigned: Set[int] = set()
+            for chain in ontology.resolve(term, owners.__contains__):
+                display = tuple(ontology.display(t) for t in chain)
+                for index in owners[chain[-1]]:
+                    if index not in assigned:
+                        assigned.add(index)
+                        derived[index].append(display)
+        return derived
+
+    def _load_artifact(self, country: str, version: str) -> Optional[RuleSet]:
+        """컴파일된 아티팩트(src/rules/artifact.py)에 같은 버전이 있으면 그걸로 RuleSet 조립"""
+        if self._artifact is None:
+            return None
+        section = self._artifact.section(country, version, self._checker_version, self._markers)
+        if section is None:
+            return None
+        return self._assemble(country, version, section.data, section.matcher, section.allergens, section.marker_ids)
+
+    def _assemble(
+        self,
+        country: str,
+        version: str,
+        data: Dict[str, Any],
+        matcher: MultiKeywordMatcher,
+        ids: Sequence[Tuple[Sequence[Optional[int]], Optional[int], Sequence[Tuple[int, Sequence[str]]]]],
+        marker_ids: Iterable[int]
+    ) -> RuleSet:
+        """ids: major_allergens 순서, (키워드별 matcher id, 이름의 matcher id, [(파생 원재료 matcher id, 사슬)])"""
+        allergens = []
+        for allergen, (keyword_ids, name_id, derived) in zip(data.get("major_allergens", []), ids):
+            name = (allergen.get("name", "") or "").strip()
+            keywords = tuple(allergen.get("keywords", []) or [])
+            allergens.append(CompiledAllergen(
+                name=name,
+                keywords=keywords,
+                normalized=tuple(normalize_keyword(kw) for kw in keywords),
+                keyword_ids=tuple(keyword_ids),
+                name_id=name_id,
+                details=_freeze(allergen.get("details", {})),
+                rule_id=f"{country}_{name.upper().replace(' ', '_')}_LABELING_001",
+                rule_description=self._describe(country, name),
+                derived=tuple(DerivedTerm(chain[0], term_id, tuple(chain)) for term_id, chain in derived),
+            ))
+        return RuleSet(
+            country=country, version=version, data=_freeze(data), allergens=tuple(allergens),
+            matcher=matcher, marker_ids=frozenset(marker_ids),
+        )
@@ -0,0 +1,15 @@
+"""
+pytest 공통 설정 (backend 디렉토리에서: python -m pytest)
+
+- backend를 import 경로에 넣는다. (src.* 패키지)
+- DB/이미지 저장 위치(DATA_DIR)를 임시 디렉토리로 바꾼다. src.api.db가 import 시점에 경로를 정하므로
+  테스트 모듈이 import되기 전에 설정해야 한다.
+"""
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="kfood-test-")
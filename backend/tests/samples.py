@@ -0,0 +1,60 @@
+"""
+테스트/벤치마크 공용 라벨 문구 (scripts/bench_*.py도 여기서 가져다 쓴다)
+
+실제 라벨에서 자주 보이는 문구 조각을 무작위로 이어 붙여, 경계 사례(교차오염 문맥, 경고 문구,
+영양성분, 영어 단어 경계, 소문자화하면 길이가 바뀌는 글자)를 섞은 텍스트를 만든다.
+"""
+import random
+
+from src.rules.checker import RULE_FILES
+
+# 실제 라벨에서 자주 보이는 문구 (교차오염 문맥, 경고 문구, 영양성분, 단어 경계 사례, 알레르겐 없는 원재료 포함)
+FRAGMENTS = [
+    "원재료명: 밀가루(밀:미국산), 설탕, 우유, 대두유, 땅콩버터",
+    "Ingredients: wheat flour, sugar, MILK powder, soybean oil, peanuts",
+    "알레르기 유발물질: 우유, 대두, 밀 함유",
+    "Contains: Milk, Soy, Wheat.",
+    "이 제품은 난류, 게, 새우, 호두를 사용한 제품과 같은 제조시설에서 제조하고 있습니다",
+    "- 이 제품은 난류, 새우, 게, 땅콩을 사용한 제품과 같은 시설에서 제조",
+    "May contain traces of tree nuts and sesame.",
+    "Processed in a facility that also processes eggs",
+    "나트륨 1,790mg 78%  탄수화물 79g 24%  당류 4 g  지방 16g 트랜스지방 0g 포화지방 8g 콜레스테롤 0mg 단백질 10g 칼슘 120mg",
+    "Nutrition Facts Serving size 1 cup Calories 250 Total Fat 12g Sodium 470mg",
+    "영양성분 1회 제공량 120g 총 내용량 240g",
+    "유통기한: 2026.12.31 까지 제조원: (주)케이푸드 판매원: 케이마트",
+    "Store in a cool dry place. Best before see bottom of package.",
+    "주의: 개봉 후 냉장 보관하세요. 경고: 어린이 손이 닿지 않는 곳",
+    "참깨, 겨자, 셀러리, 오징어, 굴, 조개, 홍합 사용",
+    "buttermilk, creamy, eggs, egg-free, fishy, codfish, soy-sauce, almonds",
+    "乳, 小麦, 卵, 落花生, えび, かに, そば, くるみ",
+    "lúa mì, trứng, sữa, đậu phộng, đậu nành, tôm, cua, hải sản",
+    "whey protein isolate, casein, lactose, 유청단백분말, 탈지분유, 대두레시틴",
+    "glucose syrup, modified corn starch, natural flavours, citric acid, beetroot red",
+    "정제수, 과당, 고춧가루, 양파, 마늘, 생강, 후추, 구연산, 잔탄검",
+    "밀 함유. 우유 포함. 알레르기 정보: 새우",
+    "    \r\n  .  。 ",
+    "shared equipment with peanuts. 동일 시설에서 제조",
+    "Warning: contains sulphites. preservative E220",
+    "lobster bisque with crawfish, 킹크랩, 가재, 랍스터",
+    "글루텐프리 귀리 호밀 보리 스펠트 카무트",
+    "Allergy advice: for allergens see ingredients in bold",
+    "사용한\n제품, 같은 제조\n시설, 땅콩 사용한  제품",
+    "ÇİLEK İçerik ΣΟΓΙΑ",
+]
+SEPARATORS = ["\n", ". ", " ", "\r\n", "。", "\r"]
+# 규칙 파일이 있는 국가 + 없는 국가
+COUNTRIES = list(RULE_FILES) + ["XX"]
+OCR_ENGINE = "google"
+LANGUAGE = "한국어/영어 혼합"
+# 빈 텍스트 / 공백 / 한 단어
+EDGE_TEXTS = ["", "   ", "밀", "milk"]
+
+
+def make_text(rng: random.Random, fragments: int) -> str:
+    return "".join(rng.choice(FRAGMENTS) + rng.choice(SEPARATORS) for _ in range(fragments))
+
+
+def sample_texts(count: int, max_fragments: int, seed: int = 7) -> list:
+    """무작위 라벨 텍스트 count개 + EDGE_TEXTS"""
+    rng = random.Random(seed)
+    return [make_text(rng, rng.randint(0, max_fragments)) for _ in range(count)] + EDGE_TEXTS
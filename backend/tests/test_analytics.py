@@ -0,0 +1,50 @@
+"""컴플라이언스 통계 롤업 (src/api/analytics.py)"""
+import sqlite3
+
+from src.api import analytics, retention
+from src.api.db import SHARD_PATHS, get_analytics, get_report, init_db, save_report, shard_for
+from src.rules.checker import get_rules_version
+
+ARCHIVED_DAY = "2001-02-03"
+
+
+def _save(text: str, risks: list) -> str:
+    return save_report(
+        user_id="analytics-user",
+        country="US",
+        ocr_engine="google",
+        ocr_text=text,
+        allergens=[],
+        nutrition={},
+        risks=risks,
+        promo={},
+        rules_version=get_rules_version("US"),
+    )
+
+
+def test_rebuild_keeps_archived_reports():
+    init_db()
+    _save("원재료: 설탕", [])
+    archived_id = _save("원재료명: 밀가루", [{"allergen": "Wheat", "severity": "HIGH"}])
+    before = get_analytics()["totals"]
+
+    # 오래된 리포트로 만들어 reports_archive로 보관
+    conn = sqlite3.connect(SHARD_PATHS[shard_for(archived_id)], isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.execute("UPDATE reports SET created_at = ? WHERE id = ?", (f"{ARCHIVED_DAY} 00:00:00", archived_id))
+        assert retention.archive_reports(conn, days=365) >= 1
+        assert conn.execute(f"SELECT COUNT(*) FROM {retention.ARCHIVE_TABLE} WHERE id = ?", (archived_id,)).fetchone()[0] == 1
+    finally:
+        conn.close()
+    assert get_report(archived_id, fields=["risks"])["risks"][0]["allergen"] == "Wheat"
+
+    analytics.main(["rebuild"])
+
+    after = get_analytics()["totals"]
+    assert after["reports"] == before["reports"]
+    assert after["high_risk_reports"] == before["high_risk_reports"]
+    archived = get_analytics(start=ARCHIVED_DAY, end=ARCHIVED_DAY, bucket="day", country="US")
+    assert archived["totals"]["reports"] == 1
+    assert archived["totals"]["high_risk_reports"] == 1
+    assert archived["top_allergens"] == [{"allergen": "Wheat", "reports": 1, "high_risk_reports": 1}]
@@ -0,0 +1,81 @@
+"""
+통합 라벨 분석(src/rules/analyzer.py) / 전체 국가 판정(check_risks_multi) 결과 비교
+
+analyze_label은 validate_label_image / extract_allergens / parse_nutrition / check_risks를
+따로 호출한 것과, check_risks_multi는 국가마다 check_risks를 호출한 것과 같아야 한다.
+"""
+import json
+
+import pytest
+
+from src.rules.allergen_parser import extract_allergens
+from src.rules.analyzer import analyze_label
+from src.rules.checker import check_risks, check_risks_multi
+from src.rules.document import LabelDocument
+from src.rules.label_validator import validate_label_image
+from src.rules.nutrition_parser import parse_nutrition
+from tests.samples import COUNTRIES, LANGUAGE, OCR_ENGINE, sample_texts
+
+# 조각을 무작위로 이은 텍스트 + 따로 확인할 사례
+TEXTS = sample_texts(150, 8) + [
+    # 교차오염 문맥 앞뒤 줄 / 문맥 표현이 줄을 넘는 경우
+    "원재료명: 밀가루\n- 이 제품은 난류, 새우를\n사용한 제품과 같은 제조시설에서 제조\n우유 함유",
+    # 소문자 변환이 위치를 바꾸는 글자 (분석기를 하나씩 호출하는 경로)
+    "ÇİLEK İçerik ΣΟΓΙΑ\nIngredients: milk, wheat",
+    # 경고 마커가 window(120자) 경계 근처
+    "Contains: " + "x" * 115 + " milk",
+    "Contains: " + "x" * 125 + " milk",
+    # OCR 오인식 유사 표기 (fuzzy)
+    "Ingredients: rnilk powder, peanuf oil\n원재료명: 땅코ㅇ, 마요네스",
+    # 영어 단어 경계 / 파생 원재료
+    "buttermilk, creamy, egg-free, codfish, sodium caseinate, 유청단백분말",
+    # 영양성분만
+    "나트륨 470mg 탄수화물 79g 당류 4g 지방 16g 단백질 10g",
+]
+
+
+def separate(text: str, country: str) -> tuple:
+    """api_analyze의 기존 호출 순서 그대로"""
+    doc = LabelDocument(text)
+    validation = validate_label_image(doc)
+    allergens = extract_allergens(doc)
+    nutrition = parse_nutrition(doc)
+    pack = check_risks(doc, country, OCR_ENGINE, LANGUAGE, bool(nutrition))
+    return validation, allergens, nutrition, pack
+
+
+def fused(text: str, country: str) -> tuple:
+    result = analyze_label(text, country, OCR_ENGINE, LANGUAGE)
+    return result.validation, result.allergens, result.nutrition, result.report_pack
+
+
+def _normalize(result: tuple) -> str:
+    validation, allergens, nutrition, pack = result
+    return json.dumps([list(validation), sorted(allergens), nutrition, pack], ensure_ascii=False, sort_keys=True)
+
+
+@pytest.mark.parametrize("country", COUNTRIES)
+def test_analyze_label_matches_separate_calls(country):
+    for text in TEXTS:
+        assert _normalize(fused(text, country)) == _normalize(separate(text, country)), text
+
+
+def test_analyze_label_accepts_document():
+    text = TEXTS[0] or "원재료명: 우유"
+    assert _normalize(fused(LabelDocument(text), "US")) == _normalize(separate(text, "US"))
+
+
+def test_check_risks_multi_matches_per_country():
+    for text in TEXTS:
+        multi = check_risks_multi(text, COUNTRIES, OCR_ENGINE, LANGUAGE, True)
+        assert list(multi) == COUNTRIES
+        for country in COUNTRIES:
+            assert multi[country] == check_risks(text, country, OCR_ENGINE, LANGUAGE, True), (country, text)
+
+
+def test_check_risks_multi_normalizes_countries():
+    text = "원재료명: 밀가루, 우유\nContains: soy"
+    multi = check_risks_multi(text, ["us", "JP", "US", "xx"])
+    assert list(multi) == ["US", "JP", "XX"]
+    assert multi["US"] == check_risks(text, "US")
+    assert multi["XX"] == check_risks(text, "XX")
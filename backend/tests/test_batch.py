@@ -0,0 +1,54 @@
+"""대량 규정 검사 (src/rules/batch.py): check_risks_batch == 텍스트마다 check_risks"""
+import random
+
+import pytest
+
+from src.rules import batch
+from src.rules.batch import BatchItem, check_risks_batch
+from src.rules.checker import check_risks
+from tests.samples import COUNTRIES, EDGE_TEXTS, LANGUAGE, OCR_ENGINE, sample_texts
+
+
+def _items(count: int, seed: int) -> list:
+    rng = random.Random(seed)
+    items = [
+        BatchItem(text, rng.choice(COUNTRIES), OCR_ENGINE, LANGUAGE, rng.random() < 0.5)
+        for text in sample_texts(count, 12, seed)
+    ]
+    return items + [BatchItem(text, country) for text in EDGE_TEXTS for country in COUNTRIES]
+
+
+@pytest.fixture(params=["per_text", "vectorized"])
+def min_group(request, monkeypatch):
+    """vectorized: 작은 국가별 묶음도 행렬 경로로 판정"""
+    if request.param == "vectorized":
+        if not batch.vectorized_available():
+            pytest.skip("numpy/scipy 없음")
+        monkeypatch.setattr(batch, "MIN_VECTORIZED_GROUP", 1)
+    return batch.MIN_VECTORIZED_GROUP
+
+
+def test_batch_matches_check_risks(min_group):
+    items = _items(400, seed=7)
+    expected = [check_risks(*item) for item in items]
+    assert check_risks_batch(items) == expected
+
+
+def test_batch_chunks_and_fuzzy_findings(min_group, monkeypatch):
+    # 여러 덩어리로 나눠도, OCR 오인식 유사 표기(find_fuzzy_allergens)가 섞여도 같아야 한다
+    monkeypatch.setattr(batch, "CHUNK_SIZE", 16)
+    noisy = [
+        "Ingredients: rnilk powder, sugar, peanuf oil",
+        "원재료명: 땅코ㅇ, 설탕, 마요네스\nContains: rnilk",
+        "Ingredients: sodium caseinafe, wheal, s0y sauce",
+    ]
+    items = [BatchItem(text, country) for text in noisy for country in COUNTRIES] * 3 + _items(60, seed=11)
+    expected = [check_risks(*item) for item in items]
+    assert check_risks_batch(items) == expected
+
+
+def test_batch_keeps_input_order():
+    items = [BatchItem("원재료명: 우유", country) for country in ("US", "JP", "US", "XX", "JP")]
+    results = check_risks_batch(items)
+    assert [r["rules_version"] for r in results] == [check_risks(*item)["rules_version"] for item in items]
+    assert check_risks_batch([]) == []
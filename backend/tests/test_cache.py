@@ -0,0 +1,34 @@
+"""리포트 read-through 캐시 (src/api/cache.py, db.get_report)"""
+from src.api import db
+from src.api.cache import MISSING, report_cache
+from src.api.db import get_report, init_db, save_report
+from src.rules.checker import get_rules_version
+
+
+def _save() -> str:
+    return save_report(
+        user_id="cache-user", country="US", ocr_engine="google", ocr_text="원재료명: 밀가루" * 50,
+        allergens=["밀"], nutrition={}, risks=[], promo={}, summary={"status": "HIGH"},
+        rules_version=get_rules_version("US"),
+    )
+
+
+def test_projection_miss_decodes_only_requested_fields(monkeypatch):
+    init_db()
+    report_id = _save()
+    report_cache.invalidate(report_id)
+
+    def _fail(blob):
+        raise AssertionError("fields=summary 조회에서 ocr_text를 디코딩하면 안 됨")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(db, "decode_ocr_text", _fail)
+        assert get_report(report_id, fields=["summary"]) == {"id": report_id, "summary": {"status": "HIGH"}}
+    # 일부 필드만 읽은 결과는 캐시하지 않는다
+    assert report_cache.get(report_id) is MISSING
+
+    full = get_report(report_id)
+    assert report_cache.get(report_id) == full
+    # 전체 리포트가 캐시에 있으면 일부 필드 조회도 캐시에서 자른다
+    monkeypatch.setattr(db, "_find_report", lambda *args, **kwargs: None)
+    assert get_report(report_id, fields=["ocr_text"]) == {"id": report_id, "ocr_text": full["ocr_text"]}
@@ -0,0 +1,39 @@
+"""OCR 오인식 유사 매칭 (src/rules/fuzzy.py, check_risks의 fuzzy 단계)"""
+import pytest
+
+from src.rules.checker import check_risks
+
+
+def _fuzzy_high(text: str, country: str) -> dict:
+    """알레르겐 → evidence.fuzzy (유사 표기로만 찾은 HIGH)"""
+    return {
+        r["allergen"]: r["evidence"]["fuzzy"]
+        for r in check_risks(text, country)["risks"]
+        if r["severity"] == "HIGH" and r["evidence"].get("fuzzy")
+    }
+
+
+@pytest.mark.parametrize("country, text, allergen, match", [
+    ("US", "Ingredients: rnilk powder, sugar", "Milk", "rnilk ≈ milk"),
+    ("US", "Ingredients: sugar, peanuf oil", "Peanuts", "peanuf ≈ peanut"),
+    ("US", "원재료명: 땅코ㅇ, 설탕", "Peanuts", "땅코ㅇ ≈ 땅콩"),
+    ("US", "Ingredients: roasted almonds", "Tree Nuts", "almonds ≈ almond"),
+])
+def test_ocr_misreads_are_found(country, text, allergen, match):
+    found = _fuzzy_high(text, country)
+    assert match in found.get(allergen, [])
+    risk = next(r for r in check_risks(text, country)["risks"] if r["allergen"] == allergen)
+    assert risk["expert_check_required"]
+
+
+@pytest.mark.parametrize("country", ["US", "EU"])
+@pytest.mark.parametrize("text", [
+    "Directions: Heat in microwave for 2 minutes. Serves four.",
+    "Bitter chocolate flavour",
+    "Steel drum festival edition",
+    "Spell the name on the label",
+    "I scream, you scream",
+])
+def test_common_words_are_not_allergens(country, text):
+    assert _fuzzy_high(text, country) == {}
+    assert check_risks(text, country) == check_risks(text, country, fuzzy=False)
@@ -0,0 +1,123 @@
+"""스키마 마이그레이션 (src/api/migrations.py): user_version 도입 이전 DB에서 최신까지, 두 번 실행해도 같은 결과"""
+import json
+import sqlite3
+
+from src.api import search
+from src.api.migrations import LATEST_VERSION, MIGRATIONS, REPORT_DOC_SELECT, get_schema_version, run_migrations
+from src.api.storage import row_to_doc
+
+# user_version 도입 이전 db.init_db가 만들던 스키마 (reports 컬럼별 JSON 텍스트 + users)
+BASELINE_SCHEMA = """
+    CREATE TABLE reports (
+        id TEXT PRIMARY KEY,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        user_id TEXT NOT NULL DEFAULT 'anonymous',
+        country TEXT NOT NULL,
+        ocr_engine TEXT NOT NULL,
+        ocr_text TEXT,
+        allergens TEXT,
+        nutrition TEXT,
+        risks TEXT,
+        promo TEXT,
+        summary TEXT DEFAULT NULL,
+        input_data_status TEXT DEFAULT NULL,
+        correction_guide TEXT DEFAULT NULL,
+        regulatory_basis TEXT DEFAULT NULL
+    );
+    CREATE TABLE users (
+        id TEXT PRIMARY KEY,
+        email TEXT UNIQUE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+
+LEGACY_REPORTS = [
+    ("legacy01", "2024-05-01 09:00:00", "Ingredients: whole milk powder, sugar",
+     [{"allergen": "Milk", "severity": "HIGH"}]),
+    ("legacy02", "2024-05-01 10:00:00", "원재료명: 설탕, 소금", []),
+]
+
+
+def _baseline_db(path: str) -> None:
+    conn = sqlite3.connect(path)
+    try:
+        conn.executescript(BASELINE_SCHEMA)
+        for report_id, created_at, text, risks in LEGACY_REPORTS:
+            conn.execute(
+                """
+                INSERT INTO reports (id, created_at, user_id, country, ocr_engine, ocr_text,
+                                     allergens, nutrition, risks, promo, summary)
+                VALUES (?, ?, 'legacy-user', 'US', 'google', ?, '[]', '{}', ?, '{}', '{}')
+                """,
+                (report_id, created_at, text, json.dumps(risks))
+            )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _snapshot(path: str) -> dict:
+    """마이그레이션 결과 비교용: 스키마 버전, 리포트 문서, 검색 인덱스, 롤업"""
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    try:
+        return {
+            "version": get_schema_version(conn),
+            "docs": {row["id"]: row_to_doc(conn, row) for row in conn.execute(REPORT_DOC_SELECT, (0, 100))},
+            "search": sorted(r[0] for r in conn.execute(
+                f"SELECT report_id FROM {search.FTS_TABLE} WHERE {search.FTS_TABLE} MATCH ?",
+                (search.build_match_query(["milk"]),)
+            )),
+            "fts_rows": conn.execute(f"SELECT COUNT(*) FROM {search.FTS_TABLE}").fetchone()[0],
+            "daily": [tuple(r) for r in conn.execute("SELECT * FROM analytics_daily ORDER BY day, country")],
+            "flags": [tuple(r) for r in conn.execute("SELECT * FROM analytics_flags_daily ORDER BY allergen")],
+        }
+    finally:
+        conn.close()
+
+
+def test_legacy_baseline_migrates_to_latest(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    _baseline_db(path)
+    messages = []
+
+    assert run_migrations(path, messages.append) == len(MIGRATIONS)
+    state = _snapshot(path)
+    assert state["version"] == LATEST_VERSION
+    assert state["docs"]["legacy01"]["risks"] == [{"allergen": "Milk", "severity": "HIGH"}]
+    assert state["docs"]["legacy02"]["ocr_text"] == "원재료명: 설탕, 소금"
+    assert state["search"] == ["legacy01"]
+    assert state["fts_rows"] == 2
+    assert state["daily"] == [("2024-05-01", "US", 2, 1, 0)]
+    assert state["flags"] == [("2024-05-01", "US", "Milk", "HIGH", 1)]
+    assert any(m.startswith(f"v{LATEST_VERSION}:") for m in messages)
+
+    # 두 번째 실행: 이미 최신이므로 적용할 단계가 없다
+    assert run_migrations(path, messages.append) == 0
+    assert _snapshot(path) == state
+
+
+def test_steps_are_idempotent(tmp_path):
+    path = str(tmp_path / "rerun.db")
+    _baseline_db(path)
+    run_migrations(path, lambda message: None)
+    state = _snapshot(path)
+
+    # user_version을 잃은 DB(복원 등)에서 모든 단계를 다시 적용해도 실패하거나 데이터가 늘지 않는다
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA user_version = 0;")
+    conn.close()
+    assert run_migrations(path, lambda message: None) == len(MIGRATIONS)
+    assert _snapshot(path) == state
+
+
+def test_new_db_starts_at_latest(tmp_path):
+    path = str(tmp_path / "new.db")
+    assert run_migrations(path, lambda message: None) == len(MIGRATIONS)
+    assert run_migrations(path, lambda message: None) == 0
+    conn = sqlite3.connect(path)
+    try:
+        assert get_schema_version(conn) == LATEST_VERSION
+        assert conn.execute("PRAGMA auto_vacuum;").fetchone()[0] == 2  # INCREMENTAL
+    finally:
+        conn.close()
@@ -0,0 +1,64 @@
+"""리포트 소유권 이전 (src/api/ownership.py): 배치 이전 중에도 새 ID로 모든 리포트가 보인다"""
+import uuid
+
+from src.api import ownership
+from src.api.db import (
+    _owner_ids, count_reports, get_report, get_reports, init_db, save_report, search_reports, upsert_user_email
+)
+from src.rules.checker import get_rules_version
+
+REPORTS = 5
+BATCH_SIZE = 2
+
+
+def _save(user_id: str, index: int) -> str:
+    return save_report(
+        user_id=user_id, country="US", ocr_engine="google", ocr_text=f"Ingredients: oat flakes lot{index}",
+        allergens=[], nutrition={}, risks=[], promo={}, rules_version=get_rules_version("US"),
+    )
+
+
+def test_reports_stay_visible_during_migration(monkeypatch):
+    init_db()
+    old_id, new_id = f"old-{uuid.uuid4().hex[:8]}", f"new-{uuid.uuid4().hex[:8]}"
+    email = f"{old_id}@example.com"
+    upsert_user_email(old_id, email)
+    report_ids = {_save(old_id, i) for i in range(REPORTS)}
+    for report_id in report_ids:
+        assert get_report(report_id, user_id=old_id)
+
+    # 이전 작업만 등록하고 행은 옮기지 않은 상태 (백그라운드 이전이 아직 시작 전)
+    monkeypatch.setattr(ownership, "sync_limit", lambda: 0)
+    monkeypatch.setattr(ownership, "run_in_background", lambda old_user_id, batch_size=0: True)
+    assert upsert_user_email(new_id, email) == {"migrated_from": old_id, "total": REPORTS, "background": True}
+    assert _owner_ids(new_id) == [new_id, old_id]
+
+    def _visible_to_new() -> None:
+        assert count_reports(user_id=new_id) == REPORTS
+        assert {r["id"] for r in get_reports(limit=REPORTS + 1, user_id=new_id)} == report_ids
+        assert all(get_report(report_id, user_id=new_id) for report_id in report_ids)
+        assert search_reports("oat", user_id=new_id)["total"] == REPORTS
+
+    _visible_to_new()
+
+    # 배치마다 (일부는 옮겨졌고 일부는 이전 ID에 남은 상태) 새 ID로 전부 보인다
+    batches = []
+
+    def _progress(state: dict) -> None:
+        batches.append(state["moved"])
+        assert _owner_ids(new_id) == [new_id, old_id]
+        _visible_to_new()
+
+    assert ownership.run_migration(old_id, batch_size=BATCH_SIZE, progress=_progress) == REPORTS
+    assert batches == [2, 4, 5]
+
+    # 끝나면 새 ID만 소유자, 이전 ID로는 보이지 않는다
+    assert _owner_ids(new_id) == [new_id]
+    assert ownership.migration_status(new_id)[0]["status"] == ownership.STATUS_DONE
+    _visible_to_new()
+    assert count_reports(user_id=old_id) == 0
+    assert search_reports("oat", user_id=old_id)["total"] == 0
+    for report_id in report_ids:
+        # 이전 소유자로 캐시됐던 리포트도 배치마다 무효화된다
+        assert get_report(report_id, user_id=old_id) is None
+        assert get_report(report_id)["user_id"] == new_id
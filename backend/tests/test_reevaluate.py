@@ -0,0 +1,103 @@
+"""저장된 리포트 재평가 (src/api/reevaluate.py)"""
+import pytest
+
+from src.api import reevaluate
+from src.api.db import get_connection, get_report, init_db, save_report, shard_for
+from src.api.reevaluate import current_versions, reevaluate_reports
+from src.api.storage import encode_report, row_to_doc
+from src.rules import batch
+from src.rules.analyzer import analyze_label
+
+OCR_ENGINE = "google"
+LANGUAGE = "한국어/영어 혼합"
+
+# (국가, OCR 텍스트): PASS / HIGH / 교차오염 / 규칙 파일 없는 국가 / 빈 텍스트
+LABELS = [
+    ("US", "원재료: 설탕, 소금\n영양정보 나트륨 10mg"),
+    ("US", "원재료명: 밀가루, 우유, 설탕"),
+    ("US", "Contains: Milk, Soy, Wheat.\nNutrition Facts Sodium 470mg"),
+    ("US", "이 제품은 땅콩을 사용한 제품과 같은 제조시설에서 제조하고 있습니다"),
+    ("JP", "원재료: 설탕, 소금"),
+    ("JP", "乳, 小麦, 卵 を含む"),
+    ("VN", "Thành phần: đường, muối"),
+    ("VN", "lúa mì, trứng, sữa"),
+    ("EU", "Ingredients: sugar, salt"),
+    ("EU", "Ingredients: wheat flour, egg, milk"),
+    ("CN", "配料: 白砂糖, 食用盐"),
+    ("XX", "원재료: 설탕, 소금"),
+    ("XX", "원재료명: 땅콩, 우유"),
+    ("US", ""),
+]
+
+
+def _save(country: str, text: str, rules_version: str) -> str:
+    analysis = analyze_label(text, country, OCR_ENGINE, LANGUAGE)
+    pack = analysis.report_pack
+    return save_report(
+        user_id="test-user",
+        country=country,
+        ocr_engine=OCR_ENGINE,
+        ocr_text=text,
+        allergens=analysis.allergens,
+        nutrition=analysis.nutrition,
+        risks=pack.get("risks", []),
+        promo={},
+        summary=pack.get("summary"),
+        input_data_status=pack.get("input_data_status"),
+        correction_guide=pack.get("correction_guide"),
+        regulatory_basis=pack.get("regulatory_basis"),
+        rules_version=rules_version,
+    )
+
+
+@pytest.fixture(params=["per_text", "vectorized"])
+def stale_reports(request, monkeypatch):
+    """
+    현재 규칙으로 판정했지만 rules_version만 예전 값인 리포트 (끝나면 모두 현재 버전으로 맞춘다)
+    - vectorized: 적은 리포트도 check_risks_batch의 행렬 경로로 판정 (numpy/scipy 필요)
+    """
+    if request.param == "vectorized":
+        if not batch.vectorized_available():
+            pytest.skip("numpy/scipy 없음")
+        monkeypatch.setattr(batch, "MIN_VECTORIZED_GROUP", 1)
+        monkeypatch.setattr(reevaluate, "MIN_VECTORIZED_GROUP", 1)
+    init_db()
+    ids = [_save(country, text, "stale") for country, text in LABELS]
+    yield ids
+    reevaluate_reports(workers=1)
+
+
+def test_unchanged_results_are_not_rewritten(stale_reports):
+    stats = reevaluate_reports(workers=1, dry_run=True)
+    assert stats["scanned"] == len(stale_reports)
+    assert stats["failed"] == 0
+    assert stats["changed"] == 0
+    assert stats["unchanged"] == len(stale_reports)
+
+    stats = reevaluate_reports(workers=1)
+    assert (stats["changed"], stats["unchanged"]) == (0, len(stale_reports))
+    versions = current_versions()
+    for report_id, (country, _) in zip(stale_reports, LABELS):
+        with get_connection(shard=shard_for(report_id)) as conn:
+            row = conn.execute("SELECT rules_version FROM reports WHERE id = ?", (report_id,)).fetchone()
+        assert row["rules_version"] == versions.get(country, versions[""])
+
+
+def test_changed_results_are_rewritten(stale_reports):
+    # 판정 당시와 다른 텍스트로 저장된 리포트 = 규칙이 바뀐 것과 같은 효과
+    changed_id = _save("US", "원재료: 설탕, 소금", "stale")
+    with get_connection(shard=shard_for(changed_id)) as conn:
+        row = conn.execute("SELECT * FROM reports WHERE id = ?", (changed_id,)).fetchone()
+        doc = row_to_doc(conn, row)
+        doc["ocr_text"] = "원재료명: 땅콩, 설탕"
+        payload, ocr_payload = encode_report(conn, doc)
+        conn.execute(
+            "UPDATE reports SET payload = ?, ocr_payload = ? WHERE id = ?", (payload, ocr_payload, changed_id)
+        )
+        conn.commit()
+
+    stats = reevaluate_reports(workers=1)
+    assert stats["changed"] == 1
+    assert stats["unchanged"] == len(stale_reports)
+    risks = get_report(changed_id)["risks"]
+    assert "Peanuts" in [r["allergen"] for r in risks if r["severity"] == "HIGH"]
@@ -0,0 +1,80 @@
+"""규칙 레지스트리 재로딩 (src/rules/registry.py): 잘못된 파일로 바뀌어도 이전 RuleSet 유지"""
+import json
+import os
+import shutil
+
+import pytest
+
+from src.rules.checker import CHECKER_VERSION, ONTOLOGY_PATH, RULES_DIR, WARNING_MARKERS, _get_allergen_rule_description
+from src.rules.registry import RuleRegistry
+
+
+@pytest.fixture
+def registry(tmp_path):
+    shutil.copy(os.path.join(RULES_DIR, "us_fda.json"), tmp_path / "us_fda.json")
+    shutil.copy(ONTOLOGY_PATH, tmp_path / "ontology.json")
+    return RuleRegistry(
+        {"US": "us_fda.json"}, str(tmp_path), CHECKER_VERSION, _get_allergen_rule_description,
+        markers=WARNING_MARKERS, ontology_path=str(tmp_path / "ontology.json"),
+    )
+
+
+def _write(path, raw: bytes) -> None:
+    with open(path, "wb") as f:
+        f.write(raw)
+    # 같은 크기로 같은 시각에 다시 쓰여도 stamp가 바뀌도록
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+
+def _count_reloads(monkeypatch, registry) -> list:
+    calls = []
+    reload = registry._reload
+
+    def counting(*args):
+        calls.append(args[0])
+        return reload(*args)
+
+    monkeypatch.setattr(registry, "_reload", counting)
+    return calls
+
+
+def test_broken_rule_file_keeps_previous_rules(registry, tmp_path, monkeypatch):
+    path = tmp_path / "us_fda.json"
+    good = path.read_bytes()
+    before = registry.get("US")
+    assert before
+
+    calls = _count_reloads(monkeypatch, registry)
+    _write(path, good[:len(good) // 2])  # 쓰는 중인 파일
+    assert registry.get("US") is before
+    assert registry.get("US") is before
+    assert len(calls) == 1  # 실패한 stamp를 기록해 다시 시도하지 않는다
+
+    data = json.loads(good)
+    data["major_allergens"] = data["major_allergens"][:1]
+    _write(path, json.dumps(data).encode("utf-8"))
+    after = registry.get("US")
+    assert after.version != before.version
+    assert len(after.allergens) == 1
+
+
+def test_ontology_cycle_keeps_previous_rules(registry, tmp_path, monkeypatch):
+    path = tmp_path / "ontology.json"
+    good = path.read_bytes()
+    before = registry.get("US")
+
+    calls = _count_reloads(monkeypatch, registry)
+    _write(path, json.dumps({"derivations": {"milk": ["whey"], "whey": ["milk"]}}).encode("utf-8"))
+    assert registry.get("US") is before
+    assert registry.get("US") is before
+    assert len(calls) == 1
+
+    _write(path, good)
+    assert registry.get("US").version == before.version
+
+
+def test_first_load_error_is_raised(registry, tmp_path):
+    _write(tmp_path / "us_fda.json", b"{")
+    with pytest.raises(ValueError):
+        registry.get("US")
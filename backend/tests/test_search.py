@@ -0,0 +1,68 @@
+"""리포트 전문 검색 (src/api/search.py, db.search_reports): 한글 2-gram 인덱스"""
+import uuid
+
+import pytest
+
+from src.api.db import delete_report, init_db, save_report, search_reports
+from src.rules.checker import get_rules_version
+
+TEXTS = {
+    "peanut_butter": "원재료명: 땅콩버터, 설탕, 정제소금",
+    "milk": "원재료명: 우유, 밀가루, 버섯",
+    "cookie": "원재료명: 버터쿠키 (벨기에산)",
+}
+
+
+@pytest.fixture
+def reports():
+    """검색어가 다른 테스트 리포트와 섞이지 않도록 테스트마다 새 user_id"""
+    init_db()
+    user_id = f"search-{uuid.uuid4().hex[:8]}"
+    ids = {
+        name: save_report(
+            user_id=user_id, country="US", ocr_engine="google", ocr_text=text,
+            allergens=[], nutrition={}, risks=[], promo={}, rules_version=get_rules_version("US"),
+        )
+        for name, text in TEXTS.items()
+    }
+    return user_id, ids
+
+
+def _found(query: str, user_id: str) -> set:
+    result = search_reports(query, user_id=user_id)
+    assert result["total"] == len(result["results"])
+    return {r["id"] for r in result["results"]}
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("땅콩", {"peanut_butter"}),                 # 2음절
+    ("우유", {"milk"}),
+    ("버터", {"peanut_butter", "cookie"}),       # 단어 중간/앞 모두
+    ("콩버", {"peanut_butter"}),
+    ("밀가루", {"milk"}),                        # 3음절 이상은 2-gram phrase
+    ("땅콩버터", {"peanut_butter"}),
+    ("버터쿠키", {"cookie"}),
+    ("가루밀", set()),                           # 같은 음절이라도 순서가 다르면 없음
+    ("밀", {"milk"}),                            # 1음절은 syllables 컬럼
+    ("우유 밀가루", {"milk"}),                   # 용어 AND
+    ("땅콩 우유", set()),
+])
+def test_korean_queries(reports, query, expected):
+    user_id, ids = reports
+    assert _found(query, user_id) == {ids[name] for name in expected}
+
+
+def test_snippet_comes_from_ocr_text(reports):
+    user_id, ids = reports
+    [hit] = search_reports("땅콩버터", user_id=user_id)["results"]
+    assert hit["id"] == ids["peanut_butter"]
+    assert "땅콩버터" in hit["snippet"]
+
+
+def test_deleted_report_leaves_search(reports):
+    user_id, ids = reports
+    assert delete_report(ids["peanut_butter"])
+    assert _found("땅콩", user_id) == set()
+    assert _found("버터", user_id) == {ids["cookie"]}
+    # 사용자 필터 없이도 인덱스에 남아 있지 않다
+    assert ids["peanut_butter"] not in {r["id"] for r in search_reports("땅콩", limit=100)["results"]}
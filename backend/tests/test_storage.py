@@ -0,0 +1,118 @@
+"""리포트 payload 저장 포맷 (src/api/storage.py): SPLIT / BLOB / 레거시 행 읽기와 변환"""
+import json
+
+import pytest
+
+from src.api import db
+from src.api.db import get_connection, get_report, get_report_with_conn, init_db, save_report, shard_for
+from src.api.storage import (
+    PAYLOAD_FIELDS,
+    STORAGE_FORMAT_BLOB,
+    STORAGE_FORMAT_LEGACY,
+    STORAGE_FORMAT_SPLIT,
+    encode_payload,
+    migrate_legacy_rows,
+)
+from src.rules.checker import get_rules_version
+
+DOC = {
+    "ocr_text": "원재료명: 밀가루, 우유, 설탕\nContains: Milk, Wheat." * 20,
+    "allergens": ["밀", "우유"],
+    "nutrition": {"sodium_mg": 120},
+    "risks": [{
+        "allergen": "Wheat", "severity": "HIGH", "rule_id": "US-ALG-WHEAT",
+        "details": {"regulation": "FALCPA", "article": "Sec. 203"},
+    }],
+    "promo": {"headline": "바삭한 과자"},
+    "summary": {"status": "HIGH"},
+    "input_data_status": {"ocr": "ok"},
+    "correction_guide": [{"issue": "밀", "fix": "Contains: Wheat"}],
+    "regulatory_basis": ["FALCPA"],
+}
+
+
+@pytest.fixture(autouse=True)
+def no_report_cache(monkeypatch):
+    monkeypatch.setattr(db.report_cache, "maxsize", 0)
+    init_db()
+
+
+def _save() -> str:
+    return save_report(
+        user_id="storage-user", country="US", ocr_engine="google", rules_version=get_rules_version("US"), **DOC
+    )
+
+
+def _expected(report_id: str) -> dict:
+    return {"id": report_id, "user_id": "storage-user", "country": "US", "ocr_engine": "google", **DOC}
+
+
+def _stored_format(report_id: str) -> int:
+    with get_connection(shard=shard_for(report_id)) as conn:
+        return conn.execute("SELECT storage_format FROM reports WHERE id = ?", (report_id,)).fetchone()[0]
+
+
+def test_split_round_trip():
+    report_id = _save()
+    assert _stored_format(report_id) == STORAGE_FORMAT_SPLIT
+    report = get_report(report_id)
+    assert {k: report[k] for k in _expected(report_id)} == _expected(report_id)
+
+
+def test_split_projection_skips_ocr_text(monkeypatch):
+    report_id = _save()
+
+    def _fail(blob):
+        raise AssertionError("ocr_payload를 압축 해제하면 안 됨")
+
+    monkeypatch.setattr(db, "decode_ocr_text", _fail)
+    with get_connection(shard=shard_for(report_id)) as conn:
+        report = get_report_with_conn(conn, report_id, ["id", "summary", "risks"])
+    assert report == {"id": report_id, "summary": DOC["summary"], "risks": DOC["risks"]}
+
+
+def test_split_ocr_text_only_skips_payload(monkeypatch):
+    report_id = _save()
+
+    def _fail(conn, blob):
+        raise AssertionError("payload를 압축 해제하면 안 됨")
+
+    monkeypatch.setattr(db, "decode_payload", _fail)
+    with get_connection(shard=shard_for(report_id)) as conn:
+        report = get_report_with_conn(conn, report_id, ["id", "ocr_text"])
+    assert report == {"id": report_id, "ocr_text": DOC["ocr_text"]}
+
+
+def test_blob_and_legacy_rows_are_read_and_migrated():
+    blob_id, legacy_id = _save(), _save()
+    with get_connection(shard=shard_for(blob_id)) as conn:
+        # 단일 BLOB 포맷 (ocr_text도 payload 안)
+        conn.execute(
+            "UPDATE reports SET payload = ?, ocr_payload = NULL, storage_format = ? WHERE id = ?",
+            (encode_payload(conn, DOC), STORAGE_FORMAT_BLOB, blob_id)
+        )
+        conn.commit()
+    with get_connection(shard=shard_for(legacy_id)) as conn:
+        # 레거시 포맷 (컬럼별 JSON 텍스트)
+        conn.execute(
+            f"""
+            UPDATE reports SET payload = NULL, ocr_payload = NULL, storage_format = ?,
+                {', '.join(f'{f} = ?' for f in PAYLOAD_FIELDS)}
+            WHERE id = ?
+            """,
+            [STORAGE_FORMAT_LEGACY, DOC["ocr_text"]]
+            + [json.dumps(DOC[f], ensure_ascii=False) for f in PAYLOAD_FIELDS[1:]]
+            + [legacy_id]
+        )
+        conn.commit()
+
+    for report_id in (blob_id, legacy_id):
+        report = get_report(report_id)
+        assert {k: report[k] for k in _expected(report_id)} == _expected(report_id)
+        assert get_report(report_id, fields=["summary"]) == {"id": report_id, "summary": DOC["summary"]}
+
+    assert migrate_legacy_rows()["rows"] >= 2
+    for report_id in (blob_id, legacy_id):
+        assert _stored_format(report_id) == STORAGE_FORMAT_SPLIT
+        report = get_report(report_id)
+        assert {k: report[k] for k in _expected(report_id)} == _expected(report_id)
@@ -203,6 +203,9 @@ const HistoryPage: React.FC = () => {
             <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6">
               {history.map((item) => (
                 <div key={item.id} onClick={() => navigate(`/reports/${item.id}`)} className="group relative cursor-pointer rounded-2xl bg-card border border-card-border p-6 transition-all hover:bg-card-sub-bg hover:border-primary">
+                  {item.thumbnailUrl && (
+                    <img src={item.thumbnailUrl} alt="" loading="lazy" className="mb-4 h-32 w-full rounded-xl object-cover bg-card-sub-bg" />
+                  )}
                   <div className="flex justify-between items-start mb-4">
                     <div className="flex items-center gap-3">
                       <span className="text-2xl">{countryFlags[item.country]}</span>
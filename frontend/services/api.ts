@@ -141,6 +141,9 @@ function convertReportListItem(api: ApiReportListItem): AnalysisReport {
       snsCopy: "",
       buyerPitch: "",
     },
+    thumbnailUrl: api.image_hash
+      ? `${API_BASE_URL}/api/images/${api.image_hash}`
+      : undefined,
   };
 }
 
@@ -15,6 +15,7 @@ export interface AnalysisReport {
   regulations: RegulationCheck[];
   marketing: MarketingSuggestion;
   userEmail?: string;
+  thumbnailUrl?: string;
 }
 
 export interface Nutrient {
@@ -76,4 +77,5 @@ export interface ApiReportListItem {
   created_at: string;
   country: string;
   ocr_engine: string;
+  image_hash?: string | null;
 }